@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
-"""Add sample data to the auction database for testing."""
+"""Add sample data to the auction database for testing.
 
+    python add_sample_data.py                  # a few users, items and bids
+    python add_sample_data.py --items 1000000  # plus a synthetic catalog
+"""
+
+import argparse
+from sqlalchemy import insert
 from app.db.session import SessionLocal
 from app.models.user import User, UserRole
 from app.models.item import Item, AuctionStatus
@@ -9,6 +15,14 @@ from app.services.auth import get_password_hash
 from datetime import datetime, timedelta
 import random
 
+# Vocabulary for synthetic catalog items
+ERAS = ["Vintage", "Antique", "Modern", "Retro", "Victorian", "Art Deco", "Mid-Century", "Handmade"]
+MATERIALS = ["Brass", "Silver", "Oak", "Walnut", "Ceramic", "Leather", "Glass", "Copper", "Porcelain", "Steel"]
+OBJECTS = ["Watch", "Vase", "Lamp", "Clock", "Camera", "Guitar", "Chair", "Mirror", "Teapot", "Compass",
+           "Typewriter", "Radio", "Bookcase", "Necklace", "Telescope", "Globe", "Record Player", "Desk"]
+CONDITIONS = ["mint condition", "fully restored", "lightly used", "original box", "signed by the maker",
+              "minor scratches", "working order", "rare edition", "estate sale find", "museum quality"]
+
 def add_sample_data():
     """Add sample users, items, and bids to the database."""
     db = SessionLocal()
@@ -166,5 +180,43 @@ def add_sample_data():
     finally:
         db.close()
 
+def add_catalog_items(db, count: int, seller_ids, batch_size: int = 50_000, seed: int = 0) -> int:
+    """Bulk-insert ``count`` synthetic items with searchable titles and descriptions."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    statuses = [AuctionStatus.ACTIVE] * 6 + [AuctionStatus.DRAFT] * 2 + [AuctionStatus.ENDED] * 2
+    for offset in range(0, count, batch_size):
+        rows = []
+        for n in range(offset, min(offset + batch_size, count)):
+            era, material, thing = rng.choice(ERAS), rng.choice(MATERIALS), rng.choice(OBJECTS)
+            price = round(rng.lognormvariate(4, 1.2), 2)
+            rows.append({
+                "title": f"{era} {material} {thing} #{n}",
+                "description": f"{era} {thing.lower()} in {material.lower()}, {rng.choice(CONDITIONS)}, "
+                               f"{rng.choice(CONDITIONS)}. Lot {n}.",
+                "starting_price": price,
+                "current_price": price,
+                "seller_id": rng.choice(seller_ids),
+                "start_time": now - timedelta(hours=1),
+                "end_time": now + timedelta(days=1, seconds=n % 86400),
+                "status": rng.choice(statuses),
+            })
+        db.execute(insert(Item), rows)
+        db.commit()
+    return count
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=0, help="synthetic catalog items to add")
+    args = parser.parse_args()
+
     add_sample_data()
+    if args.items:
+        db = SessionLocal()
+        try:
+            sellers = [user_id for (user_id,) in db.query(User.id).filter(User.role == UserRole.SELLER)]
+            add_catalog_items(db, args.items, sellers)
+            print(f"Added {args.items} catalog items")
+        finally:
+            db.close()
@@ -0,0 +1,38 @@
+"""composite indexes for hot queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 04:58:29.073409
+
+Indexes the access paths of the item and bid services:
+
+- ``ix_bids_item_id_amount``: an item's bids ordered by amount, the highest
+  bid, and the bid count join (covering for ``count(bids.id)``)
+- ``ix_bids_bidder_id_created_at``: a user's bids, newest first
+- ``ix_items_status_end_time``: active listings and the expired-auction sweep
+- ``ix_items_seller_id``: a seller's listings
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bids_item_id_amount', 'bids', ['item_id', 'amount'], unique=False)
+    op.create_index('ix_bids_bidder_id_created_at', 'bids', ['bidder_id', 'created_at'], unique=False)
+    op.create_index('ix_items_status_end_time', 'items', ['status', 'end_time'], unique=False)
+    op.create_index('ix_items_seller_id', 'items', ['seller_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_seller_id', table_name='items')
+    op.drop_index('ix_items_status_end_time', table_name='items')
+    op.drop_index('ix_bids_bidder_id_created_at', table_name='bids')
+    op.drop_index('ix_bids_item_id_amount', table_name='bids')
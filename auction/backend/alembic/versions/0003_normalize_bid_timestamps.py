@@ -0,0 +1,34 @@
+"""normalize bid timestamps
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 05:21:40.118204
+
+SQLite stores DateTime values as text. Rows that took the CURRENT_TIMESTAMP
+server default have no fractional seconds, while rows written by SQLAlchemy
+carry six digits, and the two forms compare wrongly as strings. Bids are now
+paginated on ``(created_at, id)``, so pad the short form.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(
+            "UPDATE bids SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+
+
+def downgrade() -> None:
+    # The padded values are equivalent; nothing to undo.
+    pass
@@ -0,0 +1,46 @@
+"""denormalized bid counters on items
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 06:02:13.551870
+
+Adds ``bid_count``, ``high_bidder_id`` and ``last_bid_at`` to ``items`` so the
+details view and the listings no longer aggregate ``bids`` per row, and fills
+them from the existing bids.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bid_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('high_bidder_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('last_bid_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_foreign_key('fk_items_high_bidder_id_users', 'users', ['high_bidder_id'], ['id'])
+
+    op.execute(
+        "UPDATE items SET "
+        "bid_count = (SELECT count(*) FROM bids WHERE bids.item_id = items.id), "
+        "last_bid_at = (SELECT max(bids.created_at) FROM bids WHERE bids.item_id = items.id), "
+        "high_bidder_id = (SELECT bids.bidder_id FROM bids WHERE bids.item_id = items.id "
+        "ORDER BY bids.amount DESC, bids.id DESC LIMIT 1) "
+        "WHERE EXISTS (SELECT 1 FROM bids WHERE bids.item_id = items.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_items_high_bidder_id_users', type_='foreignkey')
+        batch_op.drop_column('last_bid_at')
+        batch_op.drop_column('high_bidder_id')
+        batch_op.drop_column('bid_count')
@@ -0,0 +1,59 @@
+"""item full-text search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 06:41:07.209318
+
+An FTS5 index over ``items.title`` and ``items.description`` for
+``/items/search``, kept in step by triggers and built from the existing rows.
+SQLite only; other databases need their own full-text index. A later batch
+migration that recreates ``items`` drops the triggers and must add them back.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE items_fts USING fts5("
+        "title, description, content='items', content_rowid='id')"
+    )
+    op.execute("INSERT INTO items_fts(items_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    op.execute(
+        "CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER items_fts_update AFTER UPDATE OF title, description ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    )
+    op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS items_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS items_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS items_fts_insert")
+    op.execute("DROP TABLE IF EXISTS items_fts")
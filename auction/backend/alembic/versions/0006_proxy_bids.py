@@ -0,0 +1,44 @@
+"""proxy bids
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:12:40.118264
+
+Adds ``proxy_bids``: one hidden maximum per bidder and item, which the bid
+service bids up to on the bidder's behalf.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('proxy_bids',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('bidder_id', sa.Integer(), nullable=False),
+    sa.Column('max_amount', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['bidder_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('item_id', 'bidder_id', name='uq_proxy_bids_item_id_bidder_id')
+    )
+    with op.batch_alter_table('proxy_bids', schema=None) as batch_op:
+        batch_op.create_index('ix_proxy_bids_item_id_max_amount', ['item_id', 'max_amount'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('proxy_bids', schema=None) as batch_op:
+        batch_op.drop_index('ix_proxy_bids_item_id_max_amount')
+
+    op.drop_table('proxy_bids')
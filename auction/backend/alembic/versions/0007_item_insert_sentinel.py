@@ -0,0 +1,31 @@
+"""item insert sentinel
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 07:39:17.201723
+
+Adds ``insert_order`` to ``items``: SQLAlchemy numbers the rows of a
+multi-row INSERT in it, so the ids RETURNING gives back can be put in the
+order of the rows, without sending one INSERT per row.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('insert_order', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('insert_order')
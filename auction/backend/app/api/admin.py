@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.api.auth import get_current_user
+from app.core.config import settings
+from app.core.query_budget import query_budget
+from app.core.slow_query import ORDERS, slow_queries
+from app.models.user import UserRole
+from app.services.principal import Principal
+from app.schemas.admin import SlowQueryReport
+
+router = APIRouter()
+
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Allow administrators only."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required"
+        )
+    return current_user
+
+
+@router.get("/slow-queries", response_model=SlowQueryReport, dependencies=[query_budget(1)])
+async def get_slow_queries(
+    limit: int = Query(default=20, le=500),
+    order: str = Query(default="total", pattern=f"^({'|'.join(ORDERS)})$"),
+    current_user: Principal = Depends(get_current_admin)
+):
+    """The slowest statements seen since startup, worst first.
+
+    ``order`` ranks by total time (``total``), slowest single run (``max``) or
+    number of slow runs (``count``).
+    """
+    return {
+        "threshold_ms": settings.slow_query_threshold_ms,
+        **{name: value for name, value in slow_queries.stats().items() if name != "statements"},
+        "statements": slow_queries.top(limit, order),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT, dependencies=[query_budget(1)])
+async def reset_slow_queries(current_user: Principal = Depends(get_current_admin)):
+    """Forget the statements recorded so far."""
+    slow_queries.reset()
@@ -1,23 +1,25 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.services import authenticate_user, create_access_token, get_user_by_username
+from app.db.session import DBSession, get_db
+from app.services import aio, create_access_token
 from app.schemas.auth import Token, LoginRequest
 from app.core.config import settings
+from app.core.query_budget import query_budget
+from app.core.rate_limit import rate_limit
+from app.services.principal import Principal, principal_cache
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[query_budget(1), rate_limit("login")])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Login user and return access token."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await aio.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,22 +34,16 @@ async def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.post("/register")
+@router.post("/register", dependencies=[query_budget(3), rate_limit("register")])
 async def register(
     user_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Register a new user (simplified - just for testing)."""
     # In a real app, you'd have proper user registration with email verification
-    from app.services import create_user, get_user_by_username
+    from app.services import UserExists, get_password_hash_async
     from app.schemas.user import UserCreate, UserRole
 
-    if get_user_by_username(db, user_data.username):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-
     # Create user with default role
     user_create = UserCreate(
         email=f"{user_data.username}@example.com",  # Simplified
@@ -56,17 +52,30 @@ async def register(
         role=UserRole.BUYER
     )
 
-    user = create_user(db, user_create)
+    hashed_password = await get_password_hash_async(user_data.password)
+    try:
+        user = await aio.register_user(db, user_create, hashed_password=hashed_password)
+    except UserExists as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered" if exc.field == "email" else "Username already registered"
+        )
     return {"message": "User created successfully", "user_id": user.id}
 
 
 # Dependency to get current user
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+    db: DBSession = Depends(get_db)
+) -> Principal:
     """Get current authenticated user."""
     from app.services import verify_token
+    if settings.principal_cache_enabled:
+        principal = principal_cache.get(token)
+        if principal is not None:
+            return principal
+    generation = principal_cache.generation()
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -77,8 +86,11 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
 
-    user = get_user_by_username(db, token_data.username)
+    user = await aio.get_user_by_username(db, token_data.username)
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = Principal.from_user(user)
+    if settings.principal_cache_enabled:
+        principal_cache.put(token, principal, token_data.expires_at, generation)
+    return principal
@@ -1,66 +1,191 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+import math
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.core.conditional import cache_control, item_validators
+from app.core.pagination import page_response
+from app.db.session import DBSession, get_db
 from app.api.auth import get_current_user
-from app.models.user import User as UserModel
-from app.schemas.bid import Bid, BidCreate
-from app.services import (
-    get_item_bids, get_user_bids, create_bid, validate_bid_amount, get_item_by_id
-)
+from app.api.items import item_not_modified
+from app.services.principal import Principal
+from app.schemas.bid import Bid, BidBatchEntry, BidCreate, BidResult, ProxyBidCreate, ProxyBidResult
+from app.services import aio, BidOutcome
 from app.models.item import AuctionStatus
+from app.services.bid import ITEM_BIDS_ORDER, USER_BIDS_ORDER
+from app.services.bid_engine import bid_engine
+from app.core.config import settings
+from app.core.metrics import bid_outcomes
+from app.core.query_budget import query_budget
+from app.core.rate_limit import rate_limited_user
 
 router = APIRouter()
 
+# Authentication, then per chunk: read the items, move their prices, insert the bids
+BATCH_QUERY_BUDGET = 1 + 3 * math.ceil(settings.bid_batch_max_size / settings.bid_batch_chunk_size)
 
-@router.get("/item/{item_id}", response_model=List[Bid])
+
+@router.get("/item/{item_id}", response_model=List[Bid],
+            dependencies=[query_budget(3), cache_control(settings.cache_control_items)])
 async def get_item_bids_endpoint(
     item_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = Query(default=100, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
 ):
-    """Get all bids for an item."""
+    """Get all bids for an item, highest first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page; ``skip`` is ignored when a cursor is given. The ``ETag`` is the
+    item's, which changes with every accepted bid; send it back as
+    ``If-None-Match`` for a 304 while there are no new bids.
+    """
+    after = ITEM_BIDS_ORDER.decode(cursor) if cursor else None
+    unchanged = await item_not_modified(request, db, item_id)
+    if unchanged is not None:
+        return unchanged
     # Check if item exists
-    item = get_item_by_id(db, item_id)
+    item = await aio.get_item_by_id(db, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
 
-    return get_item_bids(db, item_id, skip=skip, limit=limit)
+    bids = await aio.get_item_bids(db, item_id, skip=skip, limit=limit, after=after)
+    return item_validators(item).apply(page_response(bids, ITEM_BIDS_ORDER.next_cursor(bids, limit)))
+
+
+def _raise_bid_rejected(outcome: BidOutcome):
+    """Translate a rejected bid into the matching HTTP error."""
+    if outcome == BidOutcome.TOO_LOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bid amount"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cannot place bid (auction not active or item not found)"
+    )
 
 
-@router.post("/", response_model=Bid)
+@router.post("/", response_model=Bid, dependencies=[query_budget(6)])
 async def create_bid_endpoint(
     bid: BidCreate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = rate_limited_user("bids", get_current_user),
+    db: DBSession = Depends(get_db)
 ):
-    """Place a bid on an item."""
-    # Validate bid amount
-    if not validate_bid_amount(db, bid.item_id, bid.amount):
+    """Place a bid on an item.
+
+    If another bidder's proxy is still above the bid, it answers at once;
+    the bid is accepted but no longer leads.
+    """
+    if settings.bid_engine_enabled:
+        decision = await run_in_threadpool(
+            bid_engine.place_bid, bid.item_id, current_user.id, bid.amount
+        )
+        bid_outcomes.inc((decision.reason or BidOutcome.ACCEPTED).value)
+        if not decision.accepted:
+            _raise_bid_rejected(decision.reason)
+        return decision.bid
+
+    outcome, new_bid = await aio.place_bid(db, bid, current_user.id)
+    bid_outcomes.inc(outcome.value)
+    if outcome != BidOutcome.ACCEPTED:
+        _raise_bid_rejected(outcome)
+
+    return new_bid
+
+
+@router.post("/batch", response_model=List[BidResult], dependencies=[query_budget(BATCH_QUERY_BUDGET)])
+async def create_bids_batch_endpoint(
+    bids: List[BidBatchEntry],
+    current_user: Principal = rate_limited_user("bid_batch", get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    """Place up to ``BID_BATCH_MAX_SIZE`` bids in one request, for automated bidders.
+
+    Each bid is accepted or rejected exactly as if it had been sent alone to
+    ``POST /bids/``, in array order. The response is always 200 and lists one
+    result per bid, in the same order, with the bid's ``client_ref`` and its
+    ``outcome`` (``accepted``, ``too_low``, ``not_active`` or ``not_found``).
+    """
+    if len(bids) > settings.bid_batch_max_size:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid bid amount"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.bid_batch_max_size} bids per batch"
         )
 
-    # Create the bid
-    new_bid = create_bid(db, bid, current_user.id)
-    if not new_bid:
+    if settings.bid_engine_enabled:
+        decisions = await run_in_threadpool(
+            bid_engine.place_bids, [(bid.item_id, bid.amount) for bid in bids], current_user.id
+        )
+        placed = [(decision.reason or BidOutcome.ACCEPTED, decision.bid) for decision in decisions]
+    else:
+        placed = [
+            (outcome, new_bid and {"item_id": new_bid.item_id, "amount": new_bid.amount, "id": new_bid.id,
+                                   "bidder_id": new_bid.bidder_id, "created_at": new_bid.created_at})
+            for outcome, new_bid in await aio.place_bids(db, bids, current_user.id)
+        ]
+
+    for outcome, count in Counter(outcome for outcome, _ in placed).items():
+        bid_outcomes.inc(outcome.value, amount=count)
+    # Built to match BidResult, so they are encoded without validating each one again
+    return ORJSONResponse([
+        {"client_ref": bid.client_ref, "item_id": bid.item_id, "amount": bid.amount,
+         "outcome": outcome.value, "bid": new_bid}
+        for bid, (outcome, new_bid) in zip(bids, placed)
+    ])
+
+
+@router.post("/proxy", response_model=ProxyBidResult, dependencies=[query_budget(7)])
+async def create_proxy_bid_endpoint(
+    proxy: ProxyBidCreate,
+    current_user: Principal = rate_limited_user("proxy_bids", get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    """Set or raise a hidden maximum bid on an item.
+
+    The proxy bids for you, one increment (``BID_INCREMENTS``) over the
+    competition at a time, up to ``max_amount``, which is never shown. The
+    response has the item's resulting price, whether you lead, and the
+    visible bids this caused. Not available while ``BID_ENGINE_ENABLED``.
+    """
+    if settings.bid_engine_enabled:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot place bid (auction not active or item not found)"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Proxy bids are not available while the bid engine is enabled"
         )
 
-    return new_bid
+    outcome, resolution, placed = await aio.place_proxy_bid(db, proxy, current_user.id)
+    bid_outcomes.inc(outcome.value)
+    if outcome != BidOutcome.ACCEPTED:
+        _raise_bid_rejected(outcome)
+    # Built to match ProxyBidResult, as for batches
+    return ORJSONResponse({
+        "item_id": proxy.item_id,
+        "max_amount": proxy.max_amount,
+        "outcome": outcome.value,
+        "current_price": resolution.price,
+        "leading": resolution.leader_id == current_user.id,
+        "bids": [{"item_id": new_bid.item_id, "amount": new_bid.amount, "id": new_bid.id,
+                  "bidder_id": new_bid.bidder_id, "created_at": new_bid.created_at} for new_bid in placed],
+    })
 
 
-@router.get("/user/me", response_model=List[Bid])
+@router.get("/user/me", response_model=List[Bid],
+            dependencies=[query_budget(2), cache_control(settings.cache_control_private)])
 async def get_my_bids(
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    skip: int = 0,
+    limit: int = Query(default=100, le=100),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
-    """Get current user's bids."""
-    return get_user_bids(db, current_user.id)
+    """Get current user's bids, newest first."""
+    after = USER_BIDS_ORDER.decode(cursor) if cursor else None
+    bids = await aio.get_user_bids(db, current_user.id, skip=skip, limit=limit, after=after)
+    return page_response(bids, USER_BIDS_ORDER.next_cursor(bids, limit))
@@ -1,82 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import math
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional
-from app.db.session import get_db
+from app.core.conditional import Validators, cache_control, is_conditional, item_validators, not_modified
+from app.core.config import settings
+from app.core.pagination import page_response
+from app.core.query_budget import query_budget
+from app.core.rate_limit import rate_limited_user
+from app.db.session import DBSession, get_db
 from app.api.auth import get_current_user
-from app.models.user import User as UserModel
-from app.schemas.item import Item, ItemCreate, ItemUpdate, ItemWithBids
-from app.services import (
-    get_item_by_id, get_items, get_active_items, get_user_items,
-    create_item, update_item, activate_item, get_item_with_bid_count
-)
+from app.models.item import AuctionStatus
+from app.services.principal import Principal
+from app.schemas.item import Item, ItemCreate, ItemImportReport, ItemUpdate, ItemWithBids
+from app.services import aio
+from app.services.item import ACTIVE_ITEMS_ORDER, ITEMS_ORDER, SEARCH_ORDER
+from app.services.item_import import READERS, check_declared_size, import_items
 
 router = APIRouter()
 
+# Authentication, then one INSERT per chunk
+IMPORT_QUERY_BUDGET = 1 + math.ceil(settings.item_import_max_rows / settings.item_import_chunk_size)
 
-@router.get("/", response_model=List[Item])
+
+async def item_not_modified(request: Request, db: DBSession, item_id: int) -> Optional[Response]:
+    """A 304 when a conditional GET's copy of the item is current, else ``None``."""
+    if not is_conditional(request):
+        return None
+    version = await aio.get_item_version(db, item_id)
+    if version is None:
+        return None
+    validators = Validators.for_item(*version)
+    return not_modified(validators) if validators.matches(request) else None
+
+
+@router.get("/", response_model=List[ItemWithBids],
+            dependencies=[query_budget(1), cache_control(settings.cache_control_listings)])
 async def get_items_endpoint(
     skip: int = 0,
     limit: int = Query(default=100, le=100),
     active_only: bool = False,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
 ):
-    """Get all items or active items only."""
+    """Get all items or active items only.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page; ``skip`` is ignored when a cursor is given.
+    """
+    order = ACTIVE_ITEMS_ORDER if active_only else ITEMS_ORDER
+    after = order.decode(cursor) if cursor else None
     if active_only:
-        items = get_active_items(db, skip=skip, limit=limit)
+        items = await aio.get_active_items(db, skip=skip, limit=limit, after=after)
     else:
-        items = get_items(db, skip=skip, limit=limit)
-    return items
+        items = await aio.get_items(db, skip=skip, limit=limit, after=after)
+    return page_response(items, order.next_cursor(items, limit))
 
 
-@router.get("/{item_id}", response_model=Item)
+@router.get("/search", response_model=List[ItemWithBids],
+            dependencies=[query_budget(1), cache_control(settings.cache_control_listings)])
+async def search_items_endpoint(
+    q: str = Query(min_length=1, max_length=200),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    status_filter: Optional[AuctionStatus] = Query(default=None, alias="status"),
+    limit: int = Query(default=20, le=100),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    """Search item titles and descriptions, best match first.
+
+    Every word in ``q`` must match; end a word with ``*`` to match it as a
+    prefix. Follow ``X-Next-Cursor`` for more results.
+    """
+    after = SEARCH_ORDER.decode(cursor) if cursor else None
+    items, last = await aio.search_items(
+        db, q, min_price=min_price, max_price=max_price, status=status_filter,
+        limit=limit, after=after
+    )
+    return page_response(items, SEARCH_ORDER.encode(last) if len(items) == limit else None)
+
+
+@router.get("/{item_id}", response_model=Item,
+            dependencies=[query_budget(2), cache_control(settings.cache_control_items)])
 async def get_item(
     item_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db)
 ):
-    """Get item by ID."""
-    item = get_item_by_id(db, item_id)
+    """Get item by ID.
+
+    Send the ``ETag`` back as ``If-None-Match`` for a 304 while the item is
+    unchanged.
+    """
+    unchanged = await item_not_modified(request, db, item_id)
+    if unchanged is not None:
+        return unchanged
+    item = await aio.get_item_by_id(db, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
+    item_validators(item).apply(response)
     return item
 
 
-@router.get("/{item_id}/details")
+@router.get("/{item_id}/details", dependencies=[query_budget(2), cache_control(settings.cache_control_items)])
 async def get_item_details(
     item_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db)
 ):
-    """Get item with bid count."""
-    item_details = get_item_with_bid_count(db, item_id)
+    """Get item with bid count; conditional like ``GET /items/{item_id}``."""
+    unchanged = await item_not_modified(request, db, item_id)
+    if unchanged is not None:
+        return unchanged
+    item_details = await aio.get_item_with_bid_count(db, item_id)
     if not item_details:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
+    item_validators(item_details).apply(response)
     return item_details
 
 
-@router.post("/", response_model=Item)
+@router.post("/", response_model=Item, dependencies=[query_budget(3)])
 async def create_item_endpoint(
     item: ItemCreate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
     """Create a new auction item."""
-    return create_item(db, item, current_user.id)
+    return await aio.create_item(db, item, current_user.id)
 
 
-@router.put("/{item_id}", response_model=Item)
+@router.post("/bulk", response_model=ItemImportReport, dependencies=[query_budget(IMPORT_QUERY_BUDGET)],
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 media_type: {"schema": {}} for media_type in READERS}}})
+async def import_items_endpoint(
+    request: Request,
+    activate: bool = False,
+    current_user: Principal = rate_limited_user("item_import", get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    """Create up to ``ITEM_IMPORT_MAX_ROWS`` items from one upload.
+
+    Send a JSON array of items, NDJSON (one item per line) or CSV with a
+    header row of item field names; NDJSON and CSV are read as they stream
+    in. Items are created as drafts, or with ``activate=true`` those already
+    open start active. The report has one line per row, in upload order:
+    its ``id`` and ``status``, or the ``errors`` that rejected it.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    reader = READERS.get(media_type)
+    if reader is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload one of: {', '.join(READERS)}"
+        )
+    check_declared_size(media_type, request.headers.get("content-length"))
+    report = await import_items(db, reader(request.stream()), current_user.id, activate=activate)
+    return Response(report, media_type="application/json")
+
+
+@router.put("/{item_id}", response_model=Item, dependencies=[query_budget(4)])
 async def update_item_endpoint(
     item_id: int,
     item_update: ItemUpdate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
     """Update an auction item (seller only)."""
-    updated_item = update_item(db, item_id, item_update, current_user.id)
+    updated_item = await aio.update_item(db, item_id, item_update, current_user.id)
     if not updated_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,14 +182,14 @@ async def update_item_endpoint(
     return updated_item
 
 
-@router.post("/{item_id}/activate", response_model=Item)
+@router.post("/{item_id}/activate", response_model=Item, dependencies=[query_budget(2)])
 async def activate_item_endpoint(
     item_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
     """Activate an auction item (seller only)."""
-    activated_item = activate_item(db, item_id, current_user.id)
+    activated_item = await aio.activate_item(db, item_id, current_user.id)
     if not activated_item:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -101,10 +198,16 @@ async def activate_item_endpoint(
     return activated_item
 
 
-@router.get("/user/me", response_model=List[Item])
+@router.get("/user/me", response_model=List[ItemWithBids],
+            dependencies=[query_budget(2), cache_control(settings.cache_control_private)])
 async def get_my_items(
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    skip: int = 0,
+    limit: int = Query(default=100, le=100),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
     """Get current user's auction items."""
-    return get_user_items(db, current_user.id)
+    after = ITEMS_ORDER.decode(cursor) if cursor else None
+    items = await aio.get_user_items(db, current_user.id, skip=skip, limit=limit, after=after)
+    return page_response(items, ITEMS_ORDER.next_cursor(items, limit))
@@ -0,0 +1,95 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.query_budget import query_budget
+from app.db.session import DBSession, get_db
+from app.services import aio
+from app.services.bid_hub import bid_hub
+
+router = APIRouter()
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    """Read (and ignore) client messages until the socket closes."""
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/ws/items/{item_id}")
+async def item_updates_websocket(
+    websocket: WebSocket,
+    item_id: int,
+    db: DBSession = Depends(get_db)
+):
+    """Push ``{item_id, amount, bidder_id, seq}`` for each new high bid on an item.
+
+    Rapid bids are coalesced, so clients get the latest price in ``seq`` order
+    rather than every bid. A consumer that cannot keep up is closed with 1013.
+    """
+    if not await aio.get_item_by_id(db, item_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = bid_hub.subscribe(item_id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(websocket))
+    try:
+        while True:
+            update = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({update, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                update.cancel()
+                return
+            event = update.result()
+            if event is None:
+                break
+            await websocket.send_text(event.json)
+    finally:
+        disconnected.cancel()
+        bid_hub.unsubscribe(subscription)
+
+    await websocket.close(
+        code=status.WS_1013_TRY_AGAIN_LATER if subscription.dropped else status.WS_1001_GOING_AWAY
+    )
+
+
+async def _event_stream(request: Request, item_id: int):
+    subscription = bid_hub.subscribe(item_id)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), timeout=settings.live_updates_keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield f"id: {event.seq}\nevent: bid\ndata: {event.json}\n\n"
+    finally:
+        bid_hub.unsubscribe(subscription)
+
+
+@router.get("/sse/items/{item_id}", dependencies=[query_budget(1)])
+async def item_updates_sse(
+    item_id: int,
+    request: Request,
+    db: DBSession = Depends(get_db)
+):
+    """Server-sent events fallback for ``/ws/items/{item_id}``."""
+    if not await aio.get_item_by_id(db, item_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    return StreamingResponse(
+        _event_stream(request, item_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
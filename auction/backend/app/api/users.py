@@ -1,54 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from typing import List
-from app.db.session import get_db
+from app.db.session import DBSession, get_db
 from app.api.auth import get_current_user
-from app.models.user import User as UserModel
+from app.services.principal import Principal
 from app.schemas.user import User, UserCreate, UserUpdate
-from app.services import create_user, get_user_by_id, update_user
+from app.services import UserExists, aio, get_password_hash_async
+from app.core.conditional import cache_control
+from app.core.config import settings
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
 
-@router.post("/", response_model=User)
+@router.post("/", response_model=User, dependencies=[query_budget(3)])
 async def create_user_endpoint(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Create a new user."""
-    from app.services import get_user_by_email, get_user_by_username
-
-    # Check if user already exists
-    if get_user_by_email(db, user.email):
+    hashed_password = await get_password_hash_async(user.password)
+    try:
+        # One call checks the email and username and inserts, on one session
+        return await aio.register_user(db, user, hashed_password=hashed_password)
+    except UserExists as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail="Email already registered" if exc.field == "email" else "Username already taken"
         )
-    if get_user_by_username(db, user.username):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-
-    return create_user(db, user)
 
 
-@router.get("/me", response_model=User)
+@router.get("/me", response_model=User,
+            dependencies=[query_budget(1), cache_control(settings.cache_control_private)])
 async def get_current_user_info(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get current user information."""
     return current_user
 
 
-@router.put("/me", response_model=User)
+@router.put("/me", response_model=User, dependencies=[query_budget(4)])
 async def update_current_user(
     user_update: UserUpdate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
 ):
     """Update current user information."""
-    updated_user = update_user(db, current_user.id, user_update)
+    updated_user = await aio.update_user(db, current_user.id, user_update)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,13 +54,13 @@ async def update_current_user(
     return updated_user
 
 
-@router.get("/{user_id}", response_model=User)
+@router.get("/{user_id}", response_model=User, dependencies=[query_budget(1)])
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Get user by ID."""
-    user = get_user_by_id(db, user_id)
+    user = await aio.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,183 @@
+"""Caching primitives and read-through cache backends."""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` overrides the cache default for this entry."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CacheBackend(ABC):
+    """Storage behind a read-through cache.
+
+    ``shared`` backends live outside the process: values must be serialized and
+    calls may block, so callers should keep them off the event loop.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """The value stored under ``key``, or ``None``."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """Drop ``keys``; missing ones are ignored."""
+
+    @abstractmethod
+    def counters(self, *names: str) -> List[int]:
+        """Current values of named counters (0 if never incremented)."""
+
+    @abstractmethod
+    def incr(self, name: str) -> int:
+        """Increment a named counter and return its new value."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every cached value."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU backend; values are stored as-is."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size, ttl)
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    def counters(self, *names: str) -> List[int]:
+        return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend shared by every worker through Redis (or anything speaking its protocol).
+
+    Needs the ``redis`` package. Pass ``client`` to use an existing client, such
+    as a ``fakeredis`` instance in development.
+    """
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "auction:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError("The redis cache backend needs the 'redis' package") from exc
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl > 0:
+            self._client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*(self.prefix + key for key in keys))
+
+    def counters(self, *names: str) -> List[int]:
+        values = self._client.mget([self.prefix + name for name in names])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def incr(self, name: str) -> int:
+        return self._client.incr(self.prefix + name)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
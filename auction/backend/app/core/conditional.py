@@ -0,0 +1,130 @@
+"""Conditional GET: validators, 304 responses and Cache-Control policies.
+
+An item's version is the time of its last change (``updated_at``, or
+``created_at`` before the first) plus its bid count, which every accepted bid
+advances. ``Validators`` turns a version into a strong ``ETag`` and a
+``Last-Modified`` date and answers ``If-None-Match`` / ``If-Modified-Since``
+(RFC 9110: when both are sent, only the entity tag is compared). Handlers
+probe the version first and return ``not_modified`` before loading or
+serializing anything.
+
+Routes declare how clients and shared caches may keep their responses with
+``dependencies=[cache_control(policy)]``; ``CacheControlMiddleware`` adds the
+header to successful GETs.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, Request, Response, status
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+
+class Validators:
+    """The ``ETag`` and ``Last-Modified`` values of one version of a resource."""
+
+    __slots__ = ("etag", "last_modified")
+
+    def __init__(self, etag: str, last_modified: datetime):
+        self.etag = etag
+        # Stored datetimes are naive UTC; HTTP dates have whole seconds
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        self.last_modified = last_modified.replace(microsecond=0)
+
+    @classmethod
+    def for_item(cls, item_id: int, changed_at: datetime, bid_count: int) -> "Validators":
+        if isinstance(changed_at, str):  # cached in a shared backend as JSON
+            changed_at = datetime.fromisoformat(changed_at)
+        stamp = changed_at.strftime("%Y%m%d%H%M%S%f")
+        return cls(f'"{item_id}-{stamp}-{bid_count}"', changed_at)
+
+    def headers(self) -> dict:
+        return {
+            ETAG_HEADER: self.etag,
+            LAST_MODIFIED_HEADER: format_datetime(self.last_modified, usegmt=True),
+        }
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers())
+        return response
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's cached copy, described by its request headers, is current."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 asks for If-None-Match
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def item_validators(item) -> Validators:
+    """Validators of an item read as an ORM object, a schema or a dict."""
+    if isinstance(item, Mapping):
+        return Validators.for_item(item["id"], item["updated_at"] or item["created_at"], item["bid_count"])
+    return Validators.for_item(item.id, item.updated_at or item.created_at, item.bid_count)
+
+
+def not_modified(validators: Validators) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers())
+
+
+class CacheControl:
+    """Route dependency declaring the route's ``Cache-Control`` policy."""
+
+    def __init__(self, policy: str):
+        self.policy = policy
+
+    async def __call__(self, request: Request) -> None:
+        request.state.cache_control = self.policy
+
+
+def cache_control(policy: str):
+    """``dependencies=[cache_control(policy)]`` sends ``policy`` on the route's successful GETs."""
+    return Depends(CacheControl(policy))
+
+
+_CACHEABLE_STATUSES = frozenset((200, 203, 304))
+
+
+class CacheControlMiddleware:
+    """Pure ASGI middleware adding the route's ``Cache-Control`` to successful GETs.
+
+    A handler that sets the header itself keeps its own value.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message):
+            if message["type"] == "http.response.start" and message["status"] in _CACHEABLE_STATUSES:
+                policy: Optional[str] = scope.get("state", {}).get("cache_control")
+                headers = list(message.get("headers", []))
+                if policy is not None and not any(name.lower() == b"cache-control" for name, _ in headers):
+                    headers.append((b"cache-control", policy.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
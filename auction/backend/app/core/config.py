@@ -5,12 +5,116 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database settings
     database_url: str = "sqlite:///./auction.db"
+    async_database: bool = False
+    async_database_url: Optional[str] = None  # derived from database_url when unset
+
+    # Connection pool (recycle and pre-ping apply to server databases only)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # SQLite tuning, applied to every new connection
+    sqlite_tuning: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456
 
     # Security settings
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # Authenticated principal cache
+    principal_cache_enabled: bool = True
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 60.0
+
+    # Password hashing executor ("thread", "process" or "inline")
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 256
+
+    # Bid engine settings
+    bid_engine_enabled: bool = False
+    bid_engine_batch_size: int = 500
+    bid_engine_flush_interval: float = 0.05
+    # Failed writes a bid survives before it is dead-lettered (logged and dropped)
+    bid_engine_flush_attempts: int = 3
+
+    # Proxy bidding: the step a proxy raises by, as "from:step" pairs, so the
+    # default steps by 0.05 under 1, by 0.25 from 1 up to 5, and so on
+    bid_increments: str = "0:0.05,1:0.25,5:0.5,25:1,100:2.5,250:5,500:10,1000:25,2500:50,5000:100"
+
+    # POST /bids/batch: most bids per request, and per transaction
+    bid_batch_max_size: int = 1000
+    bid_batch_chunk_size: int = 250
+
+    # POST /items/bulk: most rows per upload, and per INSERT; JSON arrays are
+    # parsed whole, so they are also capped in bytes
+    item_import_max_rows: int = 100000
+    item_import_chunk_size: int = 1000
+    item_import_max_json_bytes: int = 32 * 1024 * 1024
+
+    # Rate limits: token buckets per route, as "key:capacity/seconds" entries
+    # (a bucket of capacity tokens per user, ip or item, refilled over seconds);
+    # "memory" buckets are per process, "redis" ones shared by every worker
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_login: str = "ip:20/60"
+    rate_limit_register: str = "ip:10/60"
+    rate_limit_bids: str = "user:10/1,item:50/1"
+    rate_limit_bid_batch: str = "user:2/1,item:50/1"
+    rate_limit_proxy_bids: str = "user:10/1,item:50/1"
+    rate_limit_item_import: str = "user:5/60"
+
+    # Auction lifecycle scheduler
+    lifecycle_scheduler_enabled: bool = True
+    lifecycle_batch_size: int = 1000
+    lifecycle_max_sleep: float = 60.0
+
+    # Read-through item cache ("memory" per process, or "redis" shared by workers)
+    item_cache_enabled: bool = True
+    item_cache_backend: str = "memory"
+    item_cache_redis_url: str = "redis://localhost:6379/0"
+    item_cache_size: int = 10000
+    item_cache_ttl_seconds: float = 10.0
+    item_cache_listing_ttl_seconds: float = 5.0
+
+    # Cache-Control sent on successful GETs. Items and their bids are
+    # revalidated on every use (cheap: see ETag/304); listings may be reused
+    # briefly; a user's own lists stay out of shared caches.
+    cache_control_items: str = "no-cache"
+    cache_control_listings: str = "public, max-age=2"
+    cache_control_private: str = "private, no-cache"
+
+    # Request, SQL and bid metrics served at /metrics
+    metrics_enabled: bool = True
+
+    # Slow-query log: statements over the threshold, with plans, at /admin/slow-queries
+    slow_query_log_enabled: bool = True
+    slow_query_threshold_ms: float = 100.0
+    slow_query_sample_rate: float = 1.0  # share of slow statements logged and explained
+    slow_query_max_per_second: float = 5.0
+    slow_query_explain: bool = True
+
+    # Development/test: count each request's SQL statements against its route budget
+    query_budget_enabled: bool = False
+    query_budget_repeat_threshold: int = 3  # log a statement shape sent this many times
+
+    # Single-flight: concurrent identical item/bid reads share one query
+    single_flight_enabled: bool = True
+    single_flight_max_wait_seconds: float = 5.0
+
+    # Live bid updates (WebSocket/SSE)
+    live_updates_queue_size: int = 64
+    live_updates_coalesce_interval: float = 0.05
+    live_updates_keepalive_seconds: float = 15.0
+
     # App settings
     app_name: str = "Auction Website"
     debug: bool = True
@@ -0,0 +1,115 @@
+"""Bounded executor for CPU-heavy calls made from async handlers."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a job is submitted while the executor's queue is full."""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} executor queue is full")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def _timed_call(fn: Callable, *args: Any):
+    """Run ``fn`` in the worker and report when it started.
+
+    Module-level so it can be pickled for a process pool; ``time.monotonic`` is
+    system-wide on Linux, so worker and caller timestamps are comparable.
+    """
+    return time.monotonic(), fn(*args)
+
+
+class BoundedExecutor:
+    """A fixed-size thread or process pool with a bounded queue and wait metrics.
+
+    ``kind`` is ``"thread"``, ``"process"`` or ``"inline"``. Inline runs the call
+    directly on the event loop and exists for comparison benchmarks.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, kind: str = "thread"):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix=self.name
+                        )
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool and await its result."""
+        if self.kind == "inline":
+            return fn(*args)
+
+        with self._lock:
+            if self._outstanding >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._outstanding += 1
+            self.submitted += 1
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        try:
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+
+        wait = max(0.0, started_at - submitted_at)
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker."""
+        return max(0, self._outstanding - self.max_workers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": min(self._outstanding, self.max_workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,295 @@
+"""Request, SQL and bid metrics in the Prometheus text format.
+
+A small in-process registry rather than ``prometheus_client``: counters,
+gauges and histograms keyed by label values, rendered on demand by
+``/metrics``. ``MetricsMiddleware`` times every HTTP request by route template
+and ``instrument_engine`` times every SQL statement; statements run while a
+request is in progress are also added to that request's DB time.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """A named family of samples, one per combination of label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: tuple) -> Dict[str, str]:
+        return dict(zip(self.label_names, values))
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """``(name suffix, labels, value)`` for every sample of the family."""
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("", self._labels(labels), value) for labels, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Per label values: [count per bucket (+Inf last), sum]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            yield from histogram_samples(self._labels(labels), self.buckets, counts, total)
+
+
+def histogram_samples(labels: Dict[str, str], buckets: Sequence[float], counts: Sequence[int],
+                      total: float) -> Iterable[Sample]:
+    """Cumulative ``_bucket``, ``_sum`` and ``_count`` samples from per-bucket counts."""
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        yield "_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+    yield "_sum", labels, total
+    yield "_count", labels, cumulative
+
+
+class Collected(Metric):
+    """A metric whose samples are read from elsewhere at scrape time."""
+
+    def __init__(self, name: str, help: str, type: str, collect: Callable[[], Iterable[Sample]]):
+        super().__init__(name, help)
+        self.type = type
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        return self._collect()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collected(self, name: str, help: str, type: str, collect: Callable[[], Iterable[Sample]]) -> Collected:
+        return self.register(Collected(name, help, type, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+http_db_duration = registry.histogram(
+    "http_request_db_seconds", "Time each HTTP request spent in SQL statements", ("method", "route"),
+    STATEMENT_BUCKETS + (2.5, 5.0))
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+db_statements = registry.counter("db_statements_total", "SQL statements executed, by operation", ("operation",))
+db_duration = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement latency by operation", ("operation",), STATEMENT_BUCKETS)
+bid_outcomes = registry.counter("auction_bids_total", "Bids submitted through the API, by outcome", ("outcome",))
+bids_dead_lettered = registry.counter(
+    "bid_engine_dead_letters_total", "Bids the engine accepted but could not write, after every attempt")
+rate_limited = registry.counter(
+    "http_rate_limited_total", "Requests refused by a rate limit, by route and key", ("route", "key"))
+
+
+class RequestStats:
+    """SQL work done on behalf of one HTTP request."""
+
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by the middleware; threadpool calls and AsyncSession greenlets inherit it
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    return head if head in _OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None or not settings.metrics_enabled:
+        return
+    elapsed = time.perf_counter() - started
+    operation = _operation(statement)
+    db_statements.inc(operation)
+    db_duration.observe(elapsed, operation)
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(sync_engine) -> None:
+    """Time every statement run on ``sync_engine`` (use ``.sync_engine`` for async engines)."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+_route_templates: Dict[Callable, str] = {}
+
+
+def route_template(scope) -> str:
+    """The matched route's path template (``/items/{item_id}``) for an HTTP scope.
+
+    Read from the endpoint the router stored in the scope, so it is only known
+    once routing has happened; paths no route matched share one label.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = _route_templates.get(endpoint)
+    if template is None:
+        for route in getattr(scope.get("router"), "routes", ()):
+            if getattr(route, "endpoint", None) is not None:
+                _route_templates.setdefault(route.endpoint, route.path)
+        template = _route_templates.get(endpoint, UNMATCHED_ROUTE)
+    return template
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and DB time per route.
+
+    Routes are labelled by their template, so item ids never become label
+    values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            current_request.reset(token)
+            method, route = scope["method"], route_template(scope)
+            http_requests.inc(method, route, str(status))
+            http_duration.observe(elapsed, method, route)
+            http_db_duration.observe(stats.db_seconds, method, route)
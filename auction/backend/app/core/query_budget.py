@@ -0,0 +1,127 @@
+"""Per-request SQL statement counts, query budgets and N+1 detection.
+
+Off by default; set ``QUERY_BUDGET_ENABLED=true`` in development and when
+running ``benchmarks.query_budget``. While it is on, ``QueryBudgetMiddleware``
+counts the statements each request sends, returns the count in
+``X-Query-Count`` (and the route's budget in ``X-Query-Budget``), and logs
+requests that go over their budget or repeat one statement shape, the usual
+sign of a lazy relationship loaded in a loop.
+
+Routes declare their budget with ``dependencies=[query_budget(n)]``.
+"""
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_BUDGET_HEADER = "X-Query-Budget"
+
+
+class QueryLog:
+    """Statements sent on behalf of one request, counted by SQL text."""
+
+    __slots__ = ("shapes", "budget")
+
+    def __init__(self):
+        # Bound parameters are not part of the text, so one shape covers every row
+        self.shapes: Counter = Counter()
+        self.budget: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        return sum(self.shapes.values())
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes sent at least ``threshold`` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+current_queries: ContextVar[Optional[QueryLog]] = ContextVar("current_queries", default=None)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = current_queries.get()
+    if log is not None:
+        log.shapes[statement] += 1
+
+
+def track_queries(sync_engine) -> None:
+    """Count statements run on ``sync_engine`` against the current request."""
+    event.listen(sync_engine, "before_cursor_execute", _record_statement)
+
+
+class QueryBudget:
+    """Route dependency declaring the most statements one request may send."""
+
+    def __init__(self, statements: int):
+        self.statements = statements
+
+    async def __call__(self) -> None:
+        log = current_queries.get()
+        if log is not None:
+            log.budget = self.statements
+
+
+def query_budget(statements: int):
+    """``dependencies=[query_budget(n)]`` gives a route a budget of ``n`` statements."""
+    return Depends(QueryBudget(statements))
+
+
+def route_budget(route) -> Optional[int]:
+    """The budget a route declared, or ``None``."""
+    for dependency in getattr(route, "dependencies", ()):
+        if isinstance(dependency.dependency, QueryBudget):
+            return dependency.dependency.statements
+    return None
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware counting each request's statements against its budget.
+
+    The count is taken when the response starts, so statements a streaming
+    response sends afterwards are logged but not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.query_budget_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = current_queries.set(log)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(log.count).encode()))
+                if log.budget is not None:
+                    headers.append((QUERY_BUDGET_HEADER.lower().encode(), str(log.budget).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            current_queries.reset(token)
+            self._report(scope, log)
+
+    def _report(self, scope, log: QueryLog) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        if log.over_budget():
+            logger.warning("%s sent %d SQL statements, over its budget of %d", request, log.count, log.budget)
+        for shape, count in log.repeated(settings.query_budget_repeat_threshold):
+            logger.warning("%s sent the same statement %d times (N+1?): %s", request, count, " ".join(shape.split()))
@@ -0,0 +1,321 @@
+"""Token-bucket rate limits per route, keyed by user, client IP or item.
+
+A limited route names its limits in ``Settings`` (``RATE_LIMIT_<ROUTE>``) as
+comma-separated ``key:capacity/seconds`` entries: one bucket of ``capacity``
+tokens per user, IP or item, refilled at ``capacity`` tokens every
+``seconds``; a batch takes a token from the bucket of each item it bids
+on. Each request takes a token from every one of its buckets, or,
+if one is empty, from none of them and is refused with 429 and
+``Retry-After``, before the handler (or anything expensive, such as password
+hashing) runs.
+
+Buckets live in the process (``RATE_LIMIT_BACKEND=memory``), or in Redis
+(``redis``) so that every worker shares them. Both run the same refill
+arithmetic; Redis buckets are updated in a WATCH/MULTI transaction rather
+than a script, so they also work against a ``fakeredis`` stand-in.
+
+Routes declare their limit with ``dependencies=[rate_limit(route)]``, or,
+when it is keyed by ``user``, take their user from
+``rate_limited_user(route, get_current_user)``.
+"""
+import inspect
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import rate_limited
+
+logger = logging.getLogger(__name__)
+
+KEYS = ("user", "ip", "item")
+
+
+class RateLimited(Exception):
+    """Raised when a request finds one of its route's buckets empty."""
+
+    def __init__(self, route: str, key: str, retry_after: int):
+        super().__init__(f"{route} rate limit per {key} exceeded")
+        self.route = route
+        self.key = key
+        self.retry_after = retry_after
+
+
+class Limit(NamedTuple):
+    key: str  # "user", "ip" or "item"
+    capacity: float
+    rate: float  # tokens added per second
+
+
+def parse_limits(spec: str) -> List[Limit]:
+    """Parse ``"user:10/1,item:50/1"``; an empty string means no limit."""
+    limits = []
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        try:
+            key, amount = entry.split(":")
+            capacity, seconds = map(float, amount.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {entry!r}; expected key:capacity/seconds") from None
+        if key not in KEYS or capacity < 1 or seconds <= 0:
+            raise ValueError(f"Invalid rate limit {entry!r}; keys are {', '.join(KEYS)}")
+        limits.append(Limit(key, capacity, capacity / seconds))
+    return limits
+
+
+def take_token(state: Optional[Tuple[float, float]], now: float,
+               capacity: float, rate: float) -> Tuple[Tuple[float, float], float]:
+    """Take one token from a bucket holding ``(tokens, as of time)``.
+
+    Returns the bucket's new state and 0, or its refilled state and the
+    seconds until a token is available. A bucket never seen starts full.
+    """
+    tokens, stamp = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+# (key, capacity, tokens added per second)
+Bucket = Tuple[str, float, float]
+
+
+class BucketStore(ABC):
+    """Storage for token buckets.
+
+    ``shared`` stores live outside the process and may block, so callers
+    should keep them off the event loop.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[int, float]]:
+        """Take one token from every bucket, or from none of them.
+
+        Returns ``None`` if every bucket had a token, else the index of the
+        first empty one and the seconds until it has a token again.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every bucket."""
+
+
+class MemoryBucketStore(BucketStore):
+    """Per-process buckets.
+
+    A bucket that has refilled is the same as one never seen, so full buckets
+    are dropped every ``sweep_interval`` seconds to bound memory.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, as of, full at)
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[int, float]]:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._buckets = {name: bucket for name, bucket in self._buckets.items() if bucket[2] > now}
+                self._next_sweep = now + self.sweep_interval
+            saved, taken = self._buckets, []
+            for key, capacity, rate in buckets:
+                # take_token, inlined: this runs on every limited request
+                bucket = saved.get(key)
+                if bucket is None:
+                    tokens = capacity
+                else:
+                    tokens = bucket[0] + (now - bucket[1]) * rate
+                    if tokens > capacity:
+                        tokens = capacity
+                if tokens < 1:
+                    return len(taken), (1 - tokens) / rate
+                taken.append((key, (tokens - 1, now, now + (capacity - tokens + 1) / rate)))
+            saved.update(taken)
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketStore(BucketStore):
+    """Buckets shared by every worker through Redis (or anything speaking its protocol).
+
+    Needs the ``redis`` package; pass ``client`` to use an existing client.
+    Bucket times are wall-clock, so workers' clocks should agree. Each bucket
+    expires once it would be full again.
+    """
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "auction:rate:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError("The redis rate limit backend needs the 'redis' package") from exc
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self.prefix = prefix
+
+    def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[int, float]]:
+        from redis.exceptions import WatchError
+
+        if not buckets:
+            return None
+        names = [self.prefix + key for key, _, _ in buckets]
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*names)
+                    now, taken = time.time(), []
+                    for index, ((_, capacity, rate), saved) in enumerate(zip(buckets, pipe.mget(names))):
+                        state = tuple(map(float, saved.split(b":"))) if saved else None
+                        (tokens, stamp), wait = take_token(state, now, capacity, rate)
+                        if wait:
+                            pipe.unwatch()
+                            return index, wait
+                        taken.append((tokens, stamp, math.ceil((capacity - tokens) / rate * 1000) + 1))
+                    pipe.multi()
+                    for name, (tokens, stamp, expiry_ms) in zip(names, taken):
+                        pipe.set(name, f"{tokens!r}:{stamp!r}", px=expiry_ms)
+                    pipe.execute()
+                    return None
+                except WatchError:
+                    continue  # another worker took a token from one of these buckets meanwhile
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_bucket_store() -> BucketStore:
+    if settings.rate_limit_backend == "redis":
+        return RedisBucketStore(settings.rate_limit_redis_url)
+    if settings.rate_limit_backend != "memory":
+        raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+    return MemoryBucketStore()
+
+
+bucket_store = create_bucket_store()
+
+
+async def _item_ids(request: Request) -> List[Any]:
+    """The items a request is about: its ``item_id`` path parameter, or the
+    ``item_id`` of its JSON object or of each object in its JSON array."""
+    item_id = request.path_params.get("item_id")
+    if item_id is not None:
+        return [item_id]
+    try:
+        body = orjson.loads(await request.body())  # the body is already read for the handler
+    except orjson.JSONDecodeError:
+        return []
+    if isinstance(body, dict):
+        item_ids = [body.get("item_id")]
+    elif isinstance(body, list):
+        # Each item once, however many of a batch's bids are on it
+        item_ids = dict.fromkeys(entry.get("item_id") for entry in body if isinstance(entry, dict))
+    else:
+        return []
+    return [item_id for item_id in item_ids if isinstance(item_id, (int, str))]
+
+
+class RateLimit:
+    """Route dependency taking one token from every one of the route's buckets."""
+
+    def __init__(self, route: str, limits: List[Limit]):
+        self.route = route
+        self.limits = limits
+        self._bucket_prefixes = [(f"{route}:{limit.key}:", limit) for limit in limits]
+
+    async def __call__(self, request: Request) -> None:
+        await self.check(request)
+
+    async def check(self, request: Request, user_id: Optional[int] = None) -> None:
+        if not self.limits or not settings.rate_limit_enabled:
+            return
+        buckets, limits = [], []
+        for prefix, limit in self._bucket_prefixes:
+            if limit.key == "user":
+                values = (user_id,)
+            elif limit.key == "ip":
+                client = request.scope.get("client")
+                values = (client[0] if client else None,)
+            else:
+                values = await _item_ids(request)
+            for value in values:
+                if value is not None:
+                    buckets.append((f"{prefix}{value}", limit.capacity, limit.rate))
+                    limits.append(limit)
+        store = bucket_store
+        if store.shared:
+            refused = await run_in_threadpool(self._take, store, buckets)
+        else:
+            refused = self._take(store, buckets)
+        if refused is not None:
+            index, wait = refused
+            rate_limited.inc(self.route, limits[index].key)
+            raise RateLimited(self.route, limits[index].key, max(1, math.ceil(wait)))
+
+    @staticmethod
+    def _take(store: BucketStore, buckets: List[Bucket]) -> Optional[Tuple[int, float]]:
+        """The store's answer, or ``None`` (let the request through) if it cannot be reached."""
+        try:
+            return store.take(buckets)
+        except Exception as exc:
+            # A limiter that cannot reach its store lets requests through
+            logger.warning("Rate limit store unavailable, %s not limited: %s", buckets[0][0], exc)
+            return None
+
+
+def _route_limiter(route: str) -> RateLimit:
+    return RateLimit(route, parse_limits(getattr(settings, f"rate_limit_{route}")))
+
+
+def rate_limit(route: str):
+    """``dependencies=[rate_limit(route)]`` applies ``RATE_LIMIT_<ROUTE>`` to a route."""
+    limiter = _route_limiter(route)
+    if any(limit.key == "user" for limit in limiter.limits):
+        raise ValueError(f"RATE_LIMIT_{route.upper()} is keyed by user; use rate_limited_user")
+    return Depends(limiter)
+
+
+def rate_limited_user(route: str, current_user: Callable):
+    """``Depends(current_user)``, for an async ``current_user``, that also applies ``RATE_LIMIT_<ROUTE>``.
+
+    The limiter takes the place of the route's ``current_user`` dependency,
+    with the same parameters, rather than adding a second one that depends
+    on it: each dependency costs FastAPI more to resolve than the buckets do.
+    FastAPI caches it apart from ``current_user``, so the route should not
+    also depend on ``current_user`` directly.
+    """
+    limiter = _route_limiter(route)
+    signature = inspect.signature(current_user)
+    if "request" in signature.parameters:
+        raise ValueError(f"{current_user.__name__} already takes a request")
+
+    async def limited_user(request: Request, **params):
+        user = await current_user(**params)
+        await limiter.check(request, user.id)
+        return user
+
+    limited_user.__signature__ = signature.replace(parameters=[
+        inspect.Parameter("request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request),
+        *signature.parameters.values(),
+    ])
+    return Depends(limited_user)
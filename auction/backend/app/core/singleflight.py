@@ -0,0 +1,87 @@
+"""Request coalescing for concurrent identical reads."""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Tuple
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key starts the call as a task; callers that arrive
+    while it runs await the same task instead of starting their own. A caller
+    that has waited ``max_wait`` seconds gives up on the shared call and runs
+    its own. The shared task is shielded, so a caller being cancelled (say, a
+    client disconnecting) does not cancel it for the others.
+
+    Flights carry tags; ``forget`` detaches the flights with a tag so callers
+    arriving after a write start a fresh call rather than joining one that may
+    have read the data before the write. Instances belong to one event loop;
+    ``forget`` may also be called from other threads, and takes effect before
+    it returns, so a writer can forget before it invalidates a cache that
+    callers fill from these flights.
+    """
+
+    def __init__(self, max_wait: float = 5.0):
+        self.max_wait = max_wait
+        self._flights: Dict[Hashable, Tuple[asyncio.Task, FrozenSet[str]]] = {}
+        self._lock = threading.Lock()  # forget runs on writer threads too
+        self.calls = 0
+        self.collapsed = 0
+        self.timeouts = 0
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] is task:
+                del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller gave up
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 tags: Iterable[str] = ()) -> Any:
+        """Return ``await fn()``, sharing the call with others for ``key``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                task = asyncio.ensure_future(fn())
+                self._flights[key] = (task, frozenset(tags))
+        if flight is None:
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.calls += 1
+            return await asyncio.shield(task)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight[0]), self.max_wait)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.calls += 1
+            return await fn()
+        self.collapsed += 1
+        return result
+
+    def forget(self, *tags: str) -> None:
+        """Stop new callers joining flights tagged with any of ``tags``."""
+        wanted = set(tags)
+        with self._lock:
+            for key in [key for key, (_, flight_tags) in self._flights.items() if flight_tags & wanted]:
+                del self._flights[key]
+
+    def forget_all(self) -> None:
+        with self._lock:
+            self._flights.clear()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        requests = self.calls + self.collapsed
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._flights),
+            "collapse_ratio": self.collapsed / requests if requests else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        self.calls = self.collapsed = self.timeouts = 0
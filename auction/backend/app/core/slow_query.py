@@ -0,0 +1,207 @@
+"""Slow-query log with captured query plans.
+
+Every statement slower than ``SLOW_QUERY_THRESHOLD_MS`` is counted against its
+SQL text. A sample of them (``SLOW_QUERY_SAMPLE_RATE``, at most
+``SLOW_QUERY_MAX_PER_SECOND``) is also logged with the types of its bound
+parameters, the service function that sent it and the request route. The
+first sampled occurrence of each statement captures its plan
+(``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` elsewhere). ``slow_queries.top``
+ranks the statements for ``/admin/slow-queries``.
+"""
+import logging
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# The HTTP scope of the request being handled, set by SlowQueryMiddleware
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+ORDERS = ("total", "max", "count")
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Describe bound parameters by type only, so no values reach the log."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {parameter_shape(rows[0])}" if rows else "[]"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        # Collapse runs such as a long IN list: (int x 500, str)
+        runs: List[list] = []
+        for value in parameters:
+            name = type(value).__name__
+            if runs and runs[-1][0] == name:
+                runs[-1][1] += 1
+            else:
+                runs.append([name, 1])
+        return "(" + ", ".join(name if count == 1 else f"{name} x {count}" for name, count in runs) + ")"
+    return type(parameters).__name__
+
+
+def calling_service() -> Optional[str]:
+    """The innermost ``app.services`` function on the current thread's stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.services.") and module != "app.services.aio":
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """The plan of ``statement``, run on a raw cursor so no events or budgets see it."""
+    is_sqlite = conn.dialect.name == "sqlite"
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(("EXPLAIN QUERY PLAN " if is_sqlite else "EXPLAIN ") + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as exc:  # the plan is best effort; never fail the query it describes
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        cursor.close()
+    # SQLite rows are (id, parent, notused, detail); other databases return one text column
+    return "\n".join(str(row[-1] if is_sqlite else row[0]) for row in rows)
+
+
+class SlowQueryLog:
+    """Slow statements aggregated by SQL text, with sampled details.
+
+    Counting is cheap and covers every slow statement. Finding the caller,
+    explaining and logging are sampled and pass a token bucket, so a burst of
+    slow statements cannot turn the log itself into a bottleneck. At most
+    ``max_statements`` statements are kept; the cheapest is dropped for a new one.
+    """
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements: Dict[str, dict] = {}
+            self._tokens = max(settings.slow_query_max_per_second, 1.0)
+            self._refilled = time.monotonic()
+            self.observed = 0
+            self.sampled = 0
+
+    def _take_token(self) -> bool:
+        rate = settings.slow_query_max_per_second
+        now = time.monotonic()
+        self._tokens = min(max(rate, 1.0), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def observe(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        with self._lock:
+            self.observed += 1
+            entry = self._statements.get(statement)
+            if entry is None:
+                if len(self._statements) >= self.max_statements:
+                    cheapest = min(self._statements, key=lambda text: self._statements[text]["total_seconds"])
+                    del self._statements[cheapest]
+                entry = self._statements[statement] = {
+                    "statement": " ".join(statement.split()),
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "last_seen": None,
+                    "parameters": None,
+                    "service": None,
+                    "route": None,
+                    "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_seconds"] += elapsed
+            entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+            entry["last_seen"] = datetime.utcnow()
+            if random.random() >= settings.slow_query_sample_rate or not self._take_token():
+                return
+            self.sampled += 1
+            wants_plan = settings.slow_query_explain and entry["plan"] is None and not executemany
+
+        scope = current_scope.get()
+        details = {
+            "parameters": parameter_shape(parameters, executemany),
+            "service": calling_service(),
+            "route": f"{scope['method']} {route_template(scope)}" if scope is not None else None,
+        }
+        if wants_plan:
+            details["plan"] = explain(conn, statement, parameters)
+        with self._lock:
+            entry.update(details)
+            plan = entry["plan"]
+
+        logger.warning(
+            "Slow query (%.1f ms) from %s during %s: %s | parameters %s%s",
+            elapsed * 1000, details["service"] or "-", details["route"] or "-", entry["statement"],
+            details["parameters"], f"\n{plan}" if wants_plan and plan else "",
+        )
+
+    def top(self, limit: int = 20, order: str = "total") -> List[dict]:
+        """The worst statements by total time, slowest run or count."""
+        key = {"total": "total_seconds", "max": "max_seconds", "count": "count"}[order]
+        with self._lock:
+            entries = [dict(entry) for entry in self._statements.values()]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        return entries[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"observed": self.observed, "sampled": self.sampled, "statements": len(self._statements)}
+
+
+slow_queries = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None or not settings.slow_query_log_enabled:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed * 1000 >= settings.slow_query_threshold_ms:
+        slow_queries.observe(conn, statement, parameters, executemany, elapsed)
+
+
+def log_slow_queries(sync_engine) -> None:
+    """Feed statements run on ``sync_engine`` to ``slow_queries``."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SlowQueryMiddleware:
+    """Pure ASGI middleware that makes the request's route visible to the log."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.slow_query_log_enabled:
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
@@ -1,22 +1,246 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Union
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.metrics import histogram_samples, instrument_engine, registry
+from app.core.query_budget import track_queries
+from app.core.slow_query import log_slow_queries
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+
+class PoolMetrics:
+    """Time spent waiting for a pooled connection, with a cumulative histogram."""
+
+    buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.bucket_counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.bucket_counts[bisect_left(self.buckets, wait)] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+    def histogram(self) -> tuple:
+        """Per-bucket wait counts (``+Inf`` last) and the total wait."""
+        with self._lock:
+            return list(self.bucket_counts), self.wait_seconds_total
+
+
+pool_metrics = PoolMetrics()
+
+
+class _CheckoutTimer:
+    """Pool mixin that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(time.perf_counter() - started)
+        return record
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.rstrip("/") in ("sqlite:", "sqlite+aiosqlite:") or ":memory:" in url or "mode=memory" in url
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection.
+
+    WAL lets readers proceed while a writer commits, synchronous=NORMAL is safe
+    under WAL, and the busy timeout makes writers queue instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        "PRAGMA temp_store=MEMORY",
+    ):
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def create_db_engine(url: str, is_async: bool = False):
+    """Build a sync or asyncio engine with pool and SQLite tuning from settings."""
+    is_sqlite = url.startswith("sqlite")
+    kwargs = {}
+    if is_sqlite and not is_async:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not (is_sqlite and _is_sqlite_memory(url)):
+        kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+        if not is_sqlite:
+            kwargs.update(
+                pool_recycle=settings.db_pool_recycle,
+                pool_pre_ping=settings.db_pool_pre_ping,
+            )
+
+    db_engine = (create_async_engine if is_async else create_engine)(url, **kwargs)
+    sync_engine = db_engine.sync_engine if is_async else db_engine
+    if is_sqlite and settings.sqlite_tuning:
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    instrument_engine(sync_engine)
+    track_queries(sync_engine)
+    log_slow_queries(sync_engine)
+    return db_engine
+
+
+engine = create_db_engine(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Either flavour of session handed to request handlers
+DBSession = Union[Session, AsyncSession]
+
+_ASYNC_DRIVERS = (
+    ("sqlite://", "sqlite+aiosqlite://"),
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("postgres://", "postgresql+asyncpg://"),
+)
+
+
+def to_async_url(url: str) -> str:
+    """Map a synchronous database URL onto its asyncio driver."""
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS:
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database:
+    async_engine = create_db_engine(
+        settings.async_database_url or to_async_url(settings.database_url), is_async=True
+    )
+    # Objects must stay readable after commit: lazy refreshes cannot run outside
+    # run_sync on an AsyncSession.
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def _pool_connection_samples():
+    for name, db_engine in (("sync", engine), ("async", async_engine)):
+        pool = getattr(getattr(db_engine, "sync_engine", db_engine), "pool", None)
+        if isinstance(pool, QueuePool):
+            yield "", {"engine": name, "state": "checked_out"}, pool.checkedout()
+            yield "", {"engine": name, "state": "idle"}, pool.checkedin()
+            yield "", {"engine": name, "state": "overflow"}, max(pool.overflow(), 0)
+
+
+def _pool_wait_samples():
+    counts, total = pool_metrics.histogram()
+    return histogram_samples({}, PoolMetrics.buckets, counts, total)
 
-def get_db():
-    """Dependency to get database session."""
-    db = SessionLocal()
+
+registry.collected("db_pool_connections", "Pooled connections by state", "gauge", _pool_connection_samples)
+registry.collected("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+                   "histogram", _pool_wait_samples)
+registry.collected("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection",
+                   "counter", lambda: [("", {}, pool_metrics.stats()["timeouts"])])
+
+
+async def get_db():
+    """Dependency to get database session.
+
+    Yields an ``AsyncSession`` when ``settings.async_database`` is on and a
+    plain ``Session`` otherwise; use ``run_sync`` to call services with either.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            # run_sync already closed it after each call, so this does no I/O.
+            db.close()
+
+
+def session_like(db: DBSession) -> DBSession:
+    """A new session of the same kind as ``db``, on the same engine.
+
+    For work that may outlive the request that owns ``db``, such as a read
+    shared with other requests: it must not use a session its owner closes.
+    """
+    if isinstance(db, AsyncSession):
+        return AsyncSession(db.bind, autoflush=False, expire_on_commit=False)
+    return Session(bind=db.get_bind(), autoflush=False)
+
+
+def _call_and_close(db: Session, fn: Callable, args: tuple, kwargs: dict) -> Any:
     try:
-        yield db
+        return fn(db, *args, **kwargs)
     finally:
         db.close()
+
+
+async def run_sync(db: DBSession, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Await a synchronous ``fn(session, ...)`` without blocking the event loop.
+
+    On an ``AsyncSession`` the function runs through ``run_sync``, so its I/O is
+    awaited on the async driver. A plain ``Session`` is driven from the threadpool.
+    Each call is its own unit of work: the session is closed afterwards, so the
+    connection goes back to the pool while the handler awaits anything else.
+    Objects the call loaded stay readable once detached.
+    """
+    if isinstance(db, AsyncSession):
+        try:
+            return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+        finally:
+            await db.close()
+    return await run_in_threadpool(_call_and_close, db, fn, args, kwargs)
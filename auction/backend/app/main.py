@@ -1,16 +1,52 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from app.api.auth import router as auth_router
 from app.api.users import router as users_router
 from app.api.items import router as items_router
 from app.api.bids import router as bids_router
+from app.api.live import router as live_router
+from app.api.admin import router as admin_router
+from app.core.conditional import CacheControlMiddleware, ETAG_HEADER
 from app.core.config import settings
+from app.core.executor import ExecutorSaturated
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from app.core.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from app.core.query_budget import QUERY_BUDGET_HEADER, QUERY_COUNT_HEADER, QueryBudgetMiddleware, query_budget
+from app.core.rate_limit import RateLimited
+from app.core.slow_query import SlowQueryMiddleware
+from app.services.auth import hash_executor
+from app.services.bid_engine import bid_engine
+from app.services.bid_hub import bid_hub
+from app.services.item_import import InvalidUpload, UploadTooLarge
+from app.services.lifecycle import auction_scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background components with the app."""
+    bid_hub.start()
+    if settings.bid_engine_enabled:
+        bid_engine.start()
+    if settings.lifecycle_scheduler_enabled:
+        auction_scheduler.start()
+    yield
+    if settings.lifecycle_scheduler_enabled:
+        auction_scheduler.stop()
+    bid_hub.stop()
+    if settings.bid_engine_enabled:
+        bid_engine.stop()
+    hash_executor.shutdown()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     openapi_url=f"/openapi.json",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS
@@ -20,8 +56,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, QUERY_COUNT_HEADER, QUERY_BUDGET_HEADER],
 )
 
+app.add_middleware(CacheControlMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(SlowQueryMiddleware)
+# Added last so it wraps CORS too and times the whole request
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Shed load when a background executor's queue is full."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    """Refuse requests over their route's rate limit until a token is back."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many requests, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    """Reject pagination cursors that were not issued by this API."""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": "Invalid cursor"},
+    )
+
+
+@app.exception_handler(InvalidUpload)
+async def invalid_upload_handler(request: Request, exc: InvalidUpload):
+    """Reject bulk uploads that cannot be read as rows at all."""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    """Reject JSON array uploads too large to parse whole."""
+    return JSONResponse(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        content={"detail": str(exc)},
+    )
+
+
 # Include API routers
 app.include_router(
     auth_router,
@@ -47,14 +137,33 @@ app.include_router(
     tags=["bids"]
 )
 
+app.include_router(
+    live_router,
+    tags=["live"]
+)
 
-@app.get("/")
+app.include_router(
+    admin_router,
+    prefix="/admin",
+    tags=["admin"]
+)
+
+
+@app.get("/", dependencies=[query_budget(0)])
 async def root():
     """Root endpoint."""
     return {"message": "Auction API", "version": "1.0.0"}
 
 
-@app.get("/health")
+@app.get("/metrics", include_in_schema=False, dependencies=[query_budget(0)])
+async def metrics():
+    """Request, SQL, pool and bid metrics in the Prometheus text format."""
+    if not settings.metrics_enabled:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not Found"})
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/health", dependencies=[query_budget(0)])
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
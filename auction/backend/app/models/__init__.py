@@ -1,5 +1,6 @@
 from .user import User, UserRole
 from .item import Item, AuctionStatus
 from .bid import Bid
+from .proxy_bid import ProxyBid
 
-__all__ = ["User", "UserRole", "Item", "AuctionStatus", "Bid"]
+__all__ = ["User", "UserRole", "Item", "AuctionStatus", "Bid", "ProxyBid"]
@@ -1,17 +1,25 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 
 class Bid(Base):
     __tablename__ = "bids"
+    __table_args__ = (
+        # Bids on an item by amount, and a user's bids by time
+        Index("ix_bids_item_id_amount", "item_id", "amount"),
+        Index("ix_bids_bidder_id_created_at", "bidder_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
     bidder_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python so every row stores the same timestamp format; keyset
+    # pagination compares these values directly.
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
 
     # Relationships
     item = relationship("Item", back_populates="bids")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Enum
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Enum, Index, DDL, event, insert_sentinel
+from sqlalchemy.sql import column, func, table
+from sqlalchemy.orm import relationship, synonym
 import enum
+from datetime import datetime
 from app.db.session import Base
 
 
@@ -14,6 +15,11 @@ class AuctionStatus(str, enum.Enum):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # Active/expired auction sweeps and a seller's listings
+        Index("ix_items_status_end_time", "status", "end_time"),
+        Index("ix_items_seller_id", "seller_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -26,9 +32,50 @@ class Item(Base):
     end_time = Column(DateTime(timezone=True), nullable=False)
     status = Column(Enum(AuctionStatus), default=AuctionStatus.DRAFT, nullable=False)
     image_url = Column(String, nullable=True)
+    # Kept in step with ``bids`` by the bid writers; see reconcile_bid_counters
+    bid_count = Column(Integer, nullable=False, default=0, server_default="0")
+    high_bidder_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    last_bid_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python, like the bid writers do, so two edits within one second
+    # still differ; it is part of the item's ETag (app/core/conditional.py)
+    updated_at = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
+    # Numbered by SQLAlchemy in a multi-row INSERT so that RETURNING rows can
+    # be matched back to their parameters (create_items); NULL otherwise
+    _insert_order = insert_sentinel("insert_order")
+
+    # Name used by the ItemWithBids schema
+    bids_count = synonym("bid_count")
 
     # Relationships
-    seller = relationship("User", back_populates="items")
+    seller = relationship("User", back_populates="items", foreign_keys=[seller_id])
     bids = relationship("Bid", back_populates="item", cascade="all, delete-orphan")
+
+
+# Full-text index over title and description (SQLite FTS5). It is an
+# external-content table, so it stores only the index, and triggers keep it in
+# step with every write to ``items``, ORM or bulk. ``rank`` is BM25 with titles
+# weighted ten times higher than descriptions. Migration 0005 creates the same.
+ITEM_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE items_fts USING fts5("
+    "title, description, content='items', content_rowid='id')",
+    "INSERT INTO items_fts(items_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER items_fts_update AFTER UPDATE OF title, description ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+)
+
+for _statement in ITEM_SEARCH_DDL:
+    event.listen(Item.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+# Query-side handle on the virtual table; not part of the metadata
+item_search = table("items_fts", column("rowid", Integer), column("rank", Float), column("items_fts"))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from datetime import datetime
+from app.db.session import Base
+
+
+class ProxyBid(Base):
+    """A bidder's hidden maximum on an item; the bid service bids up to it for them."""
+    __tablename__ = "proxy_bids"
+    __table_args__ = (
+        UniqueConstraint("item_id", "bidder_id", name="uq_proxy_bids_item_id_bidder_id"),
+        # An item's proxies by maximum, for finding the standing one
+        Index("ix_proxy_bids_item_id_max_amount", "item_id", "max_amount"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    bidder_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    max_amount = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
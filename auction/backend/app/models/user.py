@@ -24,5 +24,6 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    items = relationship("Item", back_populates="seller", cascade="all, delete-orphan")
+    items = relationship("Item", back_populates="seller", cascade="all, delete-orphan",
+                         foreign_keys="Item.seller_id")
     bids = relationship("Bid", back_populates="bidder", cascade="all, delete-orphan")
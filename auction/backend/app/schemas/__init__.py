@@ -1,13 +1,13 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .item import Item, ItemCreate, ItemUpdate, ItemWithBids
-from .bid import Bid, BidCreate
+from .item import Item, ItemCreate, ItemUpdate, ItemWithBids, ItemImportRow, ItemImportReport
+from .bid import Bid, BidCreate, BidBatchEntry, BidResult, ProxyBidCreate, ProxyBidResult
 from .auth import Token, TokenData, LoginRequest
 from .common import UserRole, AuctionStatus
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserInDB",
-    "Item", "ItemCreate", "ItemUpdate", "ItemWithBids",
-    "Bid", "BidCreate",
+    "Item", "ItemCreate", "ItemUpdate", "ItemWithBids", "ItemImportRow", "ItemImportReport",
+    "Bid", "BidCreate", "BidBatchEntry", "BidResult", "ProxyBidCreate", "ProxyBidResult",
     "Token", "TokenData", "LoginRequest",
     "UserRole", "AuctionStatus"
 ]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class SlowQuery(BaseModel):
+    statement: str
+    count: int
+    total_seconds: float
+    max_seconds: float
+    last_seen: Optional[datetime] = None
+    parameters: Optional[str] = None
+    service: Optional[str] = None
+    route: Optional[str] = None
+    plan: Optional[str] = None
+
+
+class SlowQueryReport(BaseModel):
+    threshold_ms: float
+    observed: int
+    sampled: int
+    statements: List[SlowQuery]
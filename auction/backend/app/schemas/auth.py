@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 
 class Token(BaseModel):
@@ -9,6 +10,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    expires_at: Optional[datetime] = None
 
 
 class LoginRequest(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -27,3 +27,29 @@ class BidInDBBase(BidBase):
 
 class Bid(BidInDBBase):
     pass
+
+
+class BidBatchEntry(BidCreate):
+    client_ref: Optional[str] = None  # echoed back so the caller can match results
+
+
+class BidResult(BaseModel):
+    client_ref: Optional[str] = None
+    item_id: int
+    amount: float
+    outcome: str  # accepted, too_low, not_active or not_found
+    bid: Optional[Bid] = None
+
+
+class ProxyBidCreate(BaseModel):
+    item_id: int
+    max_amount: float  # kept hidden; the visible price only rises as far as competition needs
+
+
+class ProxyBidResult(BaseModel):
+    item_id: int
+    max_amount: float
+    outcome: str  # accepted, too_low, not_active or not_found
+    current_price: Optional[float] = None
+    leading: bool = False
+    bids: List[Bid] = []  # the visible bids this proxy caused, in order
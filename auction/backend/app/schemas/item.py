@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from .common import AuctionStatus
 
@@ -34,6 +34,9 @@ class ItemInDBBase(ItemBase):
     seller_id: int
     current_price: float
     status: AuctionStatus
+    bid_count: int = 0
+    high_bidder_id: Optional[int] = None
+    last_bid_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -46,4 +49,19 @@ class Item(ItemInDBBase):
 
 
 class ItemWithBids(Item):
-    bids_count: int = 0
+    bids_count: int = 0  # same as bid_count; read from the item row
+
+
+class ItemImportRow(BaseModel):
+    row: int  # 1-based position in the upload
+    id: Optional[int] = None
+    status: Optional[AuctionStatus] = None
+    errors: Optional[List[str]] = None  # set when the row was rejected
+
+
+class ItemImportReport(BaseModel):
+    created: int
+    activated: int
+    failed: int
+    truncated: bool = False  # stopped at ITEM_IMPORT_MAX_ROWS; later rows were not read
+    rows: List[ItemImportRow]
@@ -1,15 +1,15 @@
-from .auth import verify_password, get_password_hash, create_access_token, verify_token
-from .user import get_user_by_email, get_user_by_username, get_user_by_id, create_user, update_user, authenticate_user
-from .item import get_item_by_id, get_items, get_active_items, get_user_items, create_item, update_item, activate_item, end_expired_auctions, get_item_with_bid_count
-from .bid import get_bid_by_id, get_item_bids, get_user_bids, get_highest_bid_for_item, create_bid, validate_bid_amount
+from .auth import verify_password, get_password_hash, verify_password_async, get_password_hash_async, create_access_token, verify_token
+from .user import get_user_by_email, get_user_by_username, get_user_by_id, create_user, register_user, update_user, authenticate_user, UserExists
+from .item import get_item_by_id, get_items, get_active_items, get_user_items, create_item, create_items, update_item, activate_item, end_expired_auctions, get_item_with_bid_count
+from .bid import get_bid_by_id, get_item_bids, get_user_bids, get_highest_bid_for_item, create_bid, place_bid, place_bids, place_proxy_bid, BidOutcome
 
 __all__ = [
     # Auth services
-    "verify_password", "get_password_hash", "create_access_token", "verify_token",
+    "verify_password", "get_password_hash", "verify_password_async", "get_password_hash_async", "create_access_token", "verify_token",
     # User services
-    "get_user_by_email", "get_user_by_username", "get_user_by_id", "create_user", "update_user", "authenticate_user",
+    "get_user_by_email", "get_user_by_username", "get_user_by_id", "create_user", "register_user", "update_user", "authenticate_user", "UserExists",
     # Item services
-    "get_item_by_id", "get_items", "get_active_items", "get_user_items", "create_item", "update_item", "activate_item", "end_expired_auctions", "get_item_with_bid_count",
+    "get_item_by_id", "get_items", "get_active_items", "get_user_items", "create_item", "create_items", "update_item", "activate_item", "end_expired_auctions", "get_item_with_bid_count",
     # Bid services
-    "get_bid_by_id", "get_item_bids", "get_user_bids", "get_highest_bid_for_item", "create_bid", "validate_bid_amount"
+    "get_bid_by_id", "get_item_bids", "get_user_bids", "get_highest_bid_for_item", "create_bid", "place_bid", "place_bids", "place_proxy_bid", "BidOutcome"
 ]
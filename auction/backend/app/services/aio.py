@@ -0,0 +1,267 @@
+"""Awaitable versions of the service functions for async request handlers.
+
+Each wrapper takes the request's session (``AsyncSession`` or ``Session``) in
+place of the synchronous one and runs the service through
+``app.db.session.run_sync``, so the business logic lives in one place and
+handlers never block the event loop on database I/O. Each call releases its
+connection when it returns.
+
+Item detail and active listing reads go through ``item_cache`` when it is
+enabled; those return response schemas rather than ORM objects. Item and bid
+listings return plain dicts of the response fields, ready to encode. Item and
+bid reads share in-flight queries between concurrent identical calls.
+"""
+import functools
+from typing import Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.singleflight import SingleFlight
+from app.db.session import DBSession, run_sync, session_like
+from app.models.user import User
+from app.schemas.bid import Bid
+from app.schemas.item import Item, ItemWithBids
+from app.services import auth as _auth
+from app.services import bid as _bid
+from app.services import item as _item
+from app.services import user as _user
+from app.services.item_cache import item_cache
+
+
+def _awaitable(fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    async def wrapper(db: DBSession, *args, **kwargs):
+        return await run_sync(db, fn, *args, **kwargs)
+    return wrapper
+
+
+def _as_schema(schema, fn: Callable) -> Callable:
+    """Validate a service's ORM result into ``schema`` while its session is still open."""
+    @functools.wraps(fn)
+    def load(db, *args, **kwargs):
+        found = fn(db, *args, **kwargs)
+        return schema.model_validate(found, from_attributes=True) if found is not None else None
+    return load
+
+
+def _as_dicts(fn: Callable) -> Callable:
+    """Turn a listing service's rows into dicts while its session is still open."""
+    @functools.wraps(fn)
+    def rows(db, *args, **kwargs) -> List[dict]:
+        return [row._asdict() for row in fn(db, *args, **kwargs)]
+    return rows
+
+
+_get_items = _as_dicts(_item.get_items)
+_get_active_items = _as_dicts(_item.get_active_items)
+_get_item_bids = _as_dicts(_bid.get_item_bids)
+_get_bid_by_id = _as_schema(Bid, _bid.get_bid_by_id)
+_get_highest_bid_for_item = _as_schema(Bid, _bid.get_highest_bid_for_item)
+
+
+# User services
+get_user_by_email = _awaitable(_user.get_user_by_email)
+get_user_by_username = _awaitable(_user.get_user_by_username)
+get_user_by_id = _awaitable(_user.get_user_by_id)
+create_user = _awaitable(_user.create_user)
+register_user = _awaitable(_user.register_user)
+update_user = _awaitable(_user.update_user)
+
+# Item services
+get_user_items = _awaitable(_as_dicts(_item.get_user_items))
+
+# Bid services
+get_user_bids = _awaitable(_as_dicts(_bid.get_user_bids))
+
+
+# Shared reads. Concurrent calls with the same arguments share one query
+# through ``read_flights``; each wrapper spells out its defaults so equivalent
+# calls get the same key. A flight runs on a session of its own, since it may
+# outlive the request that started it, and returns schemas, dicts or rows
+# rather than ORM objects, since other requests get the same result. Writes
+# forget the flights they could affect, so a client reading after its own
+# write never joins a query that started before it.
+
+read_flights = SingleFlight(max_wait=settings.single_flight_max_wait_seconds)
+
+registry.collected("single_flight_reads_total", "Shared reads by how each caller was served", "counter",
+                   lambda: [("", {"result": "called"}, read_flights.calls),
+                            ("", {"result": "collapsed"}, read_flights.collapsed),
+                            ("", {"result": "timed_out"}, read_flights.timeouts)])
+registry.collected("single_flight_in_flight", "Shared reads in progress", "gauge",
+                   lambda: [("", {}, read_flights.in_flight())])
+
+LISTINGS = "listings"
+
+
+def _item_tag(item_id: int) -> str:
+    return f"item:{item_id}"
+
+
+def _forget_items(item_ids: List[int]) -> None:
+    read_flights.forget(*map(_item_tag, item_ids), LISTINGS)
+
+
+def _forget_invalidated(item_ids: Optional[List[int]]) -> None:
+    if item_ids is None:
+        read_flights.forget_all()
+    else:
+        _forget_items(item_ids)
+
+
+# Every write invalidates the item cache, from whichever thread it runs on
+# (the bid engine's flusher and the lifecycle scheduler have their own)
+item_cache.add_listener(_forget_invalidated)
+
+
+async def _shared(db: DBSession, tags: Tuple[str, ...], fn: Callable, *args):
+    if not settings.single_flight_enabled:
+        return await run_sync(db, fn, *args)
+    return await read_flights.do((fn.__name__,) + args, lambda: run_sync(session_like(db), fn, *args), tags)
+
+
+# Cached item reads. The loaders build the schema (or, for listings, the row
+# dicts) inside ``run_sync`` so the cache never holds an ORM object tied to a
+# closed session.
+
+_load_item = _as_schema(Item, _item.get_item_by_id)
+
+
+def _load_item_details(db, item_id: int) -> Optional[ItemWithBids]:
+    details = _item.get_item_with_bid_count(db, item_id)
+    return ItemWithBids.model_validate(details) if details else None
+
+
+async def get_item_by_id(db: DBSession, item_id: int):
+    tags = (_item_tag(item_id),)
+    if not settings.item_cache_enabled:
+        return await _shared(db, tags, _load_item, item_id)
+    return await item_cache.get_item(item_id, lambda: _shared(db, tags, _load_item, item_id))
+
+
+async def get_item_with_bid_count(db: DBSession, item_id: int):
+    tags = (_item_tag(item_id),)
+    if not settings.item_cache_enabled:
+        return await _shared(db, tags, _item.get_item_with_bid_count, item_id)
+    return await item_cache.get_item_details(
+        item_id, lambda: _shared(db, tags, _load_item_details, item_id)
+    )
+
+
+async def get_item_version(db: DBSession, item_id: int):
+    """``(id, changed_at, bid_count)`` of an item, or ``None``.
+
+    With the item cache on, read from the cached item, so a conditional GET
+    answered from the cache sends no SQL at all.
+    """
+    if not settings.item_cache_enabled:
+        return await _shared(db, (_item_tag(item_id),), _item.get_item_version, item_id)
+    item = await get_item_by_id(db, item_id)
+    return (item.id, item.updated_at or item.created_at, item.bid_count) if item else None
+
+
+async def get_items(db: DBSession, skip: int = 0, limit: int = 100,
+                    after: Optional[Tuple] = None):
+    return await _shared(db, (LISTINGS,), _get_items, skip, limit, after)
+
+
+async def get_active_items(db: DBSession, skip: int = 0, limit: int = 100,
+                           after: Optional[Tuple] = None):
+    tags = (LISTINGS,)
+    if not settings.item_cache_enabled:
+        return await _shared(db, tags, _get_active_items, skip, limit, after)
+    return await item_cache.get_active_items(
+        skip, limit, after, lambda: _shared(db, tags, _get_active_items, skip, limit, after)
+    )
+
+
+_ITEM_FIELDS = tuple(ItemWithBids.model_fields)
+
+
+def _search_page(db, *args) -> Tuple[List[dict], Optional[Tuple]]:
+    """Search results as response dicts, and the last one's ``SEARCH_ORDER`` key."""
+    rows = _item.search_items(db, *args)
+    # The rank follows the item columns, so zip leaves it out of each dict
+    page = [dict(zip(_ITEM_FIELDS, row)) for row in rows]
+    return page, (_item.SEARCH_ORDER.key(rows[-1]) if rows else None)
+
+
+async def search_items(db: DBSession, text: str, min_price: Optional[float] = None,
+                       max_price: Optional[float] = None, status=None, limit: int = 20,
+                       after: Optional[Tuple] = None) -> Tuple[List[dict], Optional[Tuple]]:
+    """A page of results and the key to encode as the next page's cursor."""
+    return await _shared(db, (LISTINGS,), _search_page,
+                         text, min_price, max_price, status, limit, after)
+
+
+async def get_bid_by_id(db: DBSession, bid_id: int):
+    return await _shared(db, (), _get_bid_by_id, bid_id)
+
+
+async def get_item_bids(db: DBSession, item_id: int, skip: int = 0, limit: int = 100,
+                        after: Optional[Tuple] = None):
+    return await _shared(db, (_item_tag(item_id),), _get_item_bids, item_id, skip, limit, after)
+
+
+async def get_highest_bid_for_item(db: DBSession, item_id: int):
+    return await _shared(db, (_item_tag(item_id),), _get_highest_bid_for_item, item_id)
+
+
+# Writes. Each forgets the flights it could affect and waits for the cache
+# invalidations it queued, so the writer's next read sees the write.
+
+async def _write(db: DBSession, tags: Tuple[str, ...], fn: Callable, *args):
+    result = await run_sync(db, fn, *args)
+    read_flights.forget(*tags)
+    await item_cache.settle()
+    return result
+
+
+async def create_item(db: DBSession, item, seller_id: int):
+    return await _write(db, (LISTINGS,), _item.create_item, item, seller_id)
+
+
+async def create_items(db: DBSession, items, seller_id: int, activate: bool = False):
+    return await _write(db, (LISTINGS,), _item.create_items, items, seller_id, activate)
+
+
+async def update_item(db: DBSession, item_id: int, item_update, seller_id: int):
+    return await _write(db, (_item_tag(item_id), LISTINGS), _item.update_item, item_id, item_update, seller_id)
+
+
+async def activate_item(db: DBSession, item_id: int, seller_id: int):
+    return await _write(db, (_item_tag(item_id), LISTINGS), _item.activate_item, item_id, seller_id)
+
+
+async def end_expired_auctions(db: DBSession) -> int:
+    ended = await run_sync(db, _item.end_expired_auctions)
+    read_flights.forget_all()
+    await item_cache.settle()
+    return ended
+
+
+async def place_bid(db: DBSession, bid, bidder_id: int):
+    return await _write(db, (_item_tag(bid.item_id), LISTINGS), _bid.place_bid, bid, bidder_id)
+
+
+async def place_bids(db: DBSession, bids, bidder_id: int):
+    tags = (*{_item_tag(bid.item_id) for bid in bids}, LISTINGS)
+    return await _write(db, tags, _bid.place_bids, bids, bidder_id, settings.bid_batch_chunk_size)
+
+
+async def place_proxy_bid(db: DBSession, proxy, bidder_id: int):
+    return await _write(db, (_item_tag(proxy.item_id), LISTINGS), _bid.place_proxy_bid, proxy, bidder_id)
+
+
+async def create_bid(db: DBSession, bid, bidder_id: int):
+    return await _write(db, (_item_tag(bid.item_id), LISTINGS), _bid.create_bid, bid, bidder_id)
+
+
+async def authenticate_user(db: DBSession, username: str, password: str) -> Optional[User]:
+    """Authenticate user, verifying the password on the hashing executor."""
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    if not await _auth.verify_password_async(password, user.hashed_password):
+        return None
+    return user
@@ -1,13 +1,35 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.core.metrics import registry
 from app.schemas.auth import TokenData
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes hundreds of milliseconds per call, so keep it off the event loop.
+hash_executor = BoundedExecutor(
+    "password_hash",
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+    kind=settings.password_hash_executor
+)
+_HASH_EXECUTOR = {"executor": hash_executor.name}
+
+registry.collected("executor_queue_depth", "Jobs waiting for a worker, by executor", "gauge",
+                   lambda: [("", _HASH_EXECUTOR, hash_executor.queue_depth)])
+registry.collected("executor_jobs_total", "Jobs by executor and outcome", "counter",
+                   lambda: [("", {**_HASH_EXECUTOR, "outcome": outcome}, hash_executor.stats()[outcome])
+                            for outcome in ("submitted", "completed", "rejected")])
+registry.collected("executor_queue_wait_seconds", "Time jobs waited for a worker, by executor", "summary",
+                   lambda: [("_sum", _HASH_EXECUTOR, hash_executor.stats()["wait_seconds_total"]),
+                            ("_count", _HASH_EXECUTOR, hash_executor.stats()["completed"])])
+registry.collected("executor_queue_wait_seconds_max", "Longest wait for a worker, by executor", "gauge",
+                   lambda: [("", _HASH_EXECUTOR, hash_executor.stats()["wait_seconds_max"])])
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -19,6 +41,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing executor."""
+    return await hash_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing executor."""
+    return await hash_executor.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
     to_encode = data.copy()
@@ -39,7 +71,11 @@ def verify_token(token: str) -> Optional[TokenData]:
         username: str = payload.get("sub")
         if username is None:
             return None
-        token_data = TokenData(username=username)
+        exp = payload.get("exp")
+        token_data = TokenData(
+            username=username,
+            expires_at=datetime.fromtimestamp(exp, tz=timezone.utc) if exp is not None else None
+        )
         return token_data
     except JWTError:
         return None
@@ -1,10 +1,54 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-from typing import List, Optional
+from sqlalchemy import Row, and_, bindparam, desc, exists, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import datetime
+import enum
+import heapq
+from app.core.config import settings
+from app.core.pagination import Keyset
 from app.models.bid import Bid
 from app.models.item import Item, AuctionStatus
-from app.schemas.bid import BidCreate
+from app.models.proxy_bid import ProxyBid
+from app.schemas.bid import Bid as BidSchema, BidCreate, ProxyBidCreate
+from app.services.bid_hub import bid_hub
+from app.services.item_cache import item_cache
+
+# Sort orders for the bid listings; each is served by a composite index
+ITEM_BIDS_ORDER = Keyset(Bid.amount, Bid.id, descending=True)
+USER_BIDS_ORDER = Keyset(Bid.created_at, Bid.id, descending=True)
+
+# The bid response fields; the listings return rows of just these columns
+BID_ROW_COLUMNS = tuple(getattr(Bid, name).label(name) for name in BidSchema.model_fields)
+
+
+class BidOutcome(str, enum.Enum):
+    ACCEPTED = "accepted"
+    NOT_FOUND = "not_found"
+    NOT_ACTIVE = "not_active"
+    TOO_LOW = "too_low"
+
+
+def parse_increments(table: str) -> Tuple[List[float], List[float]]:
+    """Split a ``"from:step,..."`` increment table into sorted thresholds and steps."""
+    try:
+        pairs = sorted((float(start), float(step)) for start, step in
+                       (entry.split(":") for entry in table.split(",")))
+    except ValueError:
+        raise ValueError(f"Invalid bid increment table: {table!r}") from None
+    if pairs[0][0] > 0 or any(step <= 0 for _, step in pairs):
+        raise ValueError(f"Bid increment table must start at 0 with positive steps: {table!r}")
+    return [start for start, _ in pairs], [step for _, step in pairs]
+
+
+_INCREMENT_FROM, _INCREMENT_STEP = parse_increments(settings.bid_increments)
+
+
+def bid_increment(price: float) -> float:
+    """The step a proxy bids over ``price`` by (``BID_INCREMENTS``)."""
+    return _INCREMENT_STEP[bisect_right(_INCREMENT_FROM, price) - 1]
 
 
 def get_bid_by_id(db: Session, bid_id: int) -> Optional[Bid]:
@@ -12,18 +56,18 @@ def get_bid_by_id(db: Session, bid_id: int) -> Optional[Bid]:
     return db.query(Bid).filter(Bid.id == bid_id).first()
 
 
-def get_item_bids(db: Session, item_id: int, skip: int = 0, limit: int = 100) -> List[Bid]:
-    """Get all bids for an item."""
-    return db.query(Bid).filter(Bid.item_id == item_id).order_by(
-        desc(Bid.amount)
-    ).offset(skip).limit(limit).all()
+def get_item_bids(db: Session, item_id: int, skip: int = 0, limit: int = 100,
+                  after: Optional[Tuple] = None) -> List[Row]:
+    """Get all bids for an item, highest first; ``after`` is a decoded cursor."""
+    query = db.query(*BID_ROW_COLUMNS).filter(Bid.item_id == item_id)
+    return ITEM_BIDS_ORDER.paginate(query, after, skip, limit).all()
 
 
-def get_user_bids(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Bid]:
-    """Get all bids by a user."""
-    return db.query(Bid).filter(Bid.bidder_id == user_id).order_by(
-        desc(Bid.created_at)
-    ).offset(skip).limit(limit).all()
+def get_user_bids(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                  after: Optional[Tuple] = None) -> List[Row]:
+    """Get all bids by a user, newest first; ``after`` is a decoded cursor."""
+    query = db.query(*BID_ROW_COLUMNS).filter(Bid.bidder_id == user_id)
+    return USER_BIDS_ORDER.paginate(query, after, skip, limit).all()
 
 
 def get_highest_bid_for_item(db: Session, item_id: int) -> Optional[Bid]:
@@ -33,52 +77,359 @@ def get_highest_bid_for_item(db: Session, item_id: int) -> Optional[Bid]:
     ).first()
 
 
-def create_bid(db: Session, bid: BidCreate, bidder_id: int) -> Optional[Bid]:
-    """Create a new bid if valid."""
-    # Check if item exists and is active
-    item = db.query(Item).filter(Item.id == bid.item_id).first()
-    if not item:
-        return None
+# place_bid's statements, built once: constructing them is most of its own
+# cost, and they only differ in their parameters
+_RAISE_PRICE = (
+    update(Item.__table__)
+    .where(and_(Item.id == bindparam("item_id"),
+                Item.current_price < bindparam("amount"),
+                Item.status == AuctionStatus.ACTIVE,
+                Item.start_time <= bindparam("now"),
+                Item.end_time > bindparam("now")))
+    .values(current_price=bindparam("amount"),
+            bid_count=Item.bid_count + 1,
+            high_bidder_id=bindparam("bidder_id"),
+            last_bid_at=bindparam("now"),
+            updated_at=bindparam("now"))
+    # Not correlated with Item.id: SQLite renders RETURNING without table names
+    .returning(exists().where(and_(ProxyBid.item_id == bindparam("item_id"),
+                                   ProxyBid.max_amount >= bindparam("amount"),
+                                   ProxyBid.bidder_id != bindparam("bidder_id"))).label("answered"))
+)
+_INSERT_BID = insert(Bid.__table__)
+
 
+def place_bid(db: Session, bid: BidCreate, bidder_id: int) -> Tuple[BidOutcome, Optional[Bid]]:
+    """Place a bid with a single conditional UPDATE on the item.
+
+    The price check and the price update happen in one statement, so
+    concurrent bids cannot both win against the same price. The same UPDATE
+    keeps the item's bid counters current, and says whether another
+    bidder's proxy is still above the bid.
+    """
     now = datetime.utcnow()
-    if (item.status != AuctionStatus.ACTIVE or
-        item.start_time > now or
-        item.end_time <= now):
-        return None
+    moved = db.execute(
+        _RAISE_PRICE, {"item_id": bid.item_id, "amount": bid.amount, "bidder_id": bidder_id, "now": now}
+    ).first()
+    if moved is None:
+        db.rollback()
+        return _rejection_reason(db, bid, now), None
 
-    # Check if bid is higher than current price
-    if bid.amount <= item.current_price:
-        return None
+    # A standing proxy answers at once, in the same transaction
+    answer = _answer_with_proxy(db, bid.item_id, bid.amount, bidder_id, now) if moved.answered else ()
+    bid_id = _insert_bid(db, bid.item_id, bidder_id, bid.amount, now)
+    answer_ids = [_insert_bid(db, bid.item_id, proxy_bidder, amount, now) for proxy_bidder, amount in answer]
+    db.commit()
+    item_cache.invalidate_item(bid.item_id)
+    bid_hub.publish(bid.item_id, bid.amount, bidder_id, bid_id)
+    for answer_id, (proxy_bidder, amount) in zip(answer_ids, answer):
+        bid_hub.publish(bid.item_id, amount, proxy_bidder, answer_id)
 
-    # Create the bid
-    db_bid = Bid(
+    return BidOutcome.ACCEPTED, Bid(
+        id=bid_id,
         item_id=bid.item_id,
         bidder_id=bidder_id,
-        amount=bid.amount
+        amount=bid.amount,
+        created_at=now
+    )
+
+
+def place_bids(db: Session, bids: Sequence[BidCreate], bidder_id: int,
+               chunk_size: int = 250) -> List[Tuple[BidOutcome, Optional[Bid]]]:
+    """Place many bids from one bidder, with one transaction per chunk.
+
+    Results are in input order, and each bid is judged exactly as
+    ``place_bid`` would judge the same bids sent one after another.
+    """
+    results = []
+    for start in range(0, len(bids), chunk_size):
+        results += _place_chunk(db, bids[start:start + chunk_size], bidder_id)
+    return results
+
+
+def _place_chunk(db: Session, bids: Sequence[BidCreate], bidder_id: int) -> List[Tuple[BidOutcome, Optional[Bid]]]:
+    """Judge a chunk in memory against its items, then write it in three statements.
+
+    The items are read once and their bids replayed in order against the
+    prices read. Each item then moves to its final price in one guarded
+    UPDATE, all sent as one executemany. The guard (the bid count read, and
+    the auction still open) fails only if another writer took a bid on the
+    item in between. In that case, or when a bid lands on an item with a
+    standing proxy that would answer it, the chunk is rolled back and
+    replayed bid by bid through ``place_bid``.
+    """
+    now = datetime.utcnow()
+    proxied = exists().where(and_(ProxyBid.item_id == Item.id, ProxyBid.max_amount > Item.current_price))
+    items = {
+        row.id: row for row in db.execute(
+            select(Item.id, Item.current_price, Item.status, Item.start_time, Item.end_time, Item.bid_count,
+                   proxied.label("proxied"))
+            .where(Item.id.in_({bid.item_id for bid in bids}))
+        )
+    }
+    prices = {item_id: item.current_price for item_id, item in items.items()}
+    accepted: Dict[int, int] = {}
+    outcomes = []
+    for bid in bids:
+        item = items.get(bid.item_id)
+        if item is None:
+            outcome = BidOutcome.NOT_FOUND
+        elif item.status != AuctionStatus.ACTIVE or item.start_time > now or item.end_time <= now:
+            outcome = BidOutcome.NOT_ACTIVE
+        elif bid.amount <= prices[bid.item_id]:
+            outcome = BidOutcome.TOO_LOW
+        else:
+            outcome = BidOutcome.ACCEPTED
+            prices[bid.item_id] = bid.amount
+            accepted[bid.item_id] = accepted.get(bid.item_id, 0) + 1
+        outcomes.append(outcome)
+    if not accepted:
+        db.rollback()
+        return [(outcome, None) for outcome in outcomes]
+    if any(items[item_id].proxied for item_id in accepted):
+        db.rollback()
+        return [place_bid(db, bid, bidder_id) for bid in bids]
+
+    moves = [
+        {"b_id": item_id, "b_seen": items[item_id].bid_count, "b_price": prices[item_id], "b_count": count}
+        for item_id, count in accepted.items()
+    ]
+    result = db.execute(
+        update(Item.__table__)
+        .where(and_(Item.id == bindparam("b_id"),
+                    Item.bid_count == bindparam("b_seen"),
+                    Item.status == AuctionStatus.ACTIVE,
+                    Item.start_time <= now,
+                    Item.end_time > now))
+        .values(current_price=bindparam("b_price"),
+                bid_count=Item.bid_count + bindparam("b_count"),
+                high_bidder_id=bidder_id,
+                last_bid_at=now,
+                updated_at=now),
+        moves,
     )
-    db.add(db_bid)
+    if not db.get_bind().dialect.supports_sane_multi_rowcount or result.rowcount != len(moves):
+        db.rollback()
+        return [place_bid(db, bid, bidder_id) for bid in bids]
+
+    rows = [
+        {"item_id": bid.item_id, "bidder_id": bidder_id, "amount": bid.amount, "created_at": now}
+        for bid, outcome in zip(bids, outcomes) if outcome == BidOutcome.ACCEPTED
+    ]
+    # One multi-row INSERT. RETURNING order is not guaranteed, so match ids by
+    # (item, amount): an item's accepted bids in a chunk all differ in amount.
+    bid_ids = {
+        (item_id, amount): bid_id for bid_id, item_id, amount in
+        db.execute(insert(Bid).returning(Bid.id, Bid.item_id, Bid.amount), rows)
+    }
+    db.commit()
+    item_cache.invalidate_items(list(accepted))
+
+    placed = iter(rows)
+    results = []
+    for outcome in outcomes:
+        if outcome != BidOutcome.ACCEPTED:
+            results.append((outcome, None))
+            continue
+        row = next(placed)
+        bid_id = bid_ids[row["item_id"], row["amount"]]
+        bid_hub.publish(row["item_id"], row["amount"], bidder_id, bid_id)
+        results.append((outcome, Bid(id=bid_id, **row)))
+    return results
+
+
+# Proxy bidding
+#
+# A proxy is a bidder's hidden maximum on an item. When someone else's bid
+# reaches the visible price, the strongest proxy answers with the smallest
+# bid that wins: one increment over the competition, capped at its maximum.
+# After every resolution each proxy but the leader's has been bid up to its
+# maximum, which is now at or below the price, so only the leader's can ever
+# answer again. Each event therefore weighs at most two proxies, found with
+# the ``(item_id, max_amount)`` index, and writes at most two visible bids,
+# however many increments apart the maximums are. For the same reason no two
+# stored proxies are ever tied above the price, so they need no tie-break.
+
+@dataclass(frozen=True)
+class ProxyResolution:
+    """An item's price and leader once its proxies have answered."""
+    price: float
+    leader_id: Optional[int]
+    bids: Tuple[Tuple[int, float], ...] = ()  # (bidder_id, amount) to write, in order
+
+
+def resolve_proxies(price: float, leader_id: Optional[int],
+                    proxies: Iterable[Tuple[float, int]]) -> ProxyResolution:
+    """Let proxies answer ``price``, held by ``leader_id``.
+
+    ``proxies`` are ``(max_amount, bidder_id)``, one per bidder, oldest
+    first and all older than the bid that set ``price``; of two equal
+    maximums the older wins, as the earlier bid would, so a proxy equal to
+    the price takes the lead at its maximum. The runner-up is bid up to its
+    maximum, then the winner one increment past it (or past the price, if
+    the winner does not lead yet).
+    """
+    ranked = heapq.nsmallest(2, ((-max_amount, order, bidder_id)
+                                 for order, (max_amount, bidder_id) in enumerate(proxies)))
+    if not ranked:
+        return ProxyResolution(price, leader_id)
+    top_max, top_bidder = -ranked[0][0], ranked[0][2]
+    runner_max, runner_bidder = (-ranked[1][0], ranked[1][2]) if len(ranked) > 1 else (None, None)
+
+    if top_bidder == leader_id:
+        if runner_max is None or runner_max <= price:
+            return ProxyResolution(price, leader_id)
+        level = runner_max
+    elif top_max < price:
+        return ProxyResolution(price, leader_id)
+    else:
+        level = price if runner_max is None else max(price, runner_max)
+
+    if runner_max == top_max or top_max == price:
+        new_price = top_max
+    else:
+        new_price = min(top_max, round(level + bid_increment(level), 2))
+    bids = []
+    if runner_max is not None and runner_max > price:
+        bids.append((runner_bidder, runner_max))
+    bids.append((top_bidder, new_price))
+    return ProxyResolution(new_price, top_bidder, tuple(bids))
+
+
+def _insert_bid(db: Session, item_id: int, bidder_id: int, amount: float, now: datetime) -> int:
+    return db.execute(
+        _INSERT_BID, {"item_id": item_id, "bidder_id": bidder_id, "amount": amount, "created_at": now}
+    ).inserted_primary_key[0]
+
+
+def _answer_with_proxy(db: Session, item_id: int, amount: float, bidder_id: int,
+                       now: datetime) -> Tuple[Tuple[int, float], ...]:
+    """After ``bidder_id`` raised the item to ``amount``, let the standing proxy answer.
+
+    Moves the item to the answer's price and returns the bids to write for
+    it; call inside the bid's transaction, after its price UPDATE. A proxy
+    whose maximum equals ``amount`` is the earlier, so it takes the lead.
+    """
+    standing = db.execute(
+        select(ProxyBid.max_amount, ProxyBid.bidder_id)
+        .where(and_(ProxyBid.item_id == item_id,
+                    ProxyBid.max_amount >= amount,
+                    ProxyBid.bidder_id != bidder_id))
+        .order_by(ProxyBid.max_amount.desc())
+        .limit(1)
+    ).all()
+    resolution = resolve_proxies(amount, bidder_id, [tuple(row) for row in standing])
+    if resolution.bids:
+        db.execute(
+            update(Item.__table__)
+            .where(Item.id == item_id)
+            .values(current_price=resolution.price,
+                    bid_count=Item.bid_count + len(resolution.bids),
+                    high_bidder_id=resolution.leader_id)
+        )
+    return resolution.bids
 
-    # Update item's current price
-    item.current_price = bid.amount
-    item.updated_at = now
 
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _save_proxy(db: Session, item_id: int, bidder_id: int, max_amount: float, now: datetime) -> None:
+    """Insert the bidder's proxy on the item, or raise the one they have, in one statement.
+
+    An upsert rather than an UPDATE then INSERT, so two first proxies from one
+    bidder sent at once cannot both insert.
+    """
+    upsert = _UPSERTS[db.get_bind().dialect.name](ProxyBid.__table__).values(
+        item_id=item_id, bidder_id=bidder_id, max_amount=max_amount, created_at=now,
+    )
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=[ProxyBid.__table__.c.item_id, ProxyBid.__table__.c.bidder_id],
+        set_={"max_amount": upsert.excluded.max_amount, "updated_at": now},
+    ))
+
+
+def place_proxy_bid(db: Session, proxy: ProxyBidCreate,
+                    bidder_id: int) -> Tuple[BidOutcome, Optional[ProxyResolution], List[Bid]]:
+    """Set or raise the bidder's hidden maximum on an item, then let the proxies bid.
+
+    The maximum must exceed the visible price, and a bidder may only raise
+    their own. Returns the item's resulting price and leader and the visible
+    bids written; a proxy that is outbid at once is still accepted.
+    """
+    while True:
+        now = datetime.utcnow()
+        rows = db.execute(
+            select(Item.current_price, Item.status, Item.start_time, Item.end_time,
+                   Item.high_bidder_id, Item.bid_count, Item.updated_at,
+                   ProxyBid.max_amount, ProxyBid.bidder_id.label("proxy_bidder_id"))
+            .outerjoin(ProxyBid, and_(ProxyBid.item_id == Item.id, ProxyBid.max_amount > Item.current_price))
+            .where(Item.id == proxy.item_id)
+            .order_by(ProxyBid.max_amount.desc())
+            .limit(2)
+        ).all()
+        if not rows:
+            db.rollback()
+            return BidOutcome.NOT_FOUND, None, []
+        item = rows[0]
+        if item.status != AuctionStatus.ACTIVE or item.start_time > now or item.end_time <= now:
+            db.rollback()
+            return BidOutcome.NOT_ACTIVE, None, []
+        standing = [(row.max_amount, row.proxy_bidder_id) for row in rows if row.proxy_bidder_id is not None]
+        own = [max_amount for max_amount, proxy_bidder in standing if proxy_bidder == bidder_id]
+        if proxy.max_amount <= item.current_price or (own and proxy.max_amount <= own[0]):
+            db.rollback()
+            return BidOutcome.TOO_LOW, None, []
+
+        contenders = [entry for entry in standing if entry[1] != bidder_id] + [(proxy.max_amount, bidder_id)]
+        resolution = resolve_proxies(item.current_price, item.high_bidder_id, contenders)
+        # Always written, even for a raise nobody sees. Every proxy write sets
+        # updated_at and every bid moves bid_count, so together they make the
+        # price and proxies read above still current
+        moved = db.execute(
+            update(Item.__table__)
+            .where(and_(Item.id == proxy.item_id,
+                        Item.bid_count == item.bid_count,
+                        Item.updated_at.is_not_distinct_from(item.updated_at),
+                        Item.status == AuctionStatus.ACTIVE,
+                        Item.end_time > now))
+            .values(current_price=resolution.price,
+                    bid_count=Item.bid_count + len(resolution.bids),
+                    high_bidder_id=resolution.leader_id,
+                    updated_at=now,
+                    **({"last_bid_at": now} if resolution.bids else {}))
+        )
+        if moved.rowcount == 1:
+            break
+        db.rollback()
+
+    _save_proxy(db, proxy.item_id, bidder_id, proxy.max_amount, now)
+    placed = [
+        Bid(id=_insert_bid(db, proxy.item_id, proxy_bidder, amount, now), item_id=proxy.item_id,
+            bidder_id=proxy_bidder, amount=amount, created_at=now)
+        for proxy_bidder, amount in resolution.bids
+    ]
     db.commit()
-    db.refresh(db_bid)
-    return db_bid
+    item_cache.invalidate_item(proxy.item_id)
+    for placed_bid in placed:
+        bid_hub.publish(placed_bid.item_id, placed_bid.amount, placed_bid.bidder_id, placed_bid.id)
+    return BidOutcome.ACCEPTED, resolution, placed
 
 
-def validate_bid_amount(db: Session, item_id: int, bid_amount: float) -> bool:
-    """Validate if a bid amount is acceptable for the item."""
-    item = db.query(Item).filter(Item.id == item_id).first()
+def _rejection_reason(db: Session, bid: BidCreate, now: datetime) -> BidOutcome:
+    """Explain why a conditional bid update matched no row."""
+    item = db.execute(
+        select(Item.status, Item.start_time, Item.end_time).where(Item.id == bid.item_id)
+    ).first()
     if not item:
-        return False
+        return BidOutcome.NOT_FOUND
+    if (item.status != AuctionStatus.ACTIVE or
+        item.start_time > now or
+        item.end_time <= now):
+        return BidOutcome.NOT_ACTIVE
+    return BidOutcome.TOO_LOW
 
-    # Must be higher than current price
-    if bid_amount <= item.current_price:
-        return False
 
-    # Must be higher than starting price if no bids yet
-    if item.current_price == item.starting_price and bid_amount <= item.starting_price:
-        return False
+def create_bid(db: Session, bid: BidCreate, bidder_id: int) -> Optional[Bid]:
+    """Create a new bid if valid."""
+    return place_bid(db, bid, bidder_id)[1]
 
-    return True
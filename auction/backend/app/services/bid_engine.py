@@ -0,0 +1,377 @@
+"""In-process bid books.
+
+One ``BidBook`` per item holds the current price, the leader and a sequence
+number. Bids are accepted or rejected in memory under the book's lock, and the
+accepted ones are written to the ``bids`` table in batches by a background
+flusher. The engine assumes it is the only writer of bids while it is enabled.
+
+The engine opens its own sessions for the occasional database read, so it can
+be called from a worker thread whatever kind of session the request holds.
+
+A batch that fails to write is retried row by row, so one bad row cannot hold
+up the others. A row that keeps failing is dead-lettered after
+``flush_attempts`` tries: logged, counted and dropped, and its item's book
+reloaded from the database. Failures to reach the database at all
+(``OperationalError``) are not the rows' fault; those batches are retried whole.
+"""
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import bids_dead_lettered
+from app.db.session import SessionLocal
+from app.models.bid import Bid
+from app.models.item import Item, AuctionStatus
+from app.services.bid import BidOutcome
+from app.services.bid_hub import bid_hub
+from app.services.item_cache import item_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BidBook:
+    """In-memory state of one auction."""
+    item_id: int
+    current_price: float
+    status: AuctionStatus
+    start_time: datetime
+    end_time: datetime
+    leader_id: Optional[int] = None
+    seq: int = 0
+    stale: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def is_open(self, now: datetime) -> bool:
+        return self.status == AuctionStatus.ACTIVE and self.start_time <= now < self.end_time
+
+
+@dataclass(frozen=True)
+class BidDecision:
+    """Outcome of a bid evaluated against a book."""
+    accepted: bool
+    reason: Optional[BidOutcome] = None
+    bid: Optional[dict] = None
+    seq: int = 0
+
+
+class BidEngine:
+    """Accepts bids in memory and persists them in batches."""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = 500,
+                 flush_interval: float = 0.05, flush_attempts: int = 3):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_attempts = flush_attempts
+        self._failures: Dict[int, int] = {}  # bid id -> failed writes so far
+        self.dead_letters: deque = deque(maxlen=1000)  # the latest bids given up on
+        self._books: Dict[int, BidBook] = {}
+        self._books_lock = threading.Lock()
+        self._pending: List[dict] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._next_bid_id: Optional[int] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def _session(self):
+        db = self._session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Loading
+
+    def load(self, db: Session) -> int:
+        """Rebuild the books of all active items from the database."""
+        items = db.execute(
+            select(Item.id, Item.current_price, Item.status, Item.start_time, Item.end_time,
+                   Item.high_bidder_id, Item.bid_count)
+            .where(Item.status == AuctionStatus.ACTIVE)
+        ).all()
+        books = {
+            row.id: BidBook(row.id, row.current_price, row.status, row.start_time, row.end_time,
+                            leader_id=row.high_bidder_id, seq=row.bid_count)
+            for row in items
+        }
+        with self._books_lock:
+            self._books = books
+        with self._pending_lock:
+            self._next_bid_id = (db.execute(select(func.max(Bid.id))).scalar() or 0) + 1
+        return len(books)
+
+    def _load_book(self, item_id: int) -> Optional[BidBook]:
+        # Hold the flush lock so bids taken off the queue but not yet committed
+        # are either visible in the database or still pending.
+        with self._flush_lock, self._session() as db:
+            return self._read_book(db, item_id)
+
+    def _read_book(self, db: Session, item_id: int) -> Optional[BidBook]:
+        item = db.execute(
+            select(Item.current_price, Item.status, Item.start_time, Item.end_time,
+                   Item.high_bidder_id, Item.bid_count)
+            .where(Item.id == item_id)
+        ).first()
+        if item is None:
+            return None
+
+        book = BidBook(item_id, item.current_price, item.status, item.start_time, item.end_time,
+                       leader_id=item.high_bidder_id, seq=item.bid_count)
+        # Bids accepted earlier but not yet flushed are newer than the database.
+        with self._pending_lock:
+            for row in self._pending:
+                if row["item_id"] == item_id and row["amount"] > book.current_price:
+                    book.current_price, book.leader_id = row["amount"], row["bidder_id"]
+                    book.seq += 1
+        return book
+
+    def _refresh_book(self, book: BidBook) -> bool:
+        """Reload the item's status and schedule; price and leader stay in memory."""
+        with self._session() as db:
+            item = db.execute(
+                select(Item.status, Item.start_time, Item.end_time).where(Item.id == book.item_id)
+            ).first()
+        if item is None:
+            return False
+        book.status, book.start_time, book.end_time = item.status, item.start_time, item.end_time
+        book.stale = False
+        return True
+
+    def get_book(self, item_id: int) -> Optional[BidBook]:
+        """Return the item's book, loading it from the database on first use."""
+        book = self._books.get(item_id)
+        if book is not None:
+            return book
+
+        with self._books_lock:
+            book = self._books.get(item_id)
+            if book is None:
+                book = self._load_book(item_id)
+                if book is not None:
+                    self._books[item_id] = book
+        return book
+
+    def invalidate(self, item_id: Optional[int] = None) -> None:
+        """Mark a book (or every book) for reload after the item changes elsewhere."""
+        with self._books_lock:
+            books = self._books.values() if item_id is None else [self._books.get(item_id)]
+            for book in books:
+                if book is not None:
+                    book.stale = True
+
+    # Bidding
+
+    def _ensure_bid_ids(self) -> None:
+        if self._next_bid_id is None:
+            with self._pending_lock, self._session() as db:
+                if self._next_bid_id is None:
+                    self._next_bid_id = (db.execute(select(func.max(Bid.id))).scalar() or 0) + 1
+
+    def place_bid(self, item_id: int, bidder_id: int, amount: float,
+                  now: Optional[datetime] = None) -> BidDecision:
+        """Accept or reject a bid atomically against the item's book."""
+        self._ensure_bid_ids()
+        book = self.get_book(item_id)
+        if book is None:
+            return BidDecision(False, BidOutcome.NOT_FOUND)
+
+        now = now or datetime.utcnow()
+        with book.lock:
+            if book.stale and not self._refresh_book(book):
+                return BidDecision(False, BidOutcome.NOT_FOUND)
+            if not book.is_open(now):
+                return BidDecision(False, BidOutcome.NOT_ACTIVE, seq=book.seq)
+            if amount <= book.current_price:
+                return BidDecision(False, BidOutcome.TOO_LOW, seq=book.seq)
+
+            book.current_price = amount
+            book.leader_id = bidder_id
+            book.seq += 1
+            with self._pending_lock:
+                row = {
+                    "id": self._next_bid_id,
+                    "item_id": item_id,
+                    "bidder_id": bidder_id,
+                    "amount": amount,
+                    "created_at": now,
+                }
+                self._next_bid_id += 1
+                self._pending.append(row)
+                backlog = len(self._pending)
+            seq = book.seq
+            # Under the book lock so each item's updates are published in order
+            bid_hub.publish(item_id, amount, bidder_id, row["id"])
+
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+        return BidDecision(True, BidOutcome.ACCEPTED, bid=dict(row), seq=seq)
+
+    def place_bids(self, bids: Sequence[Tuple[int, float]], bidder_id: int) -> List[BidDecision]:
+        """Judge ``(item_id, amount)`` bids in order, as if placed one by one.
+
+        The flusher writes them with everything else that is pending.
+        """
+        now = datetime.utcnow()
+        return [self.place_bid(item_id, bidder_id, amount, now) for item_id, amount in bids]
+
+    # Persistence
+
+    def flush(self) -> int:
+        """Write pending bids and the resulting item prices; returns the bids written.
+
+        All pending bids go in one transaction. If it fails, they are written
+        one per transaction instead, and those that fail again go back to
+        the head of the queue until they run out of attempts.
+        """
+        dropped: List[dict] = []
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                self._write(rows)
+                written = rows
+            except OperationalError:
+                logger.exception("Failed to flush %d bids; they will be retried", len(rows))
+                self._requeue(rows)
+                return 0
+            except Exception:
+                logger.exception("Failed to flush %d bids; writing them one by one", len(rows))
+                written, failed = self._write_each(rows)
+                retry, dropped = self._out_of_attempts(failed)
+                self._requeue(retry)
+
+        # The books counted the dropped bids; rebuild them from what was stored
+        with self._books_lock:
+            for row in dropped:
+                self._books.pop(row["item_id"], None)
+        item_ids = list({row["item_id"]: None for row in written})
+        item_cache.invalidate_items(item_ids)
+        return len(written)
+
+    def _write(self, rows: List[dict]) -> None:
+        """Insert ``rows`` and move their items' prices, in one transaction."""
+        latest: Dict[int, dict] = {}
+        counts: Dict[int, int] = {}
+        for row in rows:
+            latest[row["item_id"]] = row
+            counts[row["item_id"]] = counts.get(row["item_id"], 0) + 1
+        prices = [
+            {"b_id": item_id, "b_price": row["amount"], "b_bidder": row["bidder_id"],
+             "b_at": row["created_at"], "b_count": counts[item_id]}
+            for item_id, row in latest.items()
+        ]
+        db = self._session_factory()
+        try:
+            db.execute(Bid.__table__.insert(), rows)
+            db.execute(
+                Item.__table__.update()
+                .where(and_(Item.id == bindparam("b_id"), Item.current_price < bindparam("b_price")))
+                .values(current_price=bindparam("b_price"),
+                        bid_count=Item.bid_count + bindparam("b_count"),
+                        high_bidder_id=bindparam("b_bidder"),
+                        last_bid_at=bindparam("b_at"),
+                        updated_at=bindparam("b_at")),
+                prices,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_each(self, rows: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """Write rows one per transaction, in order; returns (written, failed)."""
+        written, failed = [], []
+        for position, row in enumerate(rows):
+            try:
+                self._write([row])
+            except OperationalError:
+                # The database itself is failing, so the rest would too
+                logger.exception("Failed to write bid %d; it will be retried", row["id"])
+                return written, failed + rows[position:]
+            except Exception:
+                logger.exception("Failed to write bid %d", row["id"])
+                self._failures[row["id"]] = self._failures.get(row["id"], 0) + 1
+                failed.append(row)
+            else:
+                written.append(row)
+                self._failures.pop(row["id"], None)
+        return written, failed
+
+    def _out_of_attempts(self, failed: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """Split failed rows into (to retry, dead-lettered)."""
+        retry, dropped = [], []
+        for row in failed:
+            if self._failures.get(row["id"], 0) < self.flush_attempts:
+                retry.append(row)
+                continue
+            self._failures.pop(row["id"], None)
+            self.dead_letters.append(row)
+            bids_dead_lettered.inc()
+            logger.error("Dropped bid %d on item %d (%s by %d) after %d failed writes",
+                         row["id"], row["item_id"], row["amount"], row["bidder_id"], self.flush_attempts)
+            dropped.append(row)
+        return retry, dropped
+
+    def _requeue(self, rows: List[dict]) -> None:
+        with self._pending_lock:
+            self._pending[:0] = rows
+
+    def pending_count(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self) -> None:
+        """Rebuild the books and start the background flusher."""
+        with self._session() as db:
+            self.load(db)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bid-engine-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write any bids still pending.
+
+        Rows that fail get their remaining attempts now, so none is left
+        queued unless the database cannot be reached at all.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for _ in range(self.flush_attempts):
+            self.flush()
+            if not self.pending_count():
+                return
+        logger.error("Bid engine stopped with %d bids unwritten", self.pending_count())
+
+
+bid_engine = BidEngine(
+    SessionLocal,
+    batch_size=settings.bid_engine_batch_size,
+    flush_interval=settings.bid_engine_flush_interval,
+    flush_attempts=settings.bid_engine_flush_attempts,
+)
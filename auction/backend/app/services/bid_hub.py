@@ -0,0 +1,200 @@
+"""In-process fan-out of accepted bids to live subscribers.
+
+Each WebSocket or SSE connection holds a ``Subscription`` to one item. Bids are
+published from whichever thread accepted them; the hub hands them to the event
+loop, keeps only the latest update per item within a short coalescing window,
+and then broadcasts it to that item's subscribers. Every subscription has a
+bounded queue, and a consumer that falls behind is dropped instead of making
+the hub buffer for it.
+
+The hub is per process: with several workers, each one only sees the bids it
+accepted itself.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from typing import Deque, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BidUpdate:
+    """A new high bid on an item; ``seq`` grows with the price."""
+    item_id: int
+    amount: float
+    bidder_id: int
+    seq: int
+
+    @cached_property
+    def json(self) -> str:
+        """Encoded once and shared by every subscriber of the broadcast."""
+        return json.dumps(asdict(self))
+
+
+class Subscription:
+    """One consumer's bounded queue of updates for an item."""
+
+    def __init__(self, item_id: int, max_queue: int):
+        self.item_id = item_id
+        self.max_queue = max_queue
+        self.dropped = False
+        self.closed = False
+        self._queue: Deque[BidUpdate] = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, update: BidUpdate) -> bool:
+        """Queue ``update``; returns False, and marks the consumer dropped, if full."""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped = True
+            self.close()
+            return False
+        self._queue.append(update)
+        self._ready.set()
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[BidUpdate]:
+        """Next update, or ``None`` once the subscription is closed or dropped."""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        if self.dropped:
+            return None
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class BidHub:
+    """Per-item pub/sub bound to the application's event loop."""
+
+    def __init__(self, max_queue: int = 64, coalesce_interval: float = 0.05):
+        self.max_queue = max_queue
+        self.coalesce_interval = coalesce_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._latest: Dict[int, BidUpdate] = {}
+        self._sent_seq: Dict[int, int] = {}
+        self.published = 0
+        self.coalesced = 0
+        self.broadcasts = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Bind to the running loop; call from the app's startup."""
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        """Close every subscription and stop accepting publishes."""
+        self._loop = None
+        self._latest.clear()
+        self._sent_seq.clear()
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._subscribers.clear()
+
+    # Subscribers (event loop only)
+
+    def subscribe(self, item_id: int) -> Subscription:
+        subscription = Subscription(item_id, self.max_queue)
+        self._subscribers.setdefault(item_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        subscriptions = self._subscribers.get(subscription.item_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.item_id]
+                self._sent_seq.pop(subscription.item_id, None)
+
+    def subscriber_count(self, item_id: Optional[int] = None) -> int:
+        if item_id is not None:
+            return len(self._subscribers.get(item_id, ()))
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    # Publishing (any thread)
+
+    def publish(self, item_id: int, amount: float, bidder_id: int, seq: int) -> None:
+        """Announce an accepted bid. A no-op until ``start`` has run.
+
+        ``seq`` must grow with the item's price (the bid id does); updates that
+        arrive out of order are discarded.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        update = BidUpdate(item_id, amount, bidder_id, seq)
+        try:
+            loop.call_soon_threadsafe(self._stage, update)
+        except RuntimeError:
+            # The loop closed between the check and the call
+            pass
+
+    def _stage(self, update: BidUpdate) -> None:
+        if self._loop is None:
+            return
+        self.published += 1
+        item_id = update.item_id
+        pending = self._latest.get(item_id)
+        if pending is not None or update.seq <= self._sent_seq.get(item_id, 0):
+            # Superseded, or older than what subscribers already have
+            self.coalesced += 1
+            if pending is not None and pending.seq < update.seq:
+                self._latest[item_id] = update
+            return
+        self._latest[item_id] = update
+        if self.coalesce_interval > 0:
+            self._loop.call_later(self.coalesce_interval, self._broadcast, item_id)
+        else:
+            self._loop.call_soon(self._broadcast, item_id)
+
+    def _broadcast(self, item_id: int) -> None:
+        update = self._latest.pop(item_id, None)
+        subscriptions = self._subscribers.get(item_id)
+        if update is None or not subscriptions:
+            return
+        self.broadcasts += 1
+        self._sent_seq[item_id] = update.seq
+        failed = [subscription for subscription in subscriptions if not subscription.offer(update)]
+        self.delivered += len(subscriptions) - len(failed)
+        slow = [subscription for subscription in failed if subscription.dropped]
+        self.dropped += len(slow)
+        for subscription in failed:
+            self.unsubscribe(subscription)
+        if slow:
+            logger.info("Dropped %d slow subscriber(s) of item %d", len(slow), item_id)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscriber_count(),
+            "items": len(self._subscribers),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "broadcasts": self.broadcasts,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+bid_hub = BidHub(
+    max_queue=settings.live_updates_queue_size,
+    coalesce_interval=settings.live_updates_coalesce_interval,
+)
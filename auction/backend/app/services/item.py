@@ -1,10 +1,28 @@
+import re
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import List, Optional
+from sqlalchemy import Row, and_, bindparam, func, insert, select, update
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
-from app.models.item import Item, AuctionStatus
+from app.core.pagination import Keyset
+from app.models.item import Item, AuctionStatus, item_search
 from app.models.bid import Bid
-from app.schemas.item import ItemCreate, ItemUpdate
+from app.schemas.item import ItemCreate, ItemUpdate, ItemWithBids
+from app.services.bid_engine import bid_engine
+from app.services.item_cache import item_cache
+from app.services.lifecycle import auction_scheduler
+
+# Sort orders for the item listings; active items end soonest first
+ITEMS_ORDER = Keyset(Item.id)
+ACTIVE_ITEMS_ORDER = Keyset(Item.end_time, Item.id)
+# Search results, best match first (BM25 ranks are negative; lower is better)
+SEARCH_ORDER = Keyset(item_search.c.rank, Item.id)
+
+_SEARCH_TERM = re.compile(r"\w+\*?")
+
+# The ``ItemWithBids`` fields, in schema order. Listings select only these
+# columns and return rows, so a page is never built into ORM objects or
+# validated row by row on the way out.
+ITEM_ROW_COLUMNS = tuple(getattr(Item, name).label(name) for name in ItemWithBids.model_fields)
 
 
 def get_item_by_id(db: Session, item_id: int) -> Optional[Item]:
@@ -12,24 +30,82 @@ def get_item_by_id(db: Session, item_id: int) -> Optional[Item]:
     return db.query(Item).filter(Item.id == item_id).first()
 
 
-def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[Item]:
-    """Get all items with pagination."""
-    return db.query(Item).offset(skip).limit(limit).all()
+def get_item_version(db: Session, item_id: int) -> Optional[Row]:
+    """``(id, changed_at, bid_count)`` of an item: what its validators are made of.
+
+    Reads three columns by primary key, so answering a conditional GET never
+    loads the whole row.
+    """
+    return db.execute(
+        select(Item.id, func.coalesce(Item.updated_at, Item.created_at).label("changed_at"), Item.bid_count)
+        .where(Item.id == item_id)
+    ).first()
+
+
+def get_items(db: Session, skip: int = 0, limit: int = 100,
+              after: Optional[Tuple] = None) -> List[Row]:
+    """Get all items with pagination; ``after`` is a decoded cursor.
+
+    Like the other listings, returns rows of ``ITEM_ROW_COLUMNS``.
+    """
+    return ITEMS_ORDER.paginate(db.query(*ITEM_ROW_COLUMNS), after, skip, limit).all()
 
 
-def get_active_items(db: Session, skip: int = 0, limit: int = 100) -> List[Item]:
-    """Get active auction items."""
+def get_active_items(db: Session, skip: int = 0, limit: int = 100,
+                     after: Optional[Tuple] = None) -> List[Row]:
+    """Get active auction items, ending soonest first."""
     now = datetime.utcnow()
-    return db.query(Item).filter(
+    query = db.query(*ITEM_ROW_COLUMNS).filter(
         and_(Item.status == AuctionStatus.ACTIVE,
              Item.start_time <= now,
              Item.end_time > now)
-    ).offset(skip).limit(limit).all()
+    )
+    return ACTIVE_ITEMS_ORDER.paginate(query, after, skip, limit).all()
 
 
-def get_user_items(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Item]:
+def get_user_items(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                   after: Optional[Tuple] = None) -> List[Row]:
     """Get items for a specific user."""
-    return db.query(Item).filter(Item.seller_id == user_id).offset(skip).limit(limit).all()
+    query = db.query(*ITEM_ROW_COLUMNS).filter(Item.seller_id == user_id)
+    return ITEMS_ORDER.paginate(query, after, skip, limit).all()
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn user input into an FTS5 query; ``None`` if it has no words.
+
+    Every word must match, and a word ending in ``*`` matches as a prefix.
+    Words are quoted, so FTS5 operators in the input are treated as text.
+    """
+    terms = []
+    for token in _SEARCH_TERM.findall(text):
+        terms.append(f'"{token.rstrip("*")}"' + ("*" if token.endswith("*") else ""))
+    return " ".join(terms) or None
+
+
+def search_items(db: Session, text: str, min_price: Optional[float] = None,
+                 max_price: Optional[float] = None, status: Optional[AuctionStatus] = None,
+                 limit: int = 20, after: Optional[Tuple] = None) -> List[Row]:
+    """Full-text search over item titles and descriptions, best match first.
+
+    Returns rows of ``ITEM_ROW_COLUMNS`` followed by ``rank``; ``after`` is a
+    decoded ``SEARCH_ORDER`` cursor. Prices filter on the current price.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+    query = (
+        db.query(*ITEM_ROW_COLUMNS, item_search.c.rank)
+        .select_from(item_search)
+        .join(Item, Item.id == item_search.c.rowid)
+        .filter(item_search.c.items_fts.match(match))
+    )
+    if min_price is not None:
+        query = query.filter(Item.current_price >= min_price)
+    if max_price is not None:
+        query = query.filter(Item.current_price <= max_price)
+    if status is not None:
+        query = query.filter(Item.status == status)
+    return SEARCH_ORDER.paginate(query, after, 0, limit).all()
 
 
 def create_item(db: Session, item: ItemCreate, seller_id: int) -> Item:
@@ -43,9 +119,46 @@ def create_item(db: Session, item: ItemCreate, seller_id: int) -> Item:
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    auction_scheduler.schedule(db_item.id, db_item.status, db_item.start_time, db_item.end_time)
+    item_cache.invalidate_item(db_item.id)
     return db_item
 
 
+def create_items(db: Session, items: Sequence[ItemCreate], seller_id: int,
+                 activate: bool = False) -> List[Tuple[int, AuctionStatus]]:
+    """Create many items in one transaction; returns ``(id, status)`` in input order.
+
+    Items are drafts, as ``create_item`` makes them. With ``activate``, those
+    whose auction window is already open start active, as ``activate_item``
+    would leave them; the lifecycle scheduler starts the rest at their start
+    time either way.
+    """
+    now = datetime.utcnow()
+    rows = []
+    for item in items:
+        row = item.model_dump()
+        # Naive, as the database hands them back and the scheduler keeps them
+        row["start_time"] = row["start_time"].replace(tzinfo=None)
+        row["end_time"] = row["end_time"].replace(tzinfo=None)
+        live = activate and row["start_time"] <= now < row["end_time"]
+        rows.append({
+            **row,
+            "seller_id": seller_id,
+            "current_price": item.starting_price,
+            "status": AuctionStatus.ACTIVE if live else AuctionStatus.DRAFT,
+        })
+    # One multi-row INSERT, its RETURNING rows put back in the order of ``rows``
+    item_ids = db.scalars(insert(Item).returning(Item.id, sort_by_parameter_order=True), rows).all()
+    db.commit()
+
+    auction_scheduler.schedule_many([
+        (item_id, row["status"], row["start_time"], row["end_time"]) for item_id, row in zip(item_ids, rows)
+    ])
+    if any(row["status"] == AuctionStatus.ACTIVE for row in rows):
+        item_cache.invalidate_listings()
+    return [(item_id, row["status"]) for item_id, row in zip(item_ids, rows)]
+
+
 def update_item(db: Session, item_id: int, item_update: ItemUpdate, seller_id: int) -> Optional[Item]:
     """Update an auction item (only by seller)."""
     db_item = db.query(Item).filter(
@@ -61,23 +174,35 @@ def update_item(db: Session, item_id: int, item_update: ItemUpdate, seller_id: i
 
     db.commit()
     db.refresh(db_item)
+    bid_engine.invalidate(item_id)
+    item_cache.invalidate_item(item_id)
+    auction_scheduler.schedule(db_item.id, db_item.status, db_item.start_time, db_item.end_time)
     return db_item
 
 
 def activate_item(db: Session, item_id: int, seller_id: int) -> Optional[Item]:
-    """Activate an auction item."""
+    """Activate an auction item.
+
+    Already-active items are returned unchanged, since the lifecycle scheduler
+    may have started the auction at its start time.
+    """
     db_item = db.query(Item).filter(
-        and_(Item.id == item_id, Item.seller_id == seller_id, Item.status == AuctionStatus.DRAFT)
+        and_(Item.id == item_id,
+             Item.seller_id == seller_id,
+             Item.status.in_([AuctionStatus.DRAFT, AuctionStatus.ACTIVE]))
     ).first()
 
     if not db_item:
         return None
 
     now = datetime.utcnow()
-    if db_item.start_time <= now < db_item.end_time:
+    if db_item.status == AuctionStatus.DRAFT and db_item.start_time <= now < db_item.end_time:
         db_item.status = AuctionStatus.ACTIVE
         db.commit()
         db.refresh(db_item)
+        bid_engine.invalidate(item_id)
+        item_cache.invalidate_item(item_id)
+        auction_scheduler.schedule(db_item.id, db_item.status, db_item.start_time, db_item.end_time)
 
     return db_item
 
@@ -90,18 +215,16 @@ def end_expired_auctions(db: Session) -> int:
     ).update({"status": AuctionStatus.ENDED})
 
     db.commit()
+    if result:
+        bid_engine.invalidate()
+        item_cache.invalidate_all()
     return result
 
 
 def get_item_with_bid_count(db: Session, item_id: int):
     """Get item with bid count."""
-    from sqlalchemy import func
-    result = db.query(Item, func.count(Bid.id).label('bids_count')).outerjoin(Bid).filter(
-        Item.id == item_id
-    ).first()
-
-    if result:
-        item, bids_count = result
+    item = get_item_by_id(db, item_id)
+    if item:
         return {
             "id": item.id,
             "title": item.title,
@@ -116,6 +239,75 @@ def get_item_with_bid_count(db: Session, item_id: int):
             "image_url": item.image_url,
             "created_at": item.created_at,
             "updated_at": item.updated_at,
-            "bids_count": bids_count or 0
+            "bid_count": item.bid_count,
+            "high_bidder_id": item.high_bidder_id,
+            "last_bid_at": item.last_bid_at,
+            "bids_count": item.bid_count
         }
     return None
+
+
+def reconcile_bid_counters(db: Session, apply: bool = True, batch_size: int = 1000) -> dict:
+    """Recompute every item's bid counters from ``bids`` and report the drift.
+
+    Items are read ``batch_size`` at a time in ``id`` order, so memory stays
+    flat however large the catalogue. Returns how many items were checked and,
+    per counter, how many disagreed. With ``apply`` each batch's drifted items
+    are corrected in one executemany UPDATE and committed; an item whose
+    ``bid_count`` moved since it was read took a bid meanwhile and is left to
+    the bid writer (counted as ``skipped``).
+    """
+    bids = Bid.__table__.alias("b")
+    expected_count = select(func.count()).where(bids.c.item_id == Item.id).scalar_subquery()
+    expected_last = select(func.max(bids.c.created_at)).where(bids.c.item_id == Item.id).scalar_subquery()
+    expected_leader = (
+        select(bids.c.bidder_id).where(bids.c.item_id == Item.id)
+        .order_by(bids.c.amount.desc(), bids.c.id.desc()).limit(1).scalar_subquery()
+    )
+    page = (
+        select(Item.id, Item.bid_count, Item.high_bidder_id, Item.last_bid_at,
+               expected_count.label("count"), expected_leader.label("leader"),
+               expected_last.label("last"))
+        .order_by(Item.id)
+        .limit(batch_size)
+    )
+    fix = (
+        update(Item.__table__)
+        .where(and_(Item.id == bindparam("b_id"), Item.bid_count == bindparam("b_seen")))
+        .values(bid_count=bindparam("b_count"), high_bidder_id=bindparam("b_leader"),
+                last_bid_at=bindparam("b_last"))
+    )
+
+    report = {"items": 0, "bid_count": 0, "high_bidder_id": 0, "last_bid_at": 0, "drifted": 0, "skipped": 0}
+    last_id = None
+    while True:
+        rows = db.execute(page if last_id is None else page.where(Item.id > last_id)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        report["items"] += len(rows)
+
+        fixes = []
+        for row in rows:
+            drift = {
+                "bid_count": row.bid_count != row.count,
+                "high_bidder_id": row.high_bidder_id != row.leader,
+                "last_bid_at": row.last_bid_at != row.last,
+            }
+            if any(drift.values()):
+                for counter, drifted in drift.items():
+                    report[counter] += drifted
+                fixes.append({"b_id": row.id, "b_seen": row.bid_count, "b_count": row.count,
+                              "b_leader": row.leader, "b_last": row.last})
+        report["drifted"] += len(fixes)
+
+        if apply and fixes:
+            report["skipped"] += len(fixes) - db.execute(fix, fixes).rowcount
+            db.commit()
+        if len(rows) < batch_size:
+            break
+
+    if apply and report["drifted"]:
+        bid_engine.invalidate()
+        item_cache.invalidate_all()
+    return report
@@ -0,0 +1,276 @@
+"""Read-through cache for the item detail and active listing reads.
+
+Entries are response schemas (``Item``, ``ItemWithBids``) and listing pages
+of row dicts, never ORM objects, so they can be shared between requests and serialized to a
+shared backend. Writes invalidate explicitly: the services that change an item
+or its bids call ``invalidate_item``, and anything that may change many items
+calls ``invalidate_all``. TTLs bound staleness for writes made elsewhere, such
+as another worker using the in-process backend.
+
+Listing keys embed a generation counter, so one increment retires every page
+of every listing without tracking which pages exist.
+
+Services invalidate after their commit, from inside ``run_sync``, which on an
+``AsyncSession`` is the event loop's thread. There a shared backend's writes
+are handed to one writer thread, in order, and the ``aio`` write wrappers
+``settle`` before returning, so the loop never waits on Redis and a client
+still reads its own write.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.core.metrics import registry
+from app.schemas.item import Item, ItemWithBids
+
+ITEMS_GENERATION = "gen:items"
+LISTINGS_GENERATION = "gen:listings"
+
+# Invalidations bump one of these stripes before deleting keys; a fill is
+# dropped if its stripe moved while the value was being loaded or written, so
+# a slow read cannot re-cache a value that a concurrent write just invalidated.
+# Stripes are per process: with a shared backend, a fill racing another
+# worker's write is bounded by the TTL instead.
+_STRIPES = 1024
+
+logger = logging.getLogger(__name__)
+
+_item_adapter = TypeAdapter(Item)
+_details_adapter = TypeAdapter(ItemWithBids)
+_listing_adapter = TypeAdapter(List[Dict[str, Any]])
+
+
+class ItemCache:
+    """Read-through cache with hit ratio and entry-age metrics."""
+
+    def __init__(self, backend: CacheBackend, ttl: float, listing_ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.listing_ttl = listing_ttl
+        self._stripes = [0] * _STRIPES
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fills_dropped = 0
+        self.invalidations = 0
+        self.age_seconds_total = 0.0
+        self.age_seconds_max = 0.0
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._listeners: List[Callable[[Optional[List[int]]], None]] = []
+
+    async def _backend(self, method: Callable, *args) -> Any:
+        if self.backend.shared:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    def _stripe(self, key: str) -> int:
+        return hash(key) % _STRIPES
+
+    async def _read(self, key: str, stripe_key: str, ttl: float, adapter: TypeAdapter,
+                    loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = await self._backend(self.backend.get, key)
+        if entry is not None:
+            if self.backend.shared:
+                cached_at, raw = entry.split(b"|", 1)
+                cached_at, value = float(cached_at), adapter.validate_json(raw)
+            else:
+                cached_at, value = entry
+            age = time.time() - cached_at
+            with self._lock:
+                self.hits += 1
+                self.age_seconds_total += age
+                self.age_seconds_max = max(self.age_seconds_max, age)
+            return value
+
+        with self._lock:
+            self.misses += 1
+        stripe = self._stripe(stripe_key)
+        version = self._stripes[stripe]
+        value = await loader()
+        if value is None:
+            return None
+        if self._stripes[stripe] != version:
+            with self._lock:
+                self.fills_dropped += 1
+            return value
+
+        now = time.time()
+        if self.backend.shared:
+            entry = b"%r|" % now + adapter.dump_json(value)
+        else:
+            entry = (now, value)
+        await self._backend(self.backend.set, key, entry, ttl)
+        if self._stripes[stripe] != version:
+            # An invalidation ran between the check and the write; its delete
+            # may have landed first, so remove what we wrote.
+            await self._backend(self.backend.delete, key)
+            with self._lock:
+                self.fills_dropped += 1
+        return value
+
+    # Reads
+
+    async def _generations(self, *names: str) -> List[int]:
+        return await self._backend(self.backend.counters, *names)
+
+    async def get_item(self, item_id: int, loader: Callable[[], Awaitable[Optional[Item]]]) -> Optional[Item]:
+        generation, = await self._generations(ITEMS_GENERATION)
+        return await self._read(f"item:{generation}:{item_id}", f"item:{item_id}",
+                                self.ttl, _item_adapter, loader)
+
+    async def get_item_details(self, item_id: int,
+                               loader: Callable[[], Awaitable[Optional[ItemWithBids]]]) -> Optional[ItemWithBids]:
+        generation, = await self._generations(ITEMS_GENERATION)
+        return await self._read(f"details:{generation}:{item_id}", f"item:{item_id}",
+                                self.ttl, _details_adapter, loader)
+
+    async def get_active_items(self, skip: int, limit: int, after: Optional[Tuple],
+                               loader: Callable[[], Awaitable[List[dict]]]) -> List[dict]:
+        items_generation, listings_generation = await self._generations(
+            ITEMS_GENERATION, LISTINGS_GENERATION
+        )
+        cursor = "" if after is None else ",".join(str(value) for value in after)
+        key = f"active:{items_generation}.{listings_generation}:{skip}:{limit}:{cursor}"
+        return await self._read(key, "listings", self.listing_ttl, _listing_adapter, loader)
+
+    # Invalidation (any thread)
+
+    def add_listener(self, listener: Callable[[Optional[List[int]]], None]) -> None:
+        """Call ``listener(item_ids)`` on each invalidation, before any fill can see it.
+
+        ``item_ids`` is empty when only listings changed, and ``None`` when
+        every item may have. This is where shared in-flight reads must be
+        forgotten: a fill that joined a read started before the write would
+        otherwise pass the stripe check and cache what it read.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, item_ids: Optional[List[int]]) -> None:
+        for listener in self._listeners:
+            listener(item_ids)
+
+    def _bump(self, stripe_key: str) -> None:
+        with self._lock:
+            self._stripes[self._stripe(stripe_key)] += 1
+            self.invalidations += 1
+
+    def _write(self, method: Callable, *args) -> None:
+        """Run a backend write, or queue it for the writer thread if it would block the loop."""
+        if not self.backend.shared:
+            method(*args)
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            method(*args)  # a worker thread; blocking it is fine
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="item-cache")
+        self._writer.submit(self._logged, method, *args)
+
+    @staticmethod
+    def _logged(method: Callable, *args) -> None:
+        try:
+            method(*args)
+        except Exception:
+            # Entries the write would have dropped expire with their TTL
+            logger.exception("Item cache invalidation failed")
+
+    async def settle(self) -> None:
+        """Wait, without blocking the loop, for the backend writes queued so far."""
+        if self._writer is not None:
+            await asyncio.wrap_future(self._writer.submit(lambda: None))
+
+    def invalidate_listings(self) -> None:
+        self._notify([])
+        self._bump("listings")
+        self._write(self.backend.incr, LISTINGS_GENERATION)
+
+    def invalidate_item(self, item_id: int) -> None:
+        """Drop an item's cached detail and every listing page."""
+        self.invalidate_items([item_id])
+
+    def invalidate_items(self, item_ids: List[int]) -> None:
+        if not item_ids:
+            return
+        self._notify(item_ids)
+        for item_id in item_ids:
+            self._bump(f"item:{item_id}")
+        self._bump("listings")
+        self._write(self._drop_items, list(item_ids))
+
+    def _drop_items(self, item_ids: List[int]) -> None:
+        generation, = self.backend.counters(ITEMS_GENERATION)
+        keys = []
+        for item_id in item_ids:
+            keys += [f"item:{generation}:{item_id}", f"details:{generation}:{item_id}"]
+        self.backend.delete(*keys)
+        self.backend.incr(LISTINGS_GENERATION)
+
+    def invalidate_all(self) -> None:
+        self._notify(None)
+        with self._lock:
+            self._stripes = [version + 1 for version in self._stripes]
+            self.invalidations += 1
+        self._write(self._retire_generations)
+
+    def _retire_generations(self) -> None:
+        self.backend.incr(ITEMS_GENERATION)
+        self.backend.incr(LISTINGS_GENERATION)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "fills_dropped": self.fills_dropped,
+                "invalidations": self.invalidations,
+                "age_seconds_avg": self.age_seconds_total / self.hits if self.hits else 0.0,
+                "age_seconds_max": self.age_seconds_max,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.fills_dropped = self.invalidations = 0
+            self.age_seconds_total = self.age_seconds_max = 0.0
+
+
+def create_cache_backend() -> CacheBackend:
+    if settings.item_cache_backend == "redis":
+        return RedisCacheBackend(settings.item_cache_redis_url)
+    if settings.item_cache_backend != "memory":
+        raise ValueError(f"Unknown cache backend: {settings.item_cache_backend}")
+    return MemoryCacheBackend(settings.item_cache_size, settings.item_cache_ttl_seconds)
+
+
+item_cache = ItemCache(
+    create_cache_backend(),
+    ttl=settings.item_cache_ttl_seconds,
+    listing_ttl=settings.item_cache_listing_ttl_seconds,
+)
+
+registry.collected("item_cache_lookups_total", "Item cache lookups by result", "counter",
+                   lambda: [("", {"result": "hit"}, item_cache.stats()["hits"]),
+                            ("", {"result": "miss"}, item_cache.stats()["misses"])])
+registry.collected("item_cache_hit_ratio", "Share of item cache lookups that hit", "gauge",
+                   lambda: [("", {}, item_cache.stats()["hit_ratio"])])
+registry.collected("item_cache_hit_age_seconds", "Age of the entries item cache hits served", "summary",
+                   lambda: [("_sum", {}, item_cache.age_seconds_total), ("_count", {}, item_cache.hits)])
+registry.collected("item_cache_hit_age_seconds_max", "Oldest entry an item cache hit served", "gauge",
+                   lambda: [("", {}, item_cache.stats()["age_seconds_max"])])
+registry.collected("item_cache_fills_dropped_total", "Item cache fills dropped as a write overtook them",
+                   "counter", lambda: [("", {}, item_cache.stats()["fills_dropped"])])
+registry.collected("item_cache_invalidations_total", "Item cache invalidations", "counter",
+                   lambda: [("", {}, item_cache.stats()["invalidations"])])
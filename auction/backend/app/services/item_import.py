@@ -0,0 +1,199 @@
+"""Bulk item import: streamed upload readers and the chunked import loop.
+
+An upload is read as it arrives, one row at a time, and validated with
+``ItemCreate``. Valid rows are inserted ``ITEM_IMPORT_CHUNK_SIZE`` at a time,
+one multi-row INSERT and one transaction per chunk, and the upload is not read
+further while a chunk is being written. So memory is bounded by the chunk and
+the report, not by the file. JSON arrays are the exception: they are parsed
+whole, so they are refused over ``ITEM_IMPORT_MAX_JSON_BYTES``; send large
+files as NDJSON or CSV.
+
+Every row gets a line in the report: its id and status, or why it was
+rejected. Lines are encoded as their chunk is written, so a 100k-row report
+is a few megabytes of JSON rather than 100k dicts. A rejected row does not
+stop the import, and chunks already committed stay committed.
+"""
+import codecs
+import csv
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import orjson
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.db.session import DBSession
+from app.models.item import AuctionStatus
+from app.schemas.item import ItemCreate
+from app.services import aio
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+JSON_MEDIA_TYPE = "application/json"
+
+
+class InvalidUpload(ValueError):
+    """Raised when an upload cannot be read as rows at all (not for a bad row)."""
+
+
+class UploadTooLarge(InvalidUpload):
+    """Raised when a JSON array upload is over ``ITEM_IMPORT_MAX_JSON_BYTES``."""
+
+    def __init__(self):
+        super().__init__(f"JSON array uploads are limited to {settings.item_import_max_json_bytes} bytes; "
+                         f"send larger files as NDJSON or CSV")
+
+
+class RowError:
+    """A row the reader could not parse; reported and skipped."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without their line endings."""
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+def check_declared_size(media_type: str, content_length: Optional[str]) -> None:
+    """Refuse a JSON array upload by its ``Content-Length``, before reading any of it."""
+    if media_type == JSON_MEDIA_TYPE and content_length and content_length.isdigit() \
+            and int(content_length) > settings.item_import_max_json_bytes:
+        raise UploadTooLarge()
+
+
+async def read_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """A JSON array of items, parsed once all of it has arrived.
+
+    Counts the bytes as they arrive, so a body without a ``Content-Length``
+    (or with a wrong one) is refused as soon as it goes over the limit.
+    """
+    body, size = [], 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > settings.item_import_max_json_bytes:
+            raise UploadTooLarge()
+        body.append(chunk)
+    try:
+        rows = orjson.loads(b"".join(body))
+    except orjson.JSONDecodeError as exc:
+        raise InvalidUpload(f"Body is not valid JSON: {exc}") from None
+    if not isinstance(rows, list):
+        raise InvalidUpload("Body must be a JSON array of items")
+    for row in rows:
+        yield row
+
+
+async def read_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """One JSON object per line; blank lines are skipped."""
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield RowError(f"Invalid JSON: {exc}")
+
+
+async def read_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """A header row of ``ItemCreate`` field names, then one item per record.
+
+    Empty cells are left out, so optional fields take their defaults. Quoted
+    fields may span lines.
+    """
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    quotes = 0
+    async for line in _lines(chunks):
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # the line break is inside a quoted field
+        fields = next(csv.reader(["\n".join(record)]), [])
+        record, quotes = [], 0
+        if not any(fields):
+            continue
+        if header is None:
+            header = [name.strip() for name in fields]
+        elif len(fields) != len(header):
+            yield RowError(f"Expected {len(header)} fields, got {len(fields)}")
+        else:
+            yield {name: value for name, value in zip(header, fields) if value != ""}
+    if record:
+        yield RowError("Unterminated quoted field")
+    if header is None:
+        raise InvalidUpload("CSV upload has no header row")
+
+
+# Upload readers by request media type
+READERS: Dict[str, Callable[[AsyncIterator[bytes]], AsyncIterator[Any]]] = {
+    JSON_MEDIA_TYPE: read_json_array,
+    NDJSON_MEDIA_TYPE: read_ndjson,
+    CSV_MEDIA_TYPE: read_csv,
+}
+
+
+def _validate(row: Any):
+    """``(item, None)`` for a valid row, else ``(None, errors)``."""
+    if isinstance(row, RowError):
+        return None, [row.message]
+    try:
+        return ItemCreate.model_validate(row), None
+    except ValidationError as exc:
+        return None, [
+            ": ".join(filter(None, (".".join(map(str, error["loc"])), error["msg"])))
+            for error in exc.errors(include_url=False)
+        ]
+
+
+async def import_items(db: DBSession, rows: AsyncIterator[Any], seller_id: int,
+                       activate: bool = False) -> bytes:
+    """Validate and insert uploaded rows in chunks; returns the report as JSON.
+
+    The report matches ``ItemImportReport``; rows are numbered from 1 in
+    upload order. Rows past ``ITEM_IMPORT_MAX_ROWS`` are not read, and the
+    report says so with ``truncated``.
+    """
+    report = {"created": 0, "activated": 0, "failed": 0, "truncated": False}
+    lines = bytearray()
+    pending: list = []  # (row number, item, errors), in upload order
+
+    async def flush():
+        items = [item for _, item, _ in pending if item is not None]
+        created = iter(await aio.create_items(db, items, seller_id, activate) if items else ())
+        for number, item, errors in pending:
+            if item is None:
+                report["failed"] += 1
+                line = {"row": number, "errors": errors}
+            else:
+                item_id, item_status = next(created)
+                report["created"] += 1
+                report["activated"] += item_status == AuctionStatus.ACTIVE
+                line = {"row": number, "id": item_id, "status": item_status.value}
+            lines.extend(b"," if lines else b"")
+            lines.extend(orjson.dumps(line))
+        pending.clear()
+
+    number = 0
+    async for row in rows:
+        if number == settings.item_import_max_rows:
+            report["truncated"] = True
+            break
+        number += 1
+        pending.append((number, *_validate(row)))
+        if len(pending) == settings.item_import_chunk_size:
+            await flush()
+    await flush()
+    return orjson.dumps(report)[:-1] + b',"rows":[' + lines + b"]}"
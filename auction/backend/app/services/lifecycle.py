@@ -0,0 +1,248 @@
+"""Timer-driven auction lifecycle.
+
+The scheduler keeps a min-heap of upcoming transitions (a draft's start time,
+an active auction's end time) and a background thread that sleeps until the
+earliest one is due. Everything due at that moment is applied with a few
+batched, guarded UPDATEs: ``DRAFT -> ACTIVE`` once ``start_time`` has passed and
+``ACTIVE -> ENDED`` once ``end_time`` has. Listeners then hear which items
+changed, so caches and the bid engine can drop their copies.
+
+Heap entries are hints, not state: the UPDATEs re-check status and times, so an
+entry made stale by an edit or a manual activation is simply a no-op.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.item import Item, AuctionStatus
+from app.services.bid_engine import bid_engine
+from app.services.item_cache import item_cache
+
+logger = logging.getLogger(__name__)
+
+START = "start"
+END = "end"
+
+# (transition, item ids, time applied)
+TransitionListener = Callable[[str, List[int], datetime], None]
+
+
+class AuctionScheduler:
+    """Starts and ends auctions when their times arrive."""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = 1000,
+                 max_sleep: float = 60.0, clock: Callable[[], datetime] = datetime.utcnow):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int, str, int]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._listeners: List[TransitionListener] = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0
+        self.ended = 0
+
+    @contextmanager
+    def _session(self):
+        db = self._session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def add_listener(self, listener: TransitionListener) -> None:
+        self._listeners.append(listener)
+
+    # Scheduling
+
+    def _push(self, when: datetime, transition: str, item_id: int) -> None:
+        heapq.heappush(self._heap, (when, next(self._counter), transition, item_id))
+
+    def schedule(self, item_id: int, status: AuctionStatus, start_time: datetime,
+                 end_time: datetime) -> None:
+        """Queue the item's next transition; call after it is created or changed."""
+        self.schedule_many([(item_id, status, start_time, end_time)])
+
+    def schedule_many(self, items: Sequence[Tuple[int, AuctionStatus, datetime, datetime]]) -> None:
+        """``schedule`` for many ``(item_id, status, start_time, end_time)`` at once."""
+        if self._thread is None:
+            return  # ``start`` loads everything from the database
+        entries = []
+        for item_id, status, start_time, end_time in items:
+            if status == AuctionStatus.DRAFT:
+                entries.append((start_time, START, item_id))
+            elif status == AuctionStatus.ACTIVE:
+                entries.append((end_time, END, item_id))
+        if not entries:
+            return
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            for entry in entries:
+                self._push(*entry)
+        if earliest is None or min(entry[0] for entry in entries) < earliest:
+            self._wakeup.set()
+
+    def load(self, db: Session) -> int:
+        """Rebuild the heap from every draft and active auction in the database."""
+        rows = db.execute(
+            select(Item.id, Item.status, Item.start_time, Item.end_time).where(
+                or_(Item.status == AuctionStatus.ACTIVE,
+                    and_(Item.status == AuctionStatus.DRAFT, Item.end_time > self._clock()))
+            )
+        ).all()
+        with self._lock:
+            self._heap = []
+            for row in rows:
+                if row.status == AuctionStatus.DRAFT:
+                    self._push(row.start_time, START, row.id)
+                else:
+                    self._push(row.end_time, END, row.id)
+        return len(rows)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    # Transitions
+
+    def _pop_due(self, now: datetime) -> Tuple[List[int], List[int]]:
+        starts, ends = [], []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, transition, item_id = heapq.heappop(self._heap)
+                (starts if transition == START else ends).append(item_id)
+        return starts, ends
+
+    def _transition(self, db: Session, item_ids: Sequence[int], conditions: list,
+                    status: AuctionStatus, now: datetime) -> list:
+        """Move the items that still meet ``conditions`` to ``status``.
+
+        Returns ``(id, end_time)`` rows for the items that changed.
+        """
+        where = and_(Item.id.in_(item_ids), *conditions)
+        stmt = update(Item.__table__).where(where).values(status=status, updated_at=now)
+        if db.get_bind().dialect.update_returning:
+            return db.execute(stmt.returning(Item.id, Item.end_time)).all()
+        matched = db.execute(select(Item.id, Item.end_time).where(where)).all()
+        if matched:
+            db.execute(stmt)
+        return matched
+
+    def _apply(self, transition: str, item_ids: List[int], now: datetime) -> int:
+        """Apply one batch in its own short transaction, then notify listeners."""
+        if transition == START:
+            conditions = [Item.status == AuctionStatus.DRAFT, Item.start_time <= now, Item.end_time > now]
+            status = AuctionStatus.ACTIVE
+        else:
+            conditions = [Item.status == AuctionStatus.ACTIVE, Item.end_time <= now]
+            status = AuctionStatus.ENDED
+
+        db = self._session_factory()
+        try:
+            changed = self._transition(db, item_ids, conditions, status, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to %s %d auctions; retrying", transition, len(item_ids))
+            with self._lock:
+                for item_id in item_ids:
+                    self._push(now + timedelta(seconds=1), transition, item_id)
+            return 0
+        finally:
+            db.close()
+
+        if not changed:
+            return 0
+        if transition == START:
+            self.started += len(changed)
+            # Auctions that just started end later
+            with self._lock:
+                for item_id, end_time in changed:
+                    self._push(end_time, END, item_id)
+        else:
+            self.ended += len(changed)
+        self._notify(transition, [row[0] for row in changed], now)
+        return len(changed)
+
+    def run_due(self, now: Optional[datetime] = None) -> int:
+        """Apply every transition due at ``now``; returns the number of items changed.
+
+        Batches are committed separately so a burst of closures never holds the
+        write lock for long, and the first auctions are announced early.
+        """
+        now = now or self._clock()
+        starts, ends = self._pop_due(now)
+        changed = 0
+        for transition, item_ids in ((END, ends), (START, starts)):
+            for i in range(0, len(item_ids), self.batch_size):
+                changed += self._apply(transition, item_ids[i:i + self.batch_size], now)
+        return changed
+
+    def _notify(self, transition: str, item_ids: List[int], now: datetime) -> None:
+        for listener in self._listeners:
+            try:
+                listener(transition, item_ids, now)
+            except Exception:
+                logger.exception("Auction %s listener failed", transition)
+
+    # Background thread
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_due()
+            due = self.next_due()
+            timeout = self.max_sleep
+            if due is not None:
+                timeout = min(timeout, max(0.0, (due - self._clock()).total_seconds()))
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Load pending transitions and start the scheduler thread."""
+        with self._session() as db:
+            self.load(db)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="auction-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def _invalidate_bid_books(transition: str, item_ids: List[int], now: datetime) -> None:
+    for item_id in item_ids:
+        bid_engine.invalidate(item_id)
+
+
+def _invalidate_cached_items(transition: str, item_ids: List[int], now: datetime) -> None:
+    item_cache.invalidate_items(item_ids)
+
+
+auction_scheduler = AuctionScheduler(
+    SessionLocal,
+    batch_size=settings.lifecycle_batch_size,
+    max_sleep=settings.lifecycle_max_sleep,
+)
+auction_scheduler.add_listener(_invalidate_bid_books)
+auction_scheduler.add_listener(_invalidate_cached_items)
@@ -0,0 +1,115 @@
+"""Cache of authenticated principals keyed by access token.
+
+A hit skips both the JWT signature check and the user lookup. Entries never
+outlive the token, and ``invalidate_user`` drops every entry for a user whose
+record changed.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user."""
+    id: int
+    email: str
+    username: str
+    role: UserRole
+    full_name: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            full_name=user.full_name,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of principals with per-user invalidation.
+
+    Each entry records the user's version when it was cached; bumping the
+    version in ``invalidate_user`` turns all of that user's entries into misses
+    without tracking which tokens they belong to.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size, ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.stale_hits = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        version, principal = entry
+        if self._versions.get(principal.id, 0) != version:
+            self._cache.delete(token)
+            self.stale_hits += 1
+            return None
+        return principal
+
+    def generation(self) -> int:
+        """Counter bumped by every invalidation; read it before loading the user."""
+        return self._generation
+
+    def put(self, token: str, principal: Principal, expires_at: Optional[datetime] = None,
+            generation: Optional[int] = None) -> None:
+        """Cache ``principal`` unless an invalidation ran since ``generation`` was read."""
+        if generation is not None and generation != self._generation:
+            return
+        ttl = self._cache.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at.timestamp() - time.time())
+        self._cache.set(token, (self._versions.get(principal.id, 0), principal), ttl=ttl)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._generation += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stale = self.stale_hits
+        stats["hits"] -= stale
+        stats["misses"] += stale
+        stats["invalidated"] = stale
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
+
+registry.collected("principal_cache_lookups_total", "Principal cache lookups by result", "counter",
+                   lambda: [("", {"result": "hit"}, principal_cache.stats()["hits"]),
+                            ("", {"result": "miss"}, principal_cache.stats()["misses"])])
+registry.collected("principal_cache_invalidated_total", "Principal cache hits dropped as the user changed",
+                   "counter", lambda: [("", {}, principal_cache.stats()["invalidated"])])
+registry.collected("principal_cache_hit_ratio", "Share of principal cache lookups that hit", "gauge",
+                   lambda: [("", {}, principal_cache.stats()["hit_ratio"])])
+registry.collected("principal_cache_entries", "Principals cached", "gauge",
+                   lambda: [("", {}, principal_cache.stats()["size"])])
@@ -1,10 +1,21 @@
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.services.auth import get_password_hash
+from app.services.principal import principal_cache
 from typing import Optional
 
 
+class UserExists(Exception):
+    """Raised when a new user's email or username is already registered."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} already registered")
+        self.field = field
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Get user by email."""
     return db.query(User).filter(User.email == email).first()
@@ -20,9 +31,10 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user."""
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Create a new user, hashing the password unless a hash is given."""
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -36,6 +48,36 @@ def create_user(db: Session, user: UserCreate) -> User:
     return db_user
 
 
+def _taken_field(db: Session, user: UserCreate) -> Optional[str]:
+    """``"email"`` or ``"username"`` if another user already has it, email first."""
+    rows = db.execute(
+        select(User.email, User.username)
+        .where(or_(User.email == user.email, User.username == user.username))
+    ).all()
+    if any(row.email == user.email for row in rows):
+        return "email"
+    return "username" if rows else None
+
+
+def register_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Create a user unless the email or username is taken, raising ``UserExists``.
+
+    The check and the insert run on one session in one call, and a user
+    registered between them is caught by the unique constraints.
+    """
+    field = _taken_field(db, user)
+    if field is not None:
+        raise UserExists(field)
+    try:
+        return create_user(db, user, hashed_password=hashed_password)
+    except IntegrityError:
+        db.rollback()
+        field = _taken_field(db, user)
+        if field is None:
+            raise
+        raise UserExists(field) from None
+
+
 def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
     """Update user information."""
     db_user = get_user_by_id(db, user_id)
@@ -48,6 +90,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
 
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate_user(user_id)
     return db_user
 
 
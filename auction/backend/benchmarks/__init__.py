@@ -0,0 +1,4 @@
+"""Performance benchmarks for the auction backend.
+
+Run from ``auction/backend`` with ``python -m benchmarks.<name>``.
+"""
@@ -0,0 +1,389 @@
+"""Load and latency benchmarks for the HTTP API.
+
+Boots ``app.main:app`` in process (through httpx's ASGI transport) or under
+uvicorn, against a dataset built by ``generate_data.py``, and runs a named
+scenario with a fixed number of concurrent clients:
+
+- ``browse``: active listings, item reads and details, bid lists and search
+- ``bidding_war``: every client bids on one hot item, each bid just above the last
+- ``login_storm``: password logins
+- ``mixed``: mostly browsing, with bids on popular items and a few logins
+
+Each endpoint (by route template) gets throughput, p50/p95/p99 latency and
+status counts. ``--output`` saves the run as JSON, and ``compare`` flags
+endpoints whose p95 latency, throughput or error rate got worse.
+
+Without ``--database-url`` a dataset of ``--users``/``--items``/``--bids`` is
+generated into a temporary database first. Requests made during ``--warmup``
+are not counted.
+
+    python -m benchmarks.api_load run browse --concurrency 32 --seconds 20 --output before.json
+    python -m benchmarks.api_load run mixed --server uvicorn --workers 4 --database-url sqlite:///./load.db
+    python -m benchmarks.api_load compare before.json after.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from benchmarks.common import percentile, temp_database_url
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("browse", "bidding_war", "login_storm", "mixed")
+
+
+class Fixtures:
+    """Ids and names from the dataset that the scenarios pick from."""
+
+    def __init__(self, database_url: str, clients: int):
+        from sqlalchemy import create_engine, func, select
+        from add_sample_data import OBJECTS
+        from app.models.bid import Bid
+        from app.models.item import Item, AuctionStatus
+        from app.models.user import User, UserRole
+
+        engine = create_engine(database_url)
+        # Skip auctions that could close mid-run and start rejecting bids
+        open_until = datetime.utcnow() + timedelta(hours=1)
+        with engine.connect() as conn:
+            self.counts = {
+                "users": conn.execute(select(func.count(User.id))).scalar(),
+                "items": conn.execute(select(func.count(Item.id))).scalar(),
+                "bids": conn.execute(select(func.count(Bid.id))).scalar(),
+            }
+            popular = conn.execute(
+                select(Item.id, Item.current_price)
+                .where(Item.status == AuctionStatus.ACTIVE, Item.end_time > open_until)
+                .order_by(Item.bid_count.desc())
+                .limit(1000)
+            ).all()
+            self.usernames = list(conn.scalars(
+                select(User.username).where(User.role == UserRole.BUYER).order_by(User.id).limit(max(clients, 1000))
+            ))
+        engine.dispose()
+
+        if not popular or not self.usernames:
+            raise SystemExit(f"{database_url} needs open auctions and buyers; build it with generate_data.py")
+        self.item_ids = [item_id for item_id, _ in popular]
+        self.prices = {item_id: price for item_id, price in popular}
+        self.words = [word.lower() for word in OBJECTS]
+
+    def popular_item(self, rng: random.Random) -> int:
+        """An item id, skewed toward the most bid-upon lots."""
+        return self.item_ids[int(len(self.item_ids) * rng.random() ** 3)]
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint."""
+
+    def __init__(self, warmup: float):
+        self.measure_from = time.perf_counter() + warmup
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.started = self.finished = None
+
+    def record(self, label: str, status: int, started: float) -> None:
+        if started < self.measure_from:
+            return
+        if self.started is None:
+            self.started = started
+        self.finished = time.perf_counter()
+        self.latencies[label].append(self.finished - started)
+        self.statuses[label][status] += 1
+
+    def summary(self) -> dict:
+        elapsed = max((self.finished or 0.0) - (self.started or 0.0), 1e-9)
+
+        def stats(latencies, statuses):
+            errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+            return {
+                "requests": len(latencies),
+                "errors": errors,
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "rps": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "max_ms": max(latencies, default=0.0) * 1000,
+            }
+
+        total_statuses = Counter()
+        for statuses in self.statuses.values():
+            total_statuses.update(statuses)
+        return {
+            "seconds": elapsed,
+            "total": stats([l for ls in self.latencies.values() for l in ls], total_statuses),
+            "endpoints": {label: stats(self.latencies[label], self.statuses[label]) for label in sorted(self.latencies)},
+        }
+
+
+class Client:
+    """One simulated user: an httpx client, a token and a random stream."""
+
+    def __init__(self, http, recorder: Recorder, fixtures: Fixtures, index: int, seed: int, password: str):
+        from app.services import create_access_token
+
+        self.http = http
+        self.recorder = recorder
+        self.fixtures = fixtures
+        self.rng = random.Random(seed * 100_003 + index)
+        self.username = fixtures.usernames[index % len(fixtures.usernames)]
+        self.password = password
+        # Minted directly so setting up clients does not cost a bcrypt hash each
+        self.headers = {"Authorization": f"Bearer {create_access_token({'sub': self.username})}"}
+
+    async def call(self, label: str, method: str, url: str, **kwargs):
+        import httpx
+
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(label, 0, started)
+            return None
+        self.recorder.record(label, response.status_code, started)
+        return response
+
+    async def browse(self) -> None:
+        item_id = self.fixtures.popular_item(self.rng)
+        roll = self.rng.random()
+        if roll < 0.3:
+            await self.call("GET /items/", "GET", "/items/",
+                            params={"active_only": "true", "limit": 20, "skip": self.rng.randrange(5) * 20})
+        elif roll < 0.55:
+            await self.call("GET /items/{item_id}", "GET", f"/items/{item_id}")
+        elif roll < 0.75:
+            await self.call("GET /items/{item_id}/details", "GET", f"/items/{item_id}/details")
+        elif roll < 0.9:
+            await self.call("GET /bids/item/{item_id}", "GET", f"/bids/item/{item_id}", params={"limit": 20})
+        else:
+            await self.call("GET /items/search", "GET", "/items/search",
+                            params={"q": self.rng.choice(self.fixtures.words), "limit": 20})
+
+    async def bid(self, item_id: int) -> None:
+        # Clients share the price book, so most bids land just above the last one
+        prices = self.fixtures.prices
+        prices[item_id] = round(prices[item_id] + 1.0, 2)
+        await self.call("POST /bids/", "POST", "/bids/", headers=self.headers,
+                        json={"item_id": item_id, "amount": prices[item_id]})
+
+    async def login(self) -> None:
+        await self.call("POST /auth/login", "POST", "/auth/login",
+                        data={"username": self.username, "password": self.password})
+
+    async def step(self, scenario: str) -> None:
+        if scenario == "browse":
+            await self.browse()
+        elif scenario == "bidding_war":
+            await self.bid(self.fixtures.item_ids[0])
+        elif scenario == "login_storm":
+            await self.login()
+        else:
+            roll = self.rng.random()
+            if roll < 0.85:
+                await self.browse()
+            elif roll < 0.98:
+                await self.bid(self.fixtures.popular_item(self.rng))
+            else:
+                await self.login()
+
+
+async def drive(http, args, fixtures: Fixtures) -> dict:
+    recorder = Recorder(args.warmup)
+    deadline = time.perf_counter() + args.warmup + args.seconds
+    clients = [Client(http, recorder, fixtures, n, args.seed, args.password) for n in range(args.concurrency)]
+
+    async def loop(client: Client):
+        while time.perf_counter() < deadline:
+            await client.step(args.scenario)
+
+    await asyncio.gather(*(loop(client) for client in clients))
+    return recorder.summary()
+
+
+async def run_in_process(args, fixtures: Fixtures) -> dict:
+    import httpx
+    from app.main import app
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     limits=limits, timeout=60.0) as http:
+            return await drive(http, args, fixtures)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_under_uvicorn(args, fixtures: Fixtures) -> dict:
+    import httpx
+
+    port = args.port or free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as http:
+            deadline = time.perf_counter() + 30
+            while True:
+                if server.poll() is not None:
+                    raise SystemExit(f"uvicorn exited with status {server.returncode}")
+                try:
+                    if (await http.get("/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.perf_counter() > deadline:
+                    raise SystemExit("uvicorn did not become healthy within 30s")
+                await asyncio.sleep(0.2)
+            return await drive(http, args, fixtures)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def run(args) -> None:
+    database_url = args.database_url or temp_database_url("api_load")
+    # Settings are read at import time, so configure them before importing the app.
+    os.environ["DATABASE_URL"] = database_url
+    # Load clients share an IP and bid hard on a few lots; measure the app, not its 429s
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app.core.config import settings
+
+    if args.database_url is None:
+        from generate_data import generate
+
+        generate(database_url, args.users, args.items, args.bids, seed=args.seed, password=args.password)
+
+    fixtures = Fixtures(database_url, args.concurrency)
+    print(f"{args.scenario}: {args.concurrency} clients for {args.seconds:.0f}s ({args.server}) against "
+          f"{fixtures.counts['users']:,} users, {fixtures.counts['items']:,} items, {fixtures.counts['bids']:,} bids")
+    runner = run_under_uvicorn if args.server == "uvicorn" else run_in_process
+    summary = asyncio.run(runner(args, fixtures))
+
+    result = {
+        "scenario": args.scenario,
+        "server": args.server,
+        "workers": args.workers if args.server == "uvicorn" else 1,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "database_url": database_url,
+        "dataset": fixtures.counts,
+        "settings": {
+            name: getattr(settings, name)
+            for name in ("async_database", "bid_engine_enabled", "item_cache_enabled", "single_flight_enabled",
+                         "password_hash_executor", "password_hash_workers", "db_pool_size",
+                         "rate_limit_enabled")
+        },
+        **summary,
+    }
+    print_result(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved to {args.output}")
+
+
+def print_result(result: dict) -> None:
+    print(f"{'endpoint':<32}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}  statuses")
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for label, r in rows:
+        statuses = " ".join(f"{status}:{count}" for status, count in r["statuses"].items())
+        print(f"{label:<32}{r['requests']:>10}{r['rps']:>9.0f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['errors']:>8}  {statuses}")
+
+
+def compare(args) -> None:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    for key in ("scenario", "server", "concurrency", "dataset"):
+        if baseline.get(key) != candidate.get(key):
+            print(f"warning: {key} differs ({baseline.get(key)} vs {candidate.get(key)})")
+
+    def error_rate(r):
+        return r["errors"] / r["requests"] if r["requests"] else 0.0
+
+    regressions = []
+    print(f"{'endpoint':<32}{'p95 ms':>18}{'change':>9}{'req/s':>16}{'change':>9}")
+    labels = sorted(set(baseline["endpoints"]) | set(candidate["endpoints"])) + ["total"]
+    for label in labels:
+        old = baseline["total"] if label == "total" else baseline["endpoints"].get(label)
+        new = candidate["total"] if label == "total" else candidate["endpoints"].get(label)
+        if old is None or new is None:
+            print(f"{label:<32}  only in the {'candidate' if old is None else 'baseline'}")
+            continue
+        p95_change = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps_change = new["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+        problems = []
+        # Sub-millisecond p95s jitter by more than any sensible threshold
+        if p95_change > args.threshold and new["p95_ms"] - old["p95_ms"] > args.min_ms:
+            problems.append("p95")
+        if rps_change < -args.threshold:
+            problems.append("throughput")
+        if error_rate(new) > error_rate(old) + 0.01:
+            problems.append("errors")
+        if problems:
+            regressions.append((label, problems))
+        print(f"{label:<32}{old['p95_ms']:>8.2f} ->{new['p95_ms']:>7.2f}{p95_change:>+9.1%}"
+              f"{old['rps']:>7.0f} ->{new['rps']:>6.0f}{rps_change:>+9.1%}"
+              f"{'  REGRESSED: ' + ', '.join(problems) if problems else ''}")
+
+    if regressions:
+        raise SystemExit(f"{len(regressions)} endpoint(s) regressed by more than {args.threshold:.0%}")
+    print(f"no regressions beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run a scenario")
+    run_parser.add_argument("scenario", choices=SCENARIOS)
+    run_parser.add_argument("--concurrency", type=int, default=32, help="simulated clients")
+    run_parser.add_argument("--seconds", type=float, default=20.0)
+    run_parser.add_argument("--warmup", type=float, default=2.0, help="seconds of requests left out of the results")
+    run_parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run_parser.add_argument("--port", type=int, help="uvicorn port (default: any free port)")
+    run_parser.add_argument("--database-url", help="dataset to run against (default: generate one)")
+    run_parser.add_argument("--users", type=int, default=2_000)
+    run_parser.add_argument("--items", type=int, default=10_000)
+    run_parser.add_argument("--bids", type=int, default=200_000)
+    run_parser.add_argument("--password", default="pass", help="password of the dataset's users")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="allowed relative change in p95 latency and throughput")
+    compare_parser.add_argument("--min-ms", type=float, default=1.0,
+                                help="ignore p95 increases smaller than this")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Bid throughput of ``POST /bids/batch`` against one ``POST /bids/`` per bid.
+
+First checks that batching does not change any outcome. The same random
+sequence of bids (raises, bids too low, bids on ended, draft and missing lots)
+is placed on two fresh databases: bid by bid with ``place_bid``, and in
+per-bidder batches with ``place_bids``. Every outcome and every item's final
+price, bid count and leader must agree.
+
+Then boots ``app.main:app`` in process and has ``--clients`` bidders raise
+random lots for ``--seconds``, one bid per request and then ``--batch-size``
+bids per request. Reports bids and requests per second and checks each item's
+counters against its ``bids`` rows. Exits non-zero if a check fails.
+
+    python -m benchmarks.bid_batch --clients 16 --batch-size 100 --seconds 10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import make_session_factory, seed_users, temp_database_url
+
+
+def seed_items(db, seller_id: int, count: int) -> list:
+    from app.models.item import Item, AuctionStatus
+
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Batch lot {n}",
+            "starting_price": 1.0,
+            "current_price": 1.0,
+            "seller_id": seller_id,
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1),
+            "status": AuctionStatus.ACTIVE,
+        }
+        for n in range(count)
+    ])
+    db.execute(insert(Item), [
+        {"title": "Ended lot", "starting_price": 1.0, "current_price": 1.0, "seller_id": seller_id,
+         "start_time": now - timedelta(days=2), "end_time": now - timedelta(days=1),
+         "status": AuctionStatus.ENDED},
+        {"title": "Draft lot", "starting_price": 1.0, "current_price": 1.0, "seller_id": seller_id,
+         "start_time": now + timedelta(days=1), "end_time": now + timedelta(days=2),
+         "status": AuctionStatus.DRAFT},
+    ])
+    db.commit()
+    return [item_id for (item_id,) in db.query(Item.id).order_by(Item.id)]
+
+
+def item_state(db) -> list:
+    from app.models.item import Item
+
+    return db.execute(
+        select(Item.id, Item.current_price, Item.bid_count, Item.high_bidder_id).order_by(Item.id)
+    ).all()
+
+
+def check_semantics(bids: int) -> None:
+    """Place one bid sequence singly and in batches; fail on any difference."""
+    from app.schemas.bid import BidCreate
+    from app.services.bid import place_bid, place_bids
+
+    rng = random.Random(7)
+    sessions = [make_session_factory(temp_database_url("bid_batch_check"))() for _ in range(2)]
+    for db in sessions:
+        bidders = seed_users(db, 5)
+        item_ids = seed_items(db, bidders[0], 20)
+    # Runs of consecutive bids from one bidder become one batch
+    batches = []
+    while sum(len(batch) for _, batch in batches) < bids:
+        batch = []
+        for _ in range(rng.randint(1, 40)):
+            item_id = rng.choice(item_ids + [max(item_ids) + 1])
+            batch.append(BidCreate(item_id=item_id, amount=float(rng.randint(1, bids))))
+        batches.append((rng.choice(bidders), batch))
+
+    single, batched = sessions
+    single_outcomes = [place_bid(single, bid, bidder)[0] for bidder, batch in batches for bid in batch]
+    batched_outcomes = [outcome for bidder, batch in batches
+                        for outcome, _ in place_bids(batched, batch, bidder, chunk_size=16)]
+    if single_outcomes != batched_outcomes:
+        first = next(n for n, pair in enumerate(zip(single_outcomes, batched_outcomes)) if pair[0] != pair[1])
+        raise SystemExit(f"bid {first}: placed alone it was {single_outcomes[first].value}, "
+                         f"in a batch {batched_outcomes[first].value}")
+    if item_state(single) != item_state(batched):
+        raise SystemExit("items differ after placing the same bids singly and in batches")
+    accepted = sum(outcome.value == "accepted" for outcome in single_outcomes)
+    print(f"semantics: {len(single_outcomes)} bids in {len(batches)} batches, {accepted} accepted, "
+          f"outcomes and items identical")
+    for db in sessions:
+        db.close()
+
+
+def check_counters(Session) -> None:
+    from app.models.bid import Bid
+    from app.models.item import Item
+
+    db = Session()
+    drifted = db.execute(
+        select(Item.id)
+        .outerjoin(Bid, Bid.item_id == Item.id)
+        .group_by(Item.id)
+        .having((func.count(Bid.id) != Item.bid_count) |
+                (func.coalesce(func.max(Bid.amount), Item.current_price) != Item.current_price))
+    ).all()
+    db.close()
+    if drifted:
+        raise SystemExit(f"{len(drifted)} item(s) whose price or bid count disagrees with their bids")
+
+
+async def load(mode: str, args, item_ids: list, tokens: list) -> dict:
+    import httpx
+    from app.main import app
+
+    prices = {item_id: 1.0 for item_id in item_ids}
+    totals = {"requests": 0, "bids": 0, "accepted": 0, "errors": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    def next_bid(rng) -> dict:
+        item_id = rng.choice(item_ids)
+        prices[item_id] += 1.0
+        return {"item_id": item_id, "amount": prices[item_id]}
+
+    async def bidder(client, index: int):
+        rng = random.Random(index)
+        headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+        refs = itertools.count()
+        while time.perf_counter() < deadline:
+            if mode == "single":
+                response = await client.post("/bids/", json=next_bid(rng), headers=headers)
+                sent, accepted = 1, response.status_code == 200
+                failed = response.status_code not in (200, 400)
+            else:
+                batch = [{**next_bid(rng), "client_ref": str(next(refs))} for _ in range(args.batch_size)]
+                response = await client.post("/bids/batch", json=batch, headers=headers)
+                sent, failed = len(batch), response.status_code != 200
+                accepted = 0 if failed else sum(r["outcome"] == "accepted" for r in response.json())
+            totals["requests"] += 1
+            totals["bids"] += sent
+            totals["accepted"] += accepted
+            totals["errors"] += failed
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=60.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(bidder(client, n) for n in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    return {"mode": mode, "elapsed": elapsed, **totals}
+
+
+async def run_all(args, item_ids: list, tokens: list) -> list:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        return [await load(mode, args, item_ids, tokens) for mode in ("single", "batch")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0, help="per mode")
+    parser.add_argument("--check-bids", type=int, default=5000, help="bids in the semantics check")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    database_url = temp_database_url("bid_batch")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+    check_semantics(args.check_bids)
+
+    from app.services import create_access_token
+
+    Session = make_session_factory(database_url)
+    db = Session()
+    users = seed_users(db, args.clients)
+    item_ids = seed_items(db, users[0], args.items)[:args.items]
+    db.close()
+    tokens = [create_access_token({"sub": f"bench{n}"}) for n in range(args.clients)]
+
+    results = asyncio.run(run_all(args, item_ids, tokens))
+    check_counters(Session)
+    print(f"{args.clients} clients over {args.items} lots; batches of {args.batch_size}")
+    print(f"{'mode':<8}{'requests/s':>12}{'bids/s':>10}{'accepted':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['requests'] / r['elapsed']:>12.0f}{r['bids'] / r['elapsed']:>10.0f}"
+              f"{r['accepted'] / max(r['bids'], 1):>10.1%}{r['errors']:>8}")
+    if any(r["errors"] for r in results):
+        raise SystemExit("some requests failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Many threads bidding on one item.
+
+Checks that no update is lost: the accepted bids must be strictly increasing in
+commit order and the item's final price must equal the highest stored bid.
+``--legacy`` runs the old read-compare-write path for comparison.
+
+    python -m benchmarks.bid_contention --threads 32 --bids 200
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime
+
+from app.models.bid import Bid
+from app.models.item import Item, AuctionStatus
+from app.schemas.bid import BidCreate
+from app.services.bid import place_bid, BidOutcome
+from benchmarks.common import (
+    make_session_factory, percentile, seed_active_item, seed_users, temp_database_url
+)
+
+
+def legacy_place_bid(db, bid: BidCreate, bidder_id: int):
+    """The pre-CAS path: read the item, compare in Python, write the price."""
+    item = db.query(Item).filter(Item.id == bid.item_id).first()
+    now = datetime.utcnow()
+    if (not item or item.status != AuctionStatus.ACTIVE or
+            item.start_time > now or item.end_time <= now or
+            bid.amount <= item.current_price):
+        db.rollback()
+        return BidOutcome.TOO_LOW, None
+    db_bid = Bid(item_id=bid.item_id, bidder_id=bidder_id, amount=bid.amount)
+    db.add(db_bid)
+    item.current_price = bid.amount
+    item.updated_at = now
+    db.commit()
+    return BidOutcome.ACCEPTED, db_bid
+
+
+def run(threads: int, bids_per_thread: int, legacy: bool, seed: int) -> dict:
+    Session = make_session_factory(temp_database_url("contention"))
+    db = Session()
+    bidders = seed_users(db, threads)
+    item_id = seed_active_item(db, bidders[0])
+    db.close()
+
+    strategy = legacy_place_bid if legacy else place_bid
+    latencies, accepted = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def bidder(index: int):
+        rng = random.Random(seed + index)
+        session = Session()
+        local_latencies, local_accepted = [], 0
+        start_barrier.wait()
+        for step in range(bids_per_thread):
+            amount = round(1 + step * 10 + rng.uniform(0, 10 * threads), 2)
+            started = time.perf_counter()
+            outcome, _ = strategy(session, BidCreate(item_id=item_id, amount=amount), bidders[index])
+            local_latencies.append(time.perf_counter() - started)
+            local_accepted += outcome == BidOutcome.ACCEPTED
+        session.close()
+        with lock:
+            latencies.extend(local_latencies)
+            accepted.append(local_accepted)
+
+    workers = [threading.Thread(target=bidder, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    db = Session()
+    amounts = [amount for (amount,) in db.query(Bid.amount).filter(Bid.item_id == item_id).order_by(Bid.id)]
+    final_price = db.query(Item.current_price).filter(Item.id == item_id).scalar()
+    db.close()
+
+    out_of_order = sum(1 for prev, cur in zip(amounts, amounts[1:]) if cur <= prev)
+    return {
+        "path": "legacy" if legacy else "cas",
+        "attempts": threads * bids_per_thread,
+        "accepted": sum(accepted),
+        "stored": len(amounts),
+        "out_of_order": out_of_order,
+        "final_price": final_price,
+        "max_bid": max(amounts) if amounts else None,
+        "lost_update": bool(amounts) and final_price != max(amounts),
+        "bids_per_sec": threads * bids_per_thread / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--bids", type=int, default=100, help="bids per thread")
+    parser.add_argument("--legacy", action="store_true", help="run the read-modify-write path")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    result = run(args.threads, args.bids, args.legacy, args.seed)
+    for key, value in result.items():
+        print(f"{key:>14}: {value:.2f}" if isinstance(value, float) else f"{key:>14}: {value}")
+
+    consistent = not result["lost_update"] and result["out_of_order"] == 0 \
+        and result["stored"] == result["accepted"]
+    if result["path"] == "cas" and not consistent:
+        raise SystemExit("lost update detected")
+
+
+if __name__ == "__main__":
+    main()
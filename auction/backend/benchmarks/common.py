@@ -0,0 +1,83 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks build their own throwaway SQLite databases so they never touch
+``auction.db``.
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+# A bcrypt hash of "pass"; hashing is not what the benchmarks measure.
+PASSWORD_HASH = "$2b$12$QTDNyDj9YmQG4xiSye4XgO17m0EYmlB8E.ZPnZ6xUiQJiIp6WDqBS"
+
+
+def temp_database_url(name: str = "bench") -> str:
+    """Return a SQLite URL for a fresh file in a temporary directory."""
+    directory = tempfile.mkdtemp(prefix="auction-bench-")
+    return f"sqlite:///{os.path.join(directory, name)}.db"
+
+
+def make_session_factory(database_url: str, tuned: bool = True):
+    """Create the schema at ``database_url`` and return a session factory.
+
+    ``tuned`` builds the engine with the app's pool and SQLite settings; otherwise
+    it is a bare ``create_engine`` as the app used before they existed.
+    """
+    from app.db.session import Base, create_db_engine
+    import app.models  # noqa: F401  (register the tables)
+
+    if tuned:
+        engine = create_db_engine(database_url)
+    else:
+        engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed_users(db, count: int) -> List[int]:
+    """Insert ``count`` buyers and return their ids."""
+    from app.models.user import User, UserRole
+
+    db.execute(insert(User), [
+        {
+            "email": f"bench{i}@example.com",
+            "username": f"bench{i}",
+            "hashed_password": PASSWORD_HASH,
+            "role": UserRole.BUYER,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    return [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+
+
+def seed_active_item(db, seller_id: int, starting_price: float = 1.0) -> int:
+    """Insert one auction that is open for the next day and return its id."""
+    from app.models.item import Item, AuctionStatus
+
+    now = datetime.utcnow()
+    item = Item(
+        title="Benchmark lot",
+        starting_price=starting_price,
+        current_price=starting_price,
+        seller_id=seller_id,
+        start_time=now - timedelta(hours=1),
+        end_time=now + timedelta(days=1),
+        status=AuctionStatus.ACTIVE,
+    )
+    db.add(item)
+    db.commit()
+    return item.id
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (``pct`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
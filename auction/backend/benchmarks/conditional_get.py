@@ -0,0 +1,175 @@
+"""Polling clients with and without conditional GETs.
+
+Boots ``app.main:app`` in process and has ``--clients`` pollers each watch
+``--watch`` lots, popular ones more often, fetching ``/items/{id}`` and
+``/bids/item/{id}`` in turn while one bidder places ``--bid-rate`` bids a
+second on the same lots through the API. In ``plain`` mode every
+poll downloads the full body; in ``conditional`` mode each client keeps the
+last body and ``ETag`` per URL and sends ``If-None-Match``, so unchanged
+resources come back as an empty 304.
+
+Reports polls per second, the share answered 304, response bytes, SQL
+statements and process CPU time per poll (client and server share the
+process, so CPU includes the client's side in both modes). Exits non-zero if
+a client kept an item whose price was behind a bid accepted before its poll.
+
+    python -m benchmarks.conditional_get --clients 50 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory, seed_users, temp_database_url
+
+MODES = ("plain", "conditional")
+
+
+def seed(Session, items: int) -> tuple:
+    from app.models.item import Item, AuctionStatus
+
+    db = Session()
+    users = seed_users(db, 10)
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Polled lot {n}",
+            "description": "A lot watched by many clients",
+            "starting_price": 1.0,
+            "current_price": 1.0,
+            "seller_id": users[0],
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1),
+            "status": AuctionStatus.ACTIVE,
+        }
+        for n in range(items)
+    ])
+    db.commit()
+    item_ids = [item_id for (item_id,) in db.query(Item.id).order_by(Item.id)]
+    db.close()
+    return users, item_ids
+
+
+def statements_sent() -> float:
+    from app.core.metrics import db_statements
+
+    return sum(value for _, _, value in db_statements.samples())
+
+
+async def run(mode: str, args, item_ids: list, accepted: dict) -> dict:
+    import httpx
+    from app.main import app
+    from app.services import create_access_token
+
+    conditional = mode == "conditional"
+    weights = [1.0 / (rank + 1) for rank in range(len(item_ids))]
+    totals = {"polls": 0, "not_modified": 0, "bytes": 0, "stale": 0, "bids": 0}
+    deadline = time.perf_counter() + args.seconds
+    token = create_access_token({"sub": "bench1"})
+
+    async def poller(client, index: int):
+        rng = random.Random(index)
+        cache = {}  # url -> (etag, price or None)
+        watched = rng.choices(item_ids, weights, k=args.watch)
+        urls = [(item_id, url) for item_id in watched for url in (f"/items/{item_id}", f"/bids/item/{item_id}")]
+        while time.perf_counter() < deadline:
+            item_id, url = rng.choice(urls)
+            expected = accepted[item_id]
+            headers = {}
+            if conditional and url in cache:
+                headers["If-None-Match"] = cache[url][0]
+            response = await client.get(url, headers=headers)
+            totals["polls"] += 1
+            totals["bytes"] += len(response.content)
+            if response.status_code == 304:
+                totals["not_modified"] += 1
+                price = cache[url][1]
+            else:
+                response.raise_for_status()
+                body = response.json()
+                price = body["current_price"] if url.startswith("/items/") else None
+                cache[url] = (response.headers["etag"], price)
+            if price is not None and price < expected:
+                totals["stale"] += 1
+            # A 304 from the cache never waits on anything in process; yield
+            # as a network round trip would, or this client starves the rest
+            await asyncio.sleep(0)
+
+    async def bidder(client):
+        rng = random.Random(-1)
+        prices = dict(accepted)
+        while time.perf_counter() < deadline:
+            item_id = rng.choices(item_ids, weights)[0]
+            prices[item_id] += 1.0
+            response = await client.post("/bids/", json={"item_id": item_id, "amount": prices[item_id]},
+                                         headers={"Authorization": f"Bearer {token}"})
+            if response.status_code == 200:
+                accepted[item_id] = max(accepted[item_id], prices[item_id])
+                totals["bids"] += 1
+            await asyncio.sleep(1.0 / args.bid_rate)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        statements = statements_sent()
+        cpu, started = time.process_time(), time.perf_counter()
+        await asyncio.gather(bidder(client), *(poller(client, n) for n in range(args.clients)))
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu
+        statements = statements_sent() - statements
+    polls = totals["polls"]
+    return {
+        "mode": mode,
+        "polls_per_second": polls / elapsed,
+        "not_modified_share": totals["not_modified"] / polls,
+        "bytes_per_poll": totals["bytes"] / polls,
+        "megabytes": totals["bytes"] / 1e6,
+        "statements_per_poll": statements / polls,
+        "cpu_us_per_poll": cpu / polls * 1e6,
+        **totals,
+    }
+
+
+async def run_all(args, item_ids: list) -> list:
+    from app.main import app
+
+    accepted = {item_id: 1.0 for item_id in item_ids}  # highest price known to be committed
+    async with app.router.lifespan_context(app):
+        return [await run(mode, args, item_ids, accepted) for mode in MODES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--watch", type=int, default=5, help="lots each client polls")
+    parser.add_argument("--seconds", type=float, default=10.0, help="per mode")
+    parser.add_argument("--bid-rate", type=float, default=20.0, help="bids per second")
+    parser.add_argument("--item-cache", action="store_true", help="leave the item cache on")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    database_url = temp_database_url("conditional_get")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ITEM_CACHE_ENABLED"] = "true" if args.item_cache else "false"
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+    _, item_ids = seed(make_session_factory(database_url), args.items)
+    results = asyncio.run(run_all(args, item_ids))
+
+    print(f"{args.clients} clients polling {args.items} lots, {args.bid_rate:g} bids/s, "
+          f"item cache {'on' if args.item_cache else 'off'}")
+    print(f"{'mode':<13}{'polls/s':>9}{'304s':>7}{'bytes/poll':>12}{'MB':>8}{'SQL/poll':>10}"
+          f"{'CPU us/poll':>13}{'bids':>6}{'stale':>7}")
+    for r in results:
+        print(f"{r['mode']:<13}{r['polls_per_second']:>9.0f}{r['not_modified_share']:>7.1%}"
+              f"{r['bytes_per_poll']:>12.0f}{r['megabytes']:>8.1f}{r['statements_per_poll']:>10.2f}"
+              f"{r['cpu_us_per_poll']:>13.0f}{r['bids']:>6}{r['stale']:>7}")
+    if any(r["stale"] for r in results):
+        raise SystemExit("a client kept a stale item after a bid was accepted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Read-heavy browse mix with the item cache off, in memory, and in Redis.
+
+Concurrent tasks call the same ``aio`` functions the handlers use: item reads
+and item details for a skewed set of popular lots, the first pages of the
+active listing, and a share of bids. Each mode reports throughput, hit ratio
+and entry age, and counts stale reads: an item read that returned a lower
+price than a bid which had already been accepted before the read started.
+Any stale read fails the run, since every write path invalidates.
+
+The Redis mode uses ``--redis-url`` when given, otherwise a local
+``fakeredis`` server (``pip install redis fakeredis``); without either package
+it is skipped.
+
+    python -m benchmarks.item_cache --items 2000 --concurrency 32 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.models.item import Item, AuctionStatus
+from app.schemas.bid import BidCreate
+from app.services import aio
+from app.services.bid import BidOutcome
+from app.services.item_cache import item_cache
+from benchmarks.common import make_session_factory, percentile, seed_users, temp_database_url
+
+
+def seed(Session, items: int) -> tuple:
+    db = Session()
+    users = seed_users(db, 50)
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Lot {i}",
+            "description": "Benchmark lot",
+            "starting_price": 1.0,
+            "current_price": 1.0,
+            "seller_id": users[0],
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1) + timedelta(seconds=i),
+            "status": AuctionStatus.ACTIVE,
+        }
+        for i in range(items)
+    ])
+    db.commit()
+    item_ids = [item_id for (item_id,) in db.query(Item.id).order_by(Item.id)]
+    db.close()
+    return users, item_ids
+
+
+def start_fake_redis() -> str:
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0"
+
+
+async def run(mode: str, args, backend) -> dict:
+    Session = make_session_factory(temp_database_url("item_cache"))
+    users, item_ids = seed(Session, args.items)
+    settings.item_cache_enabled = backend is not None
+    if backend is not None:
+        backend.clear()
+        item_cache.backend = backend
+    item_cache.reset_stats()
+
+    # Popular lots get most of the traffic
+    weights = [1.0 / (rank + 1) for rank in range(len(item_ids))]
+    prices = {item_id: 1.0 for item_id in item_ids}
+    accepted = {item_id: 1.0 for item_id in item_ids}  # highest bid known to be committed
+    totals = {"reads": 0, "bids": 0, "stale": 0}
+    latencies = []
+    deadline = time.perf_counter() + args.seconds
+
+    async def worker(index: int):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            db = Session()
+            started = time.perf_counter()
+            item_id = rng.choices(item_ids, weights)[0]
+            roll = rng.random()
+            if roll < args.bid_ratio:
+                prices[item_id] += 1.0
+                amount = prices[item_id]
+                outcome, _ = await aio.place_bid(db, BidCreate(item_id=item_id, amount=amount), rng.choice(users))
+                if outcome == BidOutcome.ACCEPTED:
+                    accepted[item_id] = max(accepted[item_id], amount)
+                totals["bids"] += 1
+            elif roll < 0.85:
+                expected = accepted[item_id]
+                if rng.random() < 0.5:
+                    item = await aio.get_item_by_id(db, item_id)
+                    price = item.current_price
+                else:
+                    details = await aio.get_item_with_bid_count(db, item_id)
+                    price = details["current_price"] if isinstance(details, dict) else details.current_price
+                totals["stale"] += price < expected
+                totals["reads"] += 1
+            else:
+                await aio.get_active_items(db, skip=rng.randrange(args.pages) * 20, limit=20)
+                totals["reads"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stats = item_cache.stats() if backend is not None else {}
+    return {
+        "mode": mode,
+        "ops_per_second": (totals["reads"] + totals["bids"]) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "hit_ratio": stats.get("hit_ratio", 0.0),
+        "age_avg_ms": stats.get("age_seconds_avg", 0.0) * 1000,
+        "fills_dropped": stats.get("fills_dropped", 0),
+        **totals,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--bid-ratio", type=float, default=0.05, help="share of operations that bid")
+    parser.add_argument("--pages", type=int, default=5, help="listing pages browsed")
+    parser.add_argument("--redis-url", help="use this server instead of a local fakeredis")
+    args = parser.parse_args()
+
+    modes = [
+        ("off", lambda: None),
+        ("memory", lambda: MemoryCacheBackend(settings.item_cache_size, settings.item_cache_ttl_seconds)),
+    ]
+    try:
+        redis_url = args.redis_url or start_fake_redis()
+        modes.append(("redis", lambda: RedisCacheBackend(redis_url)))
+    except ImportError:
+        print("redis mode skipped: install redis and fakeredis, or pass --redis-url")
+
+    results = [asyncio.run(run(mode, args, make_backend())) for mode, make_backend in modes]
+
+    print(f"{'mode':<8}{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'hit ratio':>11}{'age ms':>9}"
+          f"{'reads':>9}{'bids':>7}{'stale':>7}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['ops_per_second']:>9.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['hit_ratio']:>11.1%}{r['age_avg_ms']:>9.0f}{r['reads']:>9}{r['bids']:>7}{r['stale']:>7}")
+    if any(r["stale"] for r in results):
+        raise SystemExit("stale reads after an accepted bid")
+
+
+if __name__ == "__main__":
+    main()
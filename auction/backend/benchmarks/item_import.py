@@ -0,0 +1,150 @@
+"""Listing lots one request at a time against one ``POST /items/bulk`` upload.
+
+Boots ``app.main:app`` in process. First ``--singles`` lots are created with
+``POST /items/`` and then activated with ``POST /items/{id}/activate``, as a
+seller does today. Then ``--rows`` lots are uploaded as streamed NDJSON and as
+streamed CSV with ``activate=true``; a few rows in each are invalid on purpose.
+
+Reports lots per second. With ``--memory`` each upload is sent once more
+under ``tracemalloc`` (which slows it several times over) to report the peak
+Python memory it allocated; that should follow the chunk size, not
+``--rows``, apart from the encoded report. The lifecycle scheduler is off so
+its heap of pending transitions is not counted. Exits non-zero if an upload's
+report miscounts its rows or does not line up with what was stored.
+
+    python -m benchmarks.item_import --rows 100000 --memory
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_session_factory, seed_users, temp_database_url
+
+CSV_FIELDS = ("title", "description", "starting_price", "start_time", "end_time")
+BAD_EVERY = 1000  # every this many rows is invalid
+
+
+def lot(n: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        "title": f"Imported lot {n}",
+        "description": "Lot from a seller's catalogue, with a description of ordinary length",
+        "starting_price": 1.0 + n % 500,
+        "start_time": (now - timedelta(minutes=1)).isoformat(),
+        "end_time": (now + timedelta(days=1, minutes=n % 1000)).isoformat(),
+    }
+
+
+async def ndjson_body(rows: int):
+    for n in range(rows):
+        row = lot(n)
+        if n % BAD_EVERY == BAD_EVERY - 1:
+            row["starting_price"] = "not a price"
+        yield (json.dumps(row) + "\n").encode()
+
+
+async def csv_body(rows: int):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_FIELDS)
+    writer.writeheader()
+    for n in range(rows):
+        row = lot(n)
+        if n % BAD_EVERY == BAD_EVERY - 1:
+            row["end_time"] = "soon"
+        writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def run(args, token: str) -> list:
+    import httpx
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+    ) as client:
+        started = time.perf_counter()
+        for n in range(args.singles):
+            response = await client.post("/items/", json=lot(n), headers=headers)
+            response.raise_for_status()
+            await client.post(f"/items/{response.json()['id']}/activate", headers=headers)
+        results.append(("single requests", args.singles, time.perf_counter() - started, None, None))
+
+        for name, media_type, body in (("NDJSON upload", "application/x-ndjson", ndjson_body),
+                                       ("CSV upload", "text/csv", csv_body)):
+            async def upload():
+                response = await client.post("/items/bulk", params={"activate": "true"}, content=body(args.rows),
+                                             headers={**headers, "Content-Type": media_type})
+                response.raise_for_status()
+                return response
+
+            started = time.perf_counter()
+            report = (await upload()).json()
+            elapsed = time.perf_counter() - started
+            peak = None
+            if args.memory:
+                # Not parsed, so the peak is the server's and the raw body's
+                tracemalloc.start()
+                await upload()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results.append((name, args.rows, elapsed, peak, report))
+    return results
+
+
+def check(report: dict, rows: int, Session) -> None:
+    from app.models.item import Item
+
+    bad = rows // BAD_EVERY
+    if (report["created"], report["failed"], len(report["rows"])) != (rows - bad, bad, rows):
+        raise SystemExit(f"report counts {report['created']} created and {report['failed']} failed "
+                         f"of {len(report['rows'])} rows")
+    created = {line["id"]: line["row"] for line in report["rows"] if "id" in line}
+    db = Session()
+    titles = dict(db.query(Item.id, Item.title).filter(Item.id.in_(created)))
+    db.close()
+    misplaced = [item_id for item_id, row in created.items() if titles.get(item_id) != f"Imported lot {row - 1}"]
+    if misplaced:
+        raise SystemExit(f"{len(misplaced)} report ids point at another row's item")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="lots per upload")
+    parser.add_argument("--singles", type=int, default=2000, help="lots created one request at a time")
+    parser.add_argument("--memory", action="store_true", help="also measure each upload's peak memory")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    database_url = temp_database_url("item_import")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ITEM_IMPORT_MAX_ROWS"] = str(args.rows)
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+
+    from app.services import create_access_token
+
+    Session = make_session_factory(database_url)
+    db = Session()
+    seed_users(db, 1)
+    db.close()
+
+    results = asyncio.run(run(args, create_access_token({"sub": "bench0"})))
+    print(f"{'path':<18}{'lots':>8}{'seconds':>9}{'lots/s':>9}{'peak MB':>9}")
+    for name, lots, elapsed, peak, report in results:
+        peak_mb = f"{peak / 1e6:>9.1f}" if peak is not None else f"{'-':>9}"
+        print(f"{name:<18}{lots:>8}{elapsed:>9.2f}{lots / elapsed:>9.0f}{peak_mb}")
+        if report is not None:
+            check(report, lots, Session)
+
+
+if __name__ == "__main__":
+    main()
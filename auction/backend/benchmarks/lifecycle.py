@@ -0,0 +1,89 @@
+"""Many auctions ending at once under the lifecycle scheduler.
+
+Seeds active auctions whose end times fall within one window (100k within a
+minute by default), starts the scheduler against them, and measures how late
+each one was ended relative to its ``end_time``. Fails if any auction is still
+active afterwards or any closure was not announced. The transitions
+themselves are covered by ``tests/test_lifecycle.py``.
+
+    python -m benchmarks.lifecycle --auctions 100000 --window 60
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.models.item import Item, AuctionStatus
+from app.services.lifecycle import AuctionScheduler, END
+from benchmarks.common import make_session_factory, percentile, seed_users, temp_database_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--auctions", type=int, default=100_000)
+    parser.add_argument("--window", type=float, default=60.0, help="seconds over which the auctions end")
+    parser.add_argument("--lead", type=float, default=5.0, help="seconds before the first auction ends")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    Session = make_session_factory(temp_database_url("lifecycle"))
+    with Session() as db:
+        seller = seed_users(db, 1)[0]
+        now = datetime.utcnow()
+        first_end = now + timedelta(seconds=args.lead)
+        step = args.window / max(1, args.auctions - 1)
+        end_times = [first_end + timedelta(seconds=n * step) for n in range(args.auctions)]
+        for offset in range(0, args.auctions, 50_000):
+            db.execute(insert(Item), [
+                {
+                    "title": f"Lot {n}",
+                    "starting_price": 1.0,
+                    "current_price": 1.0,
+                    "seller_id": seller,
+                    "start_time": now - timedelta(hours=1),
+                    "end_time": end_times[n],
+                    "status": AuctionStatus.ACTIVE,
+                }
+                for n in range(offset, min(offset + 50_000, args.auctions))
+            ])
+        db.commit()
+        ids = list(db.execute(select(Item.id).order_by(Item.id)).scalars())
+    end_at = dict(zip(ids, end_times))
+
+    lags, batches = [], []
+
+    def on_transition(transition, item_ids, applied_at):
+        if transition == END:
+            closed_at = datetime.utcnow()
+            batches.append(len(item_ids))
+            lags.extend((closed_at - end_at[item_id]).total_seconds() for item_id in item_ids)
+
+    scheduler = AuctionScheduler(Session, batch_size=args.batch_size)
+    scheduler.add_listener(on_transition)
+    started = time.perf_counter()
+    scheduler.start()
+    load_seconds = time.perf_counter() - started
+    print(f"{args.auctions} auctions ending over {args.window:.0f}s; scheduler loaded in {load_seconds:.2f}s")
+
+    deadline = end_times[-1] + timedelta(seconds=10)
+    while len(lags) < args.auctions and datetime.utcnow() < deadline:
+        time.sleep(0.2)
+    scheduler.stop()
+
+    with Session() as db:
+        still_active = db.execute(
+            select(func.count(Item.id)).where(Item.status == AuctionStatus.ACTIVE)
+        ).scalar()
+
+    print(f"ended {scheduler.ended} auctions in {len(batches)} batches "
+          f"(largest {max(batches, default=0)} items)")
+    print(f"closure lag after end_time: min={min(lags, default=0) * 1000:.1f}ms "
+          f"p50={percentile(lags, 50) * 1000:.1f}ms p99={percentile(lags, 99) * 1000:.1f}ms "
+          f"max={max(lags, default=0) * 1000:.1f}ms")
+    if still_active or len(lags) != args.auctions:
+        raise SystemExit(f"{still_active} auctions still active, {len(lags)} closures announced")
+
+
+if __name__ == "__main__":
+    main()
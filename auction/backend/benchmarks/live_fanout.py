@@ -0,0 +1,104 @@
+"""Soak test of the live bid hub with thousands of subscribers.
+
+Subscribes simulated consumers (asyncio tasks reading their ``Subscription``)
+to a set of items, publishes bids from a worker thread the way request threads
+do, and measures publish-to-receive latency. A share of the consumers never
+read, so the run also shows that slow consumers are dropped instead of
+buffered without bound.
+
+    python -m benchmarks.live_fanout --subscribers 10000 --items 10 --rate 500
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from app.services.bid_hub import BidHub
+from benchmarks.common import percentile
+
+
+async def consumer(subscription, sent_at: dict, latencies: list, counts: dict):
+    while True:
+        event = await subscription.get()
+        if event is None:
+            return
+        event.json  # what a connection would send
+        latencies.append(time.perf_counter() - sent_at[event.seq])
+        counts["received"] += 1
+
+
+def publisher(hub: BidHub, items: int, rate: float, seconds: float, sent_at: dict):
+    """Publish bids at ``rate`` per second across ``items`` items."""
+    rng = random.Random(1)
+    prices = [1.0] * items
+    interval = 1.0 / rate
+    deadline = time.perf_counter() + seconds
+    next_at, seq = time.perf_counter(), 0
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        item_id = rng.randrange(items) + 1
+        prices[item_id - 1] += 1.0
+        seq += 1
+        sent_at[seq] = time.perf_counter()
+        hub.publish(item_id, prices[item_id - 1], bidder_id=seq % 100, seq=seq)
+        next_at += interval
+    return seq
+
+
+async def run(args) -> None:
+    hub = BidHub(max_queue=args.queue_size, coalesce_interval=args.coalesce)
+    hub.start()
+
+    sent_at, latencies = {}, []
+    counts = {"received": 0}
+    slow = int(args.subscribers * args.slow_share)
+    tasks, idle = [], []
+    for n in range(args.subscribers):
+        subscription = hub.subscribe(n % args.items + 1)
+        if n < slow:
+            idle.append(subscription)
+        else:
+            tasks.append(asyncio.create_task(consumer(subscription, sent_at, latencies, counts)))
+    print(f"{args.subscribers} subscribers on {args.items} items ({slow} never read)")
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    published = await loop.run_in_executor(
+        None, publisher, hub, args.items, args.rate, args.seconds, sent_at
+    )
+    await asyncio.sleep(args.coalesce + 0.5)
+    elapsed = time.perf_counter() - started
+
+    stats = hub.stats()
+    hub.stop()
+    await asyncio.gather(*tasks)
+
+    print(f"published {published} bids in {args.seconds:.0f}s; {stats['broadcasts']} broadcasts "
+          f"after coalescing ({stats['coalesced']} superseded)")
+    print(f"delivered {counts['received']} updates ({counts['received'] / elapsed:.0f}/s); "
+          f"dropped {stats['dropped']} slow subscribers, {stats['subscribers']} still connected")
+    print(f"publish-to-receive latency: p50={percentile(latencies, 50) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:.1f}ms max={max(latencies, default=0) * 1000:.1f}ms")
+    overfull = [subscription for subscription in idle if len(subscription) > args.queue_size]
+    if overfull or stats["dropped"] > slow:
+        raise SystemExit(f"{len(overfull)} idle subscribers buffered past the queue limit; "
+                         f"{stats['dropped']} dropped of {slow} idle")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=500.0, help="bids published per second")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--coalesce", type=float, default=0.05, help="coalescing window in seconds")
+    parser.add_argument("--slow-share", type=float, default=0.01, help="fraction of consumers that never read")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
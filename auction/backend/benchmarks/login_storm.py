@@ -0,0 +1,100 @@
+"""/health latency while a burst of logins is hashing passwords.
+
+Boots ``app.main:app`` in process against a temporary database and probes
+``/health`` before and during a login storm. With the hashing executor the
+probe latency should stay flat; ``--executor inline`` shows the event loop
+stalling behind bcrypt.
+
+    python -m benchmarks.login_storm --logins 64 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import percentile, temp_database_url
+
+
+async def probe_health(client, stop: asyncio.Event, interval: float):
+    """Probe on a fixed schedule, timing from when each probe was due.
+
+    Measuring from the scheduled time rather than the actual send time keeps a
+    stalled event loop from hiding its own delay.
+    """
+    latencies = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await client.get("/health")
+        finished = time.perf_counter()
+        latencies.append(finished - due)
+        due = max(due + interval, finished)
+    return latencies
+
+
+async def storm(args) -> None:
+    import httpx
+    from app.main import app
+    from app.db.session import Base, engine
+    from app.services.auth import hash_executor
+
+    Base.metadata.create_all(bind=engine)
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        response = await client.post("/auth/register", json={"username": "storm", "password": "pass"})
+        response.raise_for_status()
+
+        stop = asyncio.Event()
+        idle_probe = asyncio.create_task(probe_health(client, stop, args.interval))
+        await asyncio.sleep(1.0)
+        stop.set()
+        idle = await idle_probe
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/login", data={"username": "storm", "password": "pass"})
+                return response.status_code, time.perf_counter() - started
+
+        stop = asyncio.Event()
+        busy_probe = asyncio.create_task(probe_health(client, stop, args.interval))
+        started = time.perf_counter()
+        results = await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        busy = await busy_probe
+
+    hash_executor.shutdown()
+    logins = [latency for code, latency in results if code == 200]
+    stats = hash_executor.stats()
+
+    print(f"executor: {stats['kind']} x{stats['workers']}")
+    print(f"logins: {len(logins)}/{args.logins} ok in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print(f"login latency ms: p50={percentile(logins, 50) * 1000:.0f} p99={percentile(logins, 99) * 1000:.0f}")
+    for label, samples in (("idle", idle), ("storm", busy)):
+        print(f"/health {label:>5} ms: p50={percentile(samples, 50) * 1000:.2f} "
+              f"p99={percentile(samples, 99) * 1000:.2f} max={max(samples) * 1000:.2f} (n={len(samples)})")
+    print(f"hash wait ms: avg={stats['wait_seconds_avg'] * 1000:.0f} max={stats['wait_seconds_max'] * 1000:.0f} "
+          f"rejected={stats['rejected']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--executor", choices=["thread", "process", "inline"], default="thread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between /health probes")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    os.environ["DATABASE_URL"] = temp_database_url("login_storm")
+    os.environ["PASSWORD_HASH_EXECUTOR"] = args.executor
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["RATE_LIMIT_ENABLED"] = "false"  # one client IP logs in again and again
+    asyncio.run(storm(args))
+
+
+if __name__ == "__main__":
+    main()
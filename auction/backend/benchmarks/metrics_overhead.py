@@ -0,0 +1,73 @@
+"""Per-request cost of the metrics middleware and SQL statement timing.
+
+Boots ``app.main:app`` in process and sends requests one at a time to
+``/health`` (no SQL) and to an item read and its bid list (a few statements
+each), alternating rounds with ``settings.metrics_enabled`` off and on so both
+see the same warm caches and pool. The item cache is disabled so every item
+request reaches the database. Reports the median latency of each endpoint in
+both modes and the difference.
+
+    python -m benchmarks.metrics_overhead --rounds 10 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.common import make_session_factory, seed_active_item, seed_users, temp_database_url
+
+ENDPOINTS = ("/health", "/items/{item_id}", "/bids/item/{item_id}")
+
+
+async def measure(args, item_id: int) -> dict:
+    import httpx
+    from app.core.config import settings
+    from app.main import app
+
+    samples = {(enabled, path): [] for enabled in (False, True) for path in ENDPOINTS}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for round_number in range(args.rounds):
+            # Alternate which mode goes first so neither always runs warmer
+            for enabled in ((False, True) if round_number % 2 == 0 else (True, False)):
+                settings.metrics_enabled = enabled
+                for path in ENDPOINTS:
+                    url = path.format(item_id=item_id)
+                    for _ in range(args.requests):
+                        started = time.perf_counter()
+                        response = await client.get(url)
+                        samples[(enabled, path)].append(time.perf_counter() - started)
+                        response.raise_for_status()
+    settings.metrics_enabled = True
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint, mode and round")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    database_url = temp_database_url("metrics_overhead")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ITEM_CACHE_ENABLED"] = "false"
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+
+    Session = make_session_factory(database_url)
+    db = Session()
+    users = seed_users(db, 2)
+    item_id = seed_active_item(db, users[0])
+    db.close()
+
+    samples = asyncio.run(measure(args, item_id))
+    print(f"{args.rounds} rounds x {args.requests} sequential requests per endpoint and mode")
+    print(f"{'endpoint':<24}{'off us':>10}{'on us':>10}{'overhead us':>13}{'overhead':>10}")
+    for path in ENDPOINTS:
+        off = statistics.median(samples[(False, path)]) * 1e6
+        on = statistics.median(samples[(True, path)]) * 1e6
+        print(f"{path:<24}{off:>10.0f}{on:>10.0f}{on - off:>13.0f}{(on - off) / off:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
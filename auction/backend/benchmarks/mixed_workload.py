@@ -0,0 +1,137 @@
+"""Mixed read/bid throughput with the untuned and the tuned engine.
+
+Threads run a browse-heavy mix against a file database: listing active items,
+reading an item's bids and placing bids on a handful of hot items. The same
+workload runs on a bare ``create_engine`` (rollback journal, default pool) and
+on ``create_db_engine`` (WAL, synchronous=NORMAL, busy timeout, sized pool).
+
+    python -m benchmarks.mixed_workload --threads 32 --seconds 10
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app.models.bid import Bid
+from app.models.item import Item, AuctionStatus
+from app.schemas.bid import BidCreate
+from app.services.bid import BidOutcome, get_item_bids, place_bid
+from app.services.item import get_active_items
+from benchmarks.common import make_session_factory, percentile, seed_users, temp_database_url
+
+
+def seed(Session, items: int, bids_per_item: int) -> list:
+    db = Session()
+    users = seed_users(db, 50)
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Lot {i}",
+            "description": "Benchmark lot",
+            "starting_price": 1.0,
+            "current_price": float(bids_per_item),
+            "seller_id": users[0],
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1),
+            "status": AuctionStatus.ACTIVE,
+        }
+        for i in range(items)
+    ])
+    item_ids = [item_id for (item_id,) in db.query(Item.id)]
+    db.execute(insert(Bid), [
+        {"item_id": item_id, "bidder_id": users[n % len(users)], "amount": float(n + 1), "created_at": now}
+        for item_id in item_ids
+        for n in range(bids_per_item)
+    ])
+    db.commit()
+    db.close()
+    return users, item_ids
+
+
+def run(tuned: bool, args) -> dict:
+    Session = make_session_factory(temp_database_url("mixed"), tuned=tuned)
+    users, item_ids = seed(Session, args.items, args.bids_per_item)
+    hot_items = item_ids[:args.hot_items]
+
+    deadline = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    totals = {"reads": 0, "bids": 0, "accepted": 0, "errors": 0}
+    read_latencies, bid_latencies = [], []
+
+    def worker(index: int):
+        rng = random.Random(index)
+        counts = {"reads": 0, "bids": 0, "accepted": 0, "errors": 0}
+        reads, bids = [], []
+        while time.perf_counter() < deadline:
+            db = Session()
+            started = time.perf_counter()
+            try:
+                if rng.random() < args.bid_ratio:
+                    item_id = rng.choice(hot_items)
+                    amount = args.bids_per_item + (time.perf_counter() - deadline + args.seconds) * 1000
+                    outcome, _ = place_bid(db, BidCreate(item_id=item_id, amount=amount), rng.choice(users))
+                    counts["bids"] += 1
+                    counts["accepted"] += outcome == BidOutcome.ACCEPTED
+                    bids.append(time.perf_counter() - started)
+                elif rng.random() < 0.5:
+                    get_active_items(db, limit=50)
+                    counts["reads"] += 1
+                    reads.append(time.perf_counter() - started)
+                else:
+                    get_item_bids(db, rng.choice(item_ids), limit=50)
+                    counts["reads"] += 1
+                    reads.append(time.perf_counter() - started)
+            except OperationalError:
+                counts["errors"] += 1
+                db.rollback()
+            finally:
+                db.close()
+        with lock:
+            for key, value in counts.items():
+                totals[key] += value
+            read_latencies.extend(reads)
+            bid_latencies.extend(bids)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return {
+        **totals,
+        "ops_per_sec": (totals["reads"] + totals["bids"]) / args.seconds,
+        "read_p99_ms": percentile(read_latencies, 99) * 1000,
+        "bid_p99_ms": percentile(bid_latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--bids-per-item", type=int, default=100)
+    parser.add_argument("--hot-items", type=int, default=5)
+    parser.add_argument("--bid-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    from app.db.session import pool_metrics
+
+    for tuned in (False, True):
+        pool_metrics.reset()
+        result = run(tuned, args)
+        label = "tuned " if tuned else "before"
+        print(f"{label}: {result['ops_per_sec']:.0f} ops/s "
+              f"(reads={result['reads']} bids={result['bids']} accepted={result['accepted']} "
+              f"errors={result['errors']}) read p99={result['read_p99_ms']:.1f}ms "
+              f"bid p99={result['bid_p99_ms']:.1f}ms")
+    print(f"tuned pool checkout wait: {pool_metrics.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-page cost of cursor and offset pagination over one item's bids.
+
+Seeds an item with a million bids, walks every page of ``get_item_bids`` with
+a cursor, and times offset pages at increasing depths for comparison. Cursor
+pages should cost the same at the end as at the start; offset pages grow with
+the number of rows skipped.
+
+    python -m benchmarks.pagination --bids 1000000 --page-size 100
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from statistics import median
+
+from sqlalchemy import insert
+
+from app.models.bid import Bid
+from app.services.bid import ITEM_BIDS_ORDER, get_item_bids
+from benchmarks.common import make_session_factory, seed_active_item, seed_users, temp_database_url
+
+
+def seed_bids(db, item_id: int, bidders: list, count: int, chunk: int = 50_000) -> None:
+    started = datetime.utcnow() - timedelta(hours=1)
+    for offset in range(0, count, chunk):
+        db.execute(insert(Bid), [
+            {
+                "item_id": item_id,
+                "bidder_id": bidders[n % len(bidders)],
+                "amount": 1.0 + n * 0.01,
+                "created_at": started + timedelta(microseconds=n),
+            }
+            for n in range(offset, min(offset + chunk, count))
+        ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--offset-samples", type=int, default=5, help="timed repeats per offset depth")
+    args = parser.parse_args()
+
+    Session = make_session_factory(temp_database_url("pagination"))
+    db = Session()
+    bidders = seed_users(db, 100)
+    item_id = seed_active_item(db, bidders[0])
+    started = time.perf_counter()
+    seed_bids(db, item_id, bidders, args.bids)
+    print(f"seeded {args.bids} bids in {time.perf_counter() - started:.1f}s")
+
+    # Walk every page with a cursor, recording the cost of each
+    page_times, after, seen = [], None, 0
+    while True:
+        started = time.perf_counter()
+        page = get_item_bids(db, item_id, limit=args.page_size, after=after)
+        page_times.append(time.perf_counter() - started)
+        db.expunge_all()
+        seen += len(page)
+        cursor = ITEM_BIDS_ORDER.next_cursor(page, args.page_size)
+        if cursor is None:
+            break
+        after = ITEM_BIDS_ORDER.decode(cursor)
+    if seen != args.bids:
+        raise SystemExit(f"cursor walk returned {seen} bids, expected {args.bids}")
+
+    pages = len(page_times)
+    print(f"\ncursor: walked {pages} pages, {seen} bids, in {sum(page_times):.1f}s")
+    print(f"{'depth':>8} {'rows skipped':>13} {'cursor ms':>10} {'offset ms':>10}")
+    for fraction in (0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.99):
+        index = min(pages - 1, int(pages * fraction))
+        window = page_times[max(0, index - 2):index + 3]
+        skip = index * args.page_size
+        offset_times = []
+        for _ in range(args.offset_samples):
+            started = time.perf_counter()
+            get_item_bids(db, item_id, skip=skip, limit=args.page_size)
+            offset_times.append(time.perf_counter() - started)
+            db.expunge_all()
+        print(f"{fraction:>8.0%} {skip:>13} {median(window) * 1000:>10.2f} {median(offset_times) * 1000:>10.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Authenticated request throughput with the principal cache on and off.
+
+Issues ``GET /users/me`` from concurrent clients against ``app.main:app`` in
+process. With the cache off every request decodes the JWT and loads the user.
+
+    python -m benchmarks.principal_cache --requests 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import percentile, temp_database_url
+
+
+async def measure(client, headers, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get("/users/me", headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "req_per_sec": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run(args) -> None:
+    import httpx
+    from app.main import app
+    from app.core.config import settings
+    from app.db.session import Base, SessionLocal, engine
+    from app.services import create_access_token
+    from app.services.principal import principal_cache
+    from benchmarks.common import seed_users
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed_users(db, 1)
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench0'})}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        results = {}
+        for enabled in (False, True):
+            settings.principal_cache_enabled = enabled
+            principal_cache.clear()
+            await measure(client, headers, min(100, args.requests), args.concurrency)  # warm up
+            results[enabled] = await measure(client, headers, args.requests, args.concurrency)
+
+    for enabled, result in results.items():
+        print(f"cache {'on ' if enabled else 'off'}: {result['req_per_sec']:.0f} req/s "
+              f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+    print(f"speedup: {results[True]['req_per_sec'] / results[False]['req_per_sec']:.2f}x")
+    print(f"cache stats: {principal_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="keep below the connection pool size (5 + 10 overflow)")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = temp_database_url("principal_cache")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""The writes and time proxy bidding saves over an increment war.
+
+``--rivals`` bidders with random maximums fight over a lot twice: once
+by each entering a proxy, once by the increment war proxies replace, each
+outbid rival bidding one increment over the price with ``place_bid`` while
+their maximum allows. Reports the bids each writes and how long each takes.
+Exits non-zero if the lot's counters disagree with its bids, or a proxy
+other than the leader's is left above the price. Correctness under floods
+of entries is covered by ``tests/test_proxy_bids.py``.
+
+    python -m benchmarks.proxy_bids --rivals 20
+"""
+import argparse
+import os
+import random
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks.common import make_session_factory, seed_active_item, seed_users, temp_database_url
+
+START_PRICE = 1.0
+
+
+def fresh_lot(bidders: int):
+    db = make_session_factory(temp_database_url("proxy_bids"))()
+    users = seed_users(db, bidders + 1)
+    return db, users[1:], seed_active_item(db, users[0], starting_price=START_PRICE)
+
+
+def lot_state(db, item_id: int):
+    from app.models.bid import Bid
+    from app.models.item import Item
+    from app.models.proxy_bid import ProxyBid
+
+    item = db.execute(
+        select(Item.current_price, Item.high_bidder_id, Item.bid_count).where(Item.id == item_id)
+    ).one()
+    rows, top = db.execute(
+        select(func.count(Bid.id), func.max(Bid.amount)).where(Bid.item_id == item_id)
+    ).one()
+    if (rows, top) != (item.bid_count, item.current_price if rows else None):
+        raise SystemExit(f"lot shows {item.bid_count} bids up to {item.current_price}, "
+                         f"its bids table {rows} up to {top}")
+    above = db.execute(
+        select(ProxyBid.bidder_id).where(ProxyBid.item_id == item_id,
+                                         ProxyBid.max_amount > item.current_price,
+                                         ProxyBid.bidder_id != item.high_bidder_id)
+    ).all()
+    if above:
+        raise SystemExit(f"{len(above)} proxies other than the leader's are still above the price")
+    return item
+
+
+def contest(maximums: list, proxies: bool) -> tuple:
+    """Rivals with hidden ``maximums`` fight over one lot; returns (final price, bids written, seconds).
+
+    With ``proxies`` each enters a proxy once. Without, they fight the
+    increment war proxies replace: every outbid rival whose maximum allows
+    it bids one increment over the price, until none can.
+    """
+    from app.schemas.bid import BidCreate, ProxyBidCreate
+    from app.services.bid import BidOutcome, bid_increment, place_bid, place_proxy_bid
+
+    db, users, item_id = fresh_lot(len(maximums))
+    started = time.perf_counter()
+    if proxies:
+        for bidder, max_amount in zip(users, maximums):
+            place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=max_amount), bidder)
+    else:
+        price, leader, raised = START_PRICE, None, True
+        while raised:
+            raised = False
+            for bidder, max_amount in zip(users, maximums):
+                amount = round(price + bid_increment(price), 2)
+                if bidder != leader and amount <= max_amount:
+                    outcome, _ = place_bid(db, BidCreate(item_id=item_id, amount=amount), bidder)
+                    if outcome != BidOutcome.ACCEPTED:
+                        raise SystemExit(f"war bid at {amount} was {outcome.value}")
+                    price, leader, raised = amount, bidder, True
+    elapsed = time.perf_counter() - started
+    item = lot_state(db, item_id)
+    db.close()
+    return item.current_price, item.bid_count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rivals", type=int, default=20, help="bidders in the timed contest")
+    parser.add_argument("--ceiling", type=float, default=20000.0, help="highest maximum in the contest")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+
+    rng = random.Random(args.rivals)
+    maximums = [round(rng.uniform(START_PRICE, args.ceiling), 2) for _ in range(args.rivals)]
+    print(f"{args.rivals} rivals with maximums up to {args.ceiling:g}")
+    print(f"{'path':<16}{'final price':>12}{'bids written':>14}{'seconds':>9}")
+    for name, proxies in (("increment war", False), ("proxies", True)):
+        price, bids, elapsed = contest(maximums, proxies)
+        print(f"{name:<16}{price:>12.2f}{bids:>14}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Check every HTTP route against its declared SQL query budget.
+
+Boots ``app.main:app`` in process with ``QUERY_BUDGET_ENABLED=true`` and the
+item and principal caches off, so each request pays for its cache misses.
+Seeds a seller whose lots carry bids from several buyers, so a lazy load in a
+loop would multiply the statement count, then sends one request to every
+route and compares ``X-Query-Count`` with the route's ``X-Query-Budget``.
+Repeated statement shapes are logged as they are seen.
+
+Exits non-zero when a route goes over its budget, a route declares no budget,
+or a request fails, so it can gate changes to the routers, services and
+schemas.
+
+    python -m benchmarks.query_budget
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.common import PASSWORD_HASH, make_session_factory, seed_users, temp_database_url
+
+
+def seed(Session, lots: int) -> dict:
+    from app.models.bid import Bid
+    from app.models.item import Item, AuctionStatus
+    from app.models.user import User, UserRole
+
+    db = Session()
+    buyers = seed_users(db, 5)
+    seller = User(email="seller@example.com", username="seller", hashed_password=PASSWORD_HASH, role=UserRole.SELLER)
+    db.add(seller)
+    db.add(User(email="admin@example.com", username="admin", hashed_password=PASSWORD_HASH, role=UserRole.ADMIN))
+    db.commit()
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Brass lot {n}",
+            "description": "Query budget lot",
+            "starting_price": 1.0,
+            "current_price": 1.0 + len(buyers),
+            "seller_id": seller.id,
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1, minutes=n),
+            "status": AuctionStatus.ACTIVE,
+            "bid_count": len(buyers),
+            "high_bidder_id": buyers[-1],
+            "last_bid_at": now,
+        }
+        for n in range(lots)
+    ])
+    draft = Item(title="Draft lot", starting_price=1.0, current_price=1.0, seller_id=seller.id,
+                 start_time=now + timedelta(hours=1), end_time=now + timedelta(days=2), status=AuctionStatus.DRAFT)
+    db.add(draft)
+    db.commit()
+    item_ids = [item_id for (item_id,) in db.query(Item.id).filter(Item.status == AuctionStatus.ACTIVE)]
+    db.execute(insert(Bid), [
+        {"item_id": item_id, "bidder_id": bidder_id, "amount": 2.0 + n, "created_at": now}
+        for item_id in item_ids
+        for n, bidder_id in enumerate(buyers)
+    ])
+    db.commit()
+    ids = {"seller": seller.id, "buyer": buyers[0], "item": item_ids[0], "draft": draft.id}
+    db.close()
+    return ids
+
+
+def requests(ids: dict) -> list:
+    """(method, path, request kwargs, who is signed in) for one call to every route."""
+    now = datetime.utcnow()
+    new_item = {
+        "title": "New lot",
+        "description": "Listed by the budget check",
+        "starting_price": 5.0,
+        "start_time": (now - timedelta(minutes=1)).isoformat(),
+        "end_time": (now + timedelta(days=1)).isoformat(),
+    }
+    item, draft = ids["item"], ids["draft"]
+    return [
+        ("GET", "/", {}, None),
+        ("GET", "/health", {}, None),
+        ("GET", "/metrics", {}, None),
+        ("POST", "/auth/login", {"data": {"username": "bench0", "password": "pass"}}, None),
+        ("POST", "/auth/register", {"json": {"username": "newcomer", "password": "pass"}}, None),
+        ("POST", "/users/", {"json": {"email": "other@example.com", "username": "other", "password": "pass"}}, None),
+        ("GET", "/users/me", {}, "buyer"),
+        ("PUT", "/users/me", {"json": {"full_name": "Bench Buyer"}}, "buyer"),
+        ("GET", f"/users/{ids['seller']}", {}, "buyer"),
+        ("GET", "/items/", {}, None),
+        ("GET", "/items/", {"params": {"active_only": "true"}}, None),
+        ("GET", "/items/search", {"params": {"q": "brass"}}, None),
+        ("GET", f"/items/{item}", {}, None),
+        ("GET", f"/items/{item}/details", {}, None),
+        # A stale validator: the version probe, then the full read
+        ("GET", f"/items/{item}", {"headers": {"If-None-Match": '"stale"'}}, None),
+        ("POST", "/items/", {"json": new_item}, "seller"),
+        ("POST", "/items/bulk", {
+            "params": {"activate": "true"},
+            "content": "\n".join([json.dumps(new_item), "{not json", json.dumps({**new_item, "title": "Second lot"})]),
+            "headers": {"Content-Type": "application/x-ndjson"},
+        }, "seller"),
+        ("PUT", f"/items/{draft}", {"json": {"description": "Edited"}}, "seller"),
+        ("POST", f"/items/{draft}/activate", {}, "seller"),
+        ("GET", "/items/user/me", {}, "seller"),
+        ("GET", f"/bids/item/{item}", {}, None),
+        ("GET", f"/bids/item/{item}", {"headers": {"If-None-Match": '"stale"'}}, None),
+        ("POST", "/bids/", {"json": {"item_id": item, "amount": 1000.0}}, "buyer"),
+        ("POST", "/bids/batch", {"json": [
+            {"item_id": item, "amount": 2000.0, "client_ref": "raise"},
+            {"item_id": item, "amount": 1500.0, "client_ref": "too low"},
+            {"item_id": ids["item"] + 1, "amount": 2000.0, "client_ref": "other lot"},
+            {"item_id": 10 ** 9, "amount": 5.0, "client_ref": "missing"},
+        ]}, "buyer"),
+        # A proxy over the buyer's lead, then the buyer's bid it answers
+        ("POST", "/bids/proxy", {"json": {"item_id": item, "max_amount": 5000.0}}, "admin"),
+        ("POST", "/bids/", {"json": {"item_id": item, "amount": 3000.0}}, "buyer"),
+        ("GET", "/bids/user/me", {}, "buyer"),
+        ("GET", "/sse/items/0", {}, None),  # the 404 path; the stream itself never ends
+        ("GET", "/admin/slow-queries", {}, "admin"),
+        ("DELETE", "/admin/slow-queries", {}, "admin"),
+    ]
+
+
+async def check(ids: dict) -> list:
+    import httpx
+    from app.main import app
+    from app.core.query_budget import QUERY_BUDGET_HEADER, QUERY_COUNT_HEADER
+    from app.services import create_access_token
+
+    tokens = {
+        "buyer": create_access_token({"sub": "bench0"}),
+        "seller": create_access_token({"sub": "seller"}),
+        "admin": create_access_token({"sub": "admin"}),
+    }
+    results = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for method, path, kwargs, who in requests(ids):
+                headers = dict(kwargs.pop("headers", {}))
+                if who:
+                    headers["Authorization"] = f"Bearer {tokens[who]}"
+                response = await client.request(method, path, headers=headers, **kwargs)
+                budget = response.headers.get(QUERY_BUDGET_HEADER)
+                results.append((
+                    f"{method} {path}",
+                    response.status_code,
+                    int(response.headers[QUERY_COUNT_HEADER]),
+                    int(budget) if budget is not None else None,
+                ))
+    return results
+
+
+def routes_without_budget() -> list:
+    from fastapi.routing import APIRoute
+    from app.core.query_budget import route_budget
+    from app.main import app
+
+    return [f"{','.join(sorted(route.methods))} {route.path}" for route in app.routes
+            if isinstance(route, APIRoute) and route_budget(route) is None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, default=25, help="active lots the seller lists, each with bids")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    database_url = temp_database_url("query_budget")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["QUERY_BUDGET_ENABLED"] = "true"
+    os.environ["ITEM_CACHE_ENABLED"] = "false"
+    os.environ["PRINCIPAL_CACHE_ENABLED"] = "false"
+    os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    ids = seed(make_session_factory(database_url), args.lots)
+    results = asyncio.run(check(ids))
+
+    failures = []
+    print(f"{'request':<36}{'status':>7}{'queries':>9}{'budget':>8}")
+    for request, status, count, budget in results:
+        problem = ""
+        if status >= 500:
+            problem = "failed"
+        elif budget is None:
+            problem = "no budget"
+        elif count > budget:
+            problem = "OVER BUDGET"
+        if problem:
+            failures.append(request)
+        print(f"{request:<36}{status:>7}{count:>9}{budget if budget is not None else '-':>8}  {problem}")
+
+    missing = routes_without_budget()
+    for route in missing:
+        print(f"route declares no query budget: {route}")
+    if failures or missing:
+        raise SystemExit(f"{len(failures)} request(s) failed the query budget check, "
+                         f"{len(missing)} route(s) without a budget")
+
+
+if __name__ == "__main__":
+    main()
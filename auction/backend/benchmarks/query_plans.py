@@ -0,0 +1,134 @@
+"""Check that the service queries use indexes instead of scanning tables.
+
+Migrates a fresh SQLite database with Alembic, runs each service function while
+recording the statements it sends, and prints ``EXPLAIN QUERY PLAN`` for each.
+Exits non-zero if any plan scans a whole table or sorts through a temporary
+B-tree, so it can gate changes to the queries, models or migrations.
+``tests/test_query_plans.py`` runs the same checks under pytest.
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --revision 0001   # before the indexes
+"""
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import create_db_engine
+from app.schemas.bid import BidCreate, ProxyBidCreate
+from app.services import bid as bid_service
+from app.services import item as item_service
+from app.services import user as user_service
+from benchmarks.common import seed_active_item, seed_users, temp_database_url
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# "SCAN bids" is a full table scan; "SCAN bids USING INDEX ..." walks an index.
+FULL_SCAN = re.compile(r"^SCAN \w+( AS \w+)?$")
+TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR ")
+
+
+def service_calls(user_id: int, item_id: int, rival_id: int) -> List[Tuple[str, Callable]]:
+    now = datetime.utcnow()
+    return [
+        ("get_user_by_username", lambda db: user_service.get_user_by_username(db, "bench0")),
+        ("get_user_by_email", lambda db: user_service.get_user_by_email(db, "bench0@example.com")),
+        ("get_item_by_id", lambda db: item_service.get_item_by_id(db, item_id)),
+        ("get_items (cursor)", lambda db: item_service.get_items(db, after=(item_id,))),
+        ("get_active_items", lambda db: item_service.get_active_items(db)),
+        ("get_active_items (cursor)", lambda db: item_service.get_active_items(db, after=(now, item_id))),
+        ("get_user_items", lambda db: item_service.get_user_items(db, user_id)),
+        ("get_user_items (cursor)", lambda db: item_service.get_user_items(db, user_id, after=(item_id,))),
+        ("get_item_with_bid_count", lambda db: item_service.get_item_with_bid_count(db, item_id)),
+        ("end_expired_auctions", item_service.end_expired_auctions),
+        ("get_bid_by_id", lambda db: bid_service.get_bid_by_id(db, 1)),
+        ("get_item_bids", lambda db: bid_service.get_item_bids(db, item_id)),
+        ("get_item_bids (cursor)", lambda db: bid_service.get_item_bids(db, item_id, after=(5.0, 1))),
+        ("get_user_bids", lambda db: bid_service.get_user_bids(db, user_id)),
+        ("get_user_bids (cursor)", lambda db: bid_service.get_user_bids(db, user_id, after=(now, 1))),
+        ("get_highest_bid_for_item", lambda db: bid_service.get_highest_bid_for_item(db, item_id)),
+        ("place_bid", lambda db: bid_service.place_bid(db, BidCreate(item_id=item_id, amount=1e9), user_id)),
+        ("place_bid (rejected)", lambda db: bid_service.place_bid(db, BidCreate(item_id=item_id, amount=0.5), user_id)),
+        ("place_proxy_bid", lambda db: bid_service.place_proxy_bid(
+            db, ProxyBidCreate(item_id=item_id, max_amount=2e9), rival_id)),
+        ("place_bid (answered by a proxy)", lambda db: bid_service.place_bid(
+            db, BidCreate(item_id=item_id, amount=1.5e9), user_id)),
+    ]
+
+
+def migrated_database(revision: str = "head"):
+    """A fresh database migrated to ``revision`` and seeded with one lot and its bids.
+
+    Returns the engine, a session factory, and ``service_calls`` for the seeded rows.
+    """
+    database_url = temp_database_url("plans")
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.upgrade(config, revision)
+
+    engine = create_db_engine(database_url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        users = seed_users(db, 10)
+        item_id = seed_active_item(db, users[0])
+        for user_id in users[1:]:
+            bid_service.place_bid(db, BidCreate(item_id=item_id, amount=float(user_id)), user_id)
+    return engine, Session, service_calls(users[1], item_id, users[2])
+
+
+def query_plans(engine, Session, call: Callable) -> List[Tuple[str, bool]]:
+    """Run ``call`` on a session; returns the plan lines of the statements it sent,
+    each with whether it scans a whole table or sorts through a temporary B-tree."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session() as db:
+            call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    lines = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all():
+                detail = row[-1]
+                lines.append((detail, bool(FULL_SCAN.match(detail) or TEMP_SORT.match(detail))))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revision", default="head", help="Alembic revision to migrate to")
+    args = parser.parse_args()
+
+    engine, Session, calls = migrated_database(args.revision)
+    failures = []
+    for name, call in calls:
+        print(f"== {name}")
+        for detail, bad in query_plans(engine, Session, call):
+            print(f"   {'!!' if bad else '  '} {detail}")
+            if bad:
+                failures.append(f"{name}: {detail}")
+
+    if failures:
+        print(f"\n{len(failures)} plan regression(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll service queries use an index.")
+
+
+if __name__ == "__main__":
+    main()
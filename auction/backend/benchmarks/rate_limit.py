@@ -0,0 +1,167 @@
+"""Cost and behaviour of the token-bucket rate limits.
+
+First checks the buckets. With the refill arithmetic on a made-up clock a
+burst gets exactly its capacity, and a token is back after the wait it was
+told. Then two Redis stores, standing in for two workers, share one bucket
+on a local ``fakeredis`` server (or ``--redis-url``), so together they
+accept only its capacity.
+
+Then measures the cost. It times a bare ``take`` on each store. It also
+times requests to a bare FastAPI app through ``httpx``: a bid-shaped
+``POST`` route with its user plain or from ``rate_limited_user``, keyed by
+user, IP and item, with limits too high to refuse anything. Requests to the
+two routes are interleaved, and the overhead is the median difference of
+each pair, so a machine slowing down mid-run does not move it. Exits
+non-zero if a check fails or the in-process limiter adds ``--budget-us``
+(35) or more per request, well under the 50 it is meant to stay below.
+
+    python -m benchmarks.rate_limit --rounds 10 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import threading
+import time
+
+from benchmarks.common import temp_database_url
+
+BURST = 5
+RATE = 2.0  # tokens per second
+
+
+def check_buckets() -> None:
+    from app.core.rate_limit import take_token
+
+    state, now, accepted = None, 100.0, 0
+    for _ in range(BURST + 3):
+        state, wait = take_token(state, now, BURST, RATE)
+        accepted += wait == 0
+    if accepted != BURST or wait <= 0:
+        raise SystemExit(f"a burst of {BURST + 3} got {accepted} tokens from a bucket of {BURST}")
+    if take_token(state, now + wait * 0.9, BURST, RATE)[1] == 0:
+        raise SystemExit("a token was back before the wait the bucket gave")
+    if take_token(state, now + wait, BURST, RATE)[1] != 0:
+        raise SystemExit("no token was back after the wait the bucket gave")
+    print(f"buckets: a burst of {BURST + 3} took {BURST} tokens, the next one {wait:.2f}s later")
+
+
+def start_fake_redis() -> str:
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.daemon_threads = True
+    # Redis answers without Nagle's delay; without this a transaction's replies
+    # wait out the client's delayed ACK, some 40ms each
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0"
+
+
+def check_shared(url: str) -> list:
+    """Two stores on one server act as one bucket; returns both for timing."""
+    from app.core.rate_limit import RedisBucketStore
+
+    workers = [RedisBucketStore(url) for _ in range(2)]
+    workers[0].clear()
+    accepted = sum(workers[n % 2].take([("check", BURST, RATE)]) is None for n in range(BURST * 2))
+    if accepted != BURST:
+        raise SystemExit(f"two workers sharing a bucket of {BURST} accepted {accepted}")
+    print(f"shared: two workers sharing a bucket of {BURST} accepted {accepted} of {BURST * 2}")
+    return workers
+
+
+def store_cost(store, calls: int) -> float:
+    """Median microseconds per ``take`` over distinct keys, so nothing is refused."""
+    samples = []
+    for n in range(calls):
+        started = time.perf_counter()
+        store.take([(f"cost:{n % 1000}", 1e9, 1e9)])
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from app.core.config import settings
+    from app.core.rate_limit import rate_limited_user
+    from app.schemas.bid import BidCreate
+
+    class Bidder:
+        id = 1
+
+    async def current_user():
+        return Bidder()
+
+    # High enough that nothing is refused: this measures the checks, not the 429s
+    settings.rate_limit_bids = "user:1e9/1,ip:1e9/1,item:1e9/1"
+    app = FastAPI()
+
+    @app.post("/plain")
+    async def plain(bid: BidCreate, user=Depends(current_user)):
+        return {"item_id": bid.item_id}
+
+    @app.post("/limited")
+    async def limited(bid: BidCreate, user=rate_limited_user("bids", current_user)):
+        return {"item_id": bid.item_id}
+
+    return app
+
+
+async def request_cost(args) -> list:
+    """Per round: median microseconds per request to each route, and of the difference."""
+    import httpx
+
+    rounds = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://bench") as client:
+        for _ in range(args.rounds):
+            samples = {"/plain": [], "/limited": []}
+            for n in range(args.requests):
+                # Each request to one route is paired with one to the other, in
+                # alternating order, so drift in the machine's speed hits both
+                paths = ("/plain", "/limited") if n % 2 == 0 else ("/limited", "/plain")
+                for path in paths:
+                    started = time.perf_counter()
+                    response = await client.post(path, json={"item_id": n % 100, "amount": 1.0})
+                    samples[path].append(time.perf_counter() - started)
+                    response.raise_for_status()
+            costs = {path: statistics.median(values) * 1e6 for path, values in samples.items()}
+            costs["overhead"] = statistics.median(map(float.__sub__, samples["/limited"], samples["/plain"])) * 1e6
+            rounds.append(costs)
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route and round")
+    parser.add_argument("--redis-url", help="use this server instead of a local fakeredis")
+    parser.add_argument("--budget-us", type=float, default=35.0, help="most the limiter may add per request")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them before importing the app.
+    os.environ["DATABASE_URL"] = temp_database_url("rate_limit")
+    from app.core.rate_limit import MemoryBucketStore
+
+    check_buckets()
+    shared = check_shared(args.redis_url or start_fake_redis())
+
+    print(f"{'store':<16}{'us/take':>9}")
+    print(f"{'memory':<16}{store_cost(MemoryBucketStore(), 100000):>9.2f}")
+    print(f"{'redis':<16}{store_cost(shared[0], 2000):>9.0f}")
+
+    rounds = asyncio.run(request_cost(args))
+    overhead = statistics.median(costs["overhead"] for costs in rounds)
+    print(f"{args.rounds} rounds x {args.requests} sequential requests per route")
+    print(f"{'route':<16}{'median us':>10}")
+    for path in ("/plain", "/limited"):
+        print(f"{path:<16}{statistics.median(costs[path] for costs in rounds):>10.1f}")
+    print(f"rate limit overhead: {overhead:.1f} us per request (user, ip and item buckets)")
+    if overhead >= args.budget_us:
+        raise SystemExit(f"the rate limit adds {overhead:.1f} us per request, over {args.budget_us:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Full-text item search latency over a large catalog.
+
+Builds a catalog with ``add_sample_data.add_catalog_items`` (1M items by
+default), then times ``search_items`` for common, rare, multi-word and prefix
+queries, with and without price and status filters, on the first page and
+after following cursors. A ``LIKE '%term%'`` scan over the same table, the
+closest thing to search without the index, is timed for comparison on a
+term that matches nothing. Fails if
+paging through a query repeats an item.
+
+    python -m benchmarks.search --items 1000000 --repeat 50
+"""
+import argparse
+import time
+
+from sqlalchemy import or_
+
+from add_sample_data import add_catalog_items
+from app.models.item import Item, AuctionStatus
+from app.services.item import SEARCH_ORDER, search_items
+from benchmarks.common import make_session_factory, percentile, seed_users, temp_database_url
+
+QUERIES = [
+    ("common word", "watch", {}),
+    ("two words", "brass compass", {}),
+    ("prefix", "tele*", {}),
+    ("rare phrase", "museum quality typewriter", {}),
+    ("price range", "vintage lamp", {"min_price": 50, "max_price": 150}),
+    ("active only", "oak desk", {"status": AuctionStatus.ACTIVE}),
+    ("no match", "spaceship", {}),
+]
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10, help="cursor pages to follow for the deep-page timing")
+    args = parser.parse_args()
+
+    Session = make_session_factory(temp_database_url("search"))
+    db = Session()
+    sellers = seed_users(db, 100)
+    started = time.perf_counter()
+    add_catalog_items(db, args.items, sellers)
+    print(f"indexed {args.items} items in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'query':<14}{'first page p50/p99 ms':>24}{'page ' + str(args.pages) + ' p50 ms':>16}{'hits':>7}")
+    for name, text, filters in QUERIES:
+        first = timed(lambda: search_items(db, text, limit=args.limit, **filters), args.repeat)
+        results = search_items(db, text, limit=args.limit, **filters)
+
+        # Follow cursors, checking that pages never overlap
+        seen, after = set(), None
+        for _ in range(args.pages):
+            page = search_items(db, text, limit=args.limit, after=after, **filters)
+            ids = {row.id for row in page}
+            if seen & ids:
+                raise SystemExit(f"{name}: cursor pages repeated items {sorted(seen & ids)[:5]}")
+            seen |= ids
+            if len(page) < args.limit:
+                break
+            after = SEARCH_ORDER.decode(SEARCH_ORDER.next_cursor(page, args.limit))
+        deep = timed(lambda: search_items(db, text, limit=args.limit, after=after, **filters),
+                     max(1, args.repeat // 5))
+        print(f"{name:<14}{percentile(first, 50) * 1000:>15.2f} /{percentile(first, 99) * 1000:>8.2f}"
+              f"{percentile(deep, 50) * 1000:>16.2f}{len(results):>7}")
+
+    # A LIKE filter has to read every row before it can say there is no match
+    scan = timed(lambda: db.query(Item).filter(
+        or_(Item.title.ilike("%spaceship%"), Item.description.ilike("%spaceship%"))
+    ).limit(args.limit).all(), max(1, args.repeat // 10))
+    print(f"LIKE scan for 'spaceship' (no index): p50={percentile(scan, 50) * 1000:.1f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
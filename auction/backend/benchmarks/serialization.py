@@ -0,0 +1,141 @@
+"""Per-page cost of building list responses: ORM objects and validation vs rows.
+
+Times one page of each listing two ways:
+
+* ``orm``: query whole ORM objects, then serialize them as a route with a
+  ``response_model`` does (``fastapi.routing.serialize_response``, which
+  validates every row into the schema, then ``JSONResponse``);
+* ``rows``: the services' column-projected queries, row dicts, and
+  ``ORJSONResponse``, as the list endpoints now do.
+
+Query and serialization time are reported separately, as medians per page.
+Exits non-zero if the two paths produce different JSON for the same page.
+
+    python -m benchmarks.serialization --page-size 100 --repeats 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from statistics import median
+from typing import List
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory, seed_active_item, seed_users, temp_database_url
+
+
+def seed(db, items: int, bids: int) -> int:
+    from app.models.bid import Bid
+    from app.models.item import Item, AuctionStatus
+
+    users = seed_users(db, 20)
+    now = datetime.utcnow()
+    db.execute(insert(Item), [
+        {
+            "title": f"Serialization lot {n}",
+            "description": "A lot with a description of ordinary length for a listing page.",
+            "starting_price": 1.0,
+            "current_price": 1.0 + n,
+            "seller_id": users[0],
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(days=1, minutes=n),
+            "status": AuctionStatus.ACTIVE,
+            "bid_count": n % 7,
+            "last_bid_at": now,
+        }
+        for n in range(items)
+    ])
+    item_id = seed_active_item(db, users[0])
+    db.execute(insert(Bid), [
+        {"item_id": item_id, "bidder_id": users[n % len(users)], "amount": 2.0 + n, "created_at": now}
+        for n in range(bids)
+    ])
+    db.commit()
+    return item_id
+
+
+def listings(item_id: int, page_size: int) -> list:
+    """(name, ORM query, projected service call, response schema) for each listing."""
+    from app.models.bid import Bid
+    from app.models.item import Item, AuctionStatus
+    from app.schemas.bid import Bid as BidSchema
+    from app.schemas.item import ItemWithBids
+    from app.services import bid as bid_service
+    from app.services import item as item_service
+
+    return [
+        ("items", lambda db: item_service.ITEMS_ORDER.paginate(db.query(Item), limit=page_size).all(),
+         lambda db: item_service.get_items(db, limit=page_size), List[ItemWithBids]),
+        ("active items",
+         lambda db: item_service.ACTIVE_ITEMS_ORDER.paginate(
+             db.query(Item).filter(Item.status == AuctionStatus.ACTIVE), limit=page_size).all(),
+         lambda db: item_service.get_active_items(db, limit=page_size), List[ItemWithBids]),
+        ("item bids",
+         lambda db: bid_service.ITEM_BIDS_ORDER.paginate(
+             db.query(Bid).filter(Bid.item_id == item_id), limit=page_size).all(),
+         lambda db: bid_service.get_item_bids(db, item_id, limit=page_size), List[BidSchema]),
+    ]
+
+
+async def measure(Session, args, item_id: int) -> list:
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    results = []
+    db = Session()
+    for name, orm_query, row_query, schema in listings(item_id, args.page_size):
+        field = create_response_field(name="response_model", type_=schema)
+        timings = {"orm": ([], []), "rows": ([], [])}
+        bodies = {}
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            objects = orm_query(db)
+            queried = time.perf_counter()
+            content = await serialize_response(field=field, response_content=objects)
+            bodies["orm"] = JSONResponse(content).body
+            timings["orm"][0].append(queried - started)
+            timings["orm"][1].append(time.perf_counter() - queried)
+            db.expunge_all()
+
+            started = time.perf_counter()
+            rows = [row._asdict() for row in row_query(db)]
+            queried = time.perf_counter()
+            bodies["rows"] = ORJSONResponse(rows).body
+            timings["rows"][0].append(queried - started)
+            timings["rows"][1].append(time.perf_counter() - queried)
+
+        if json.loads(bodies["orm"]) != json.loads(bodies["rows"]):
+            raise SystemExit(f"{name}: the two paths produced different JSON")
+        for path, (query_times, serialize_times) in timings.items():
+            results.append((name, path, len(json.loads(bodies[path])), len(bodies[path]),
+                            median(query_times), median(serialize_times)))
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--bids", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=200, help="timed pages per listing and path")
+    args = parser.parse_args()
+
+    Session = make_session_factory(temp_database_url("serialization"))
+    db = Session()
+    item_id = seed(db, args.items, args.bids)
+    db.close()
+
+    results = asyncio.run(measure(Session, args, item_id))
+    print(f"median per page over {args.repeats} pages")
+    print(f"{'listing':<14}{'path':<6}{'rows':>6}{'bytes':>8}{'query ms':>10}{'serialize ms':>14}{'total ms':>10}")
+    for name, path, rows, size, query, serialize in results:
+        print(f"{name:<14}{path:<6}{rows:>6}{size:>8}{query * 1000:>10.2f}{serialize * 1000:>14.2f}"
+              f"{(query + serialize) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
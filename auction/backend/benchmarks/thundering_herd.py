@@ -0,0 +1,100 @@
+"""A herd of identical reads when a popular auction goes live.
+
+Each round fires ``--herd`` concurrent requests at the same item's details and
+bid list (the ``aio`` calls behind ``/items/{id}/details`` and
+``/bids/item/{id}``), with single-flight off and then on, and counts the SQL
+statements that actually reached the database. The item cache is disabled so
+every request would otherwise query.
+
+    python -m benchmarks.thundering_herd --herd 500 --rounds 10 --bids 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from app.core.config import settings
+from app.models.bid import Bid
+from app.services import aio
+from benchmarks.common import make_session_factory, percentile, seed_active_item, seed_users, temp_database_url
+
+
+def seed(Session, bids: int) -> int:
+    db = Session()
+    users = seed_users(db, 100)
+    item_id = seed_active_item(db, users[0])
+    now = datetime.utcnow()
+    db.execute(insert(Bid), [
+        {"item_id": item_id, "bidder_id": users[n % len(users)], "amount": float(n + 2),
+         "created_at": now - timedelta(seconds=bids - n)}
+        for n in range(bids)
+    ])
+    db.commit()
+    db.close()
+    return item_id
+
+
+async def herd(Session, item_id: int, size: int, latencies: list) -> None:
+    async def request(n: int):
+        db = Session()
+        started = time.perf_counter()
+        if n % 2:
+            await aio.get_item_with_bid_count(db, item_id)
+        else:
+            await aio.get_item_bids(db, item_id, limit=100)
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(request(n) for n in range(size)))
+
+
+def run(enabled: bool, Session, item_id: int, args, statements: list) -> dict:
+    settings.single_flight_enabled = enabled
+    aio.read_flights.reset_stats()
+    statements[0] = 0
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        asyncio.run(herd(Session, item_id, args.herd, latencies))
+    elapsed = time.perf_counter() - started
+    return {
+        "statements": statements[0],
+        "seconds": elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        **aio.read_flights.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--herd", type=int, default=500, help="concurrent requests per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--bids", type=int, default=20_000, help="bids on the popular item")
+    args = parser.parse_args()
+
+    settings.item_cache_enabled = False
+    Session = make_session_factory(temp_database_url("herd"))
+    item_id = seed(Session, args.bids)
+
+    statements = [0]
+
+    @event.listens_for(Session.kw["bind"], "before_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+
+    requests = args.herd * args.rounds
+    print(f"{args.rounds} rounds of {args.herd} concurrent reads of one item with {args.bids} bids")
+    results = {"off": run(False, Session, item_id, args, statements),
+               "on": run(True, Session, item_id, args, statements)}
+    for mode, r in results.items():
+        print(f"single-flight {mode:<3}: {r['statements']:>6} statements for {requests} requests, "
+              f"{requests / r['seconds']:.0f} req/s, p50={r['p50_ms']:.1f}ms p99={r['p99_ms']:.1f}ms, "
+              f"collapsed {r['collapsed']} ({r['collapse_ratio']:.1%}), {r['timeouts']} timed out")
+    if results["on"]["statements"] >= results["off"]["statements"]:
+        raise SystemExit("single-flight did not reduce the number of queries")
+
+
+if __name__ == "__main__":
+    main()
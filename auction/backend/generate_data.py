@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Generate a large synthetic dataset for load testing.
+
+Rows are built in chunks and written with Core ``executemany`` inserts, all
+users share one precomputed password hash, and the same ``--seed`` always
+produces the same rows (timestamps are relative to the start of the run).
+Bids follow power laws: a few items draw most of the bids and a few bidders
+place most of them. Item prices and bid counters match the generated bids.
+
+    python generate_data.py --users 100000 --items 500000 --bids 10000000
+    python generate_data.py --database-url sqlite:///./load.db --bids 100000000
+"""
+
+import argparse
+import os
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, insert, select
+
+from add_sample_data import CONDITIONS, ERAS, MATERIALS, OBJECTS
+from app.core.config import settings
+from app.db.session import create_db_engine
+from app.models.bid import Bid
+from app.models.item import Item, AuctionStatus
+from app.models.user import User, UserRole
+from app.services.auth import get_password_hash
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# Share of generated items in each state; drafts get no bids
+STATUS_WEIGHTS = ((AuctionStatus.ACTIVE, 0.6), (AuctionStatus.ENDED, 0.3), (AuctionStatus.DRAFT, 0.1))
+STATUS_CODES = {status: code for code, (status, _) in enumerate(STATUS_WEIGHTS)}
+
+
+class Progress:
+    """Rows-per-second reporting for one table."""
+
+    def __init__(self, table: str, total: int):
+        self.table = table
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def add(self, rows: int) -> None:
+        self.done += rows
+        now = time.perf_counter()
+        if now - self._last_report >= 5:
+            self._last_report = now
+            print(f"  {self.table}: {self.done:,}/{self.total:,} ({self.rate():,.0f} rows/s)", flush=True)
+
+    def rate(self) -> float:
+        return self.done / max(time.perf_counter() - self.started, 1e-9)
+
+    def finish(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.table}: {self.done:,} rows in {elapsed:.1f}s ({self.rate():,.0f} rows/s)", flush=True)
+        return elapsed
+
+
+def migrate(database_url: str) -> None:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.upgrade(config, "head")
+
+
+def seller_interval(seller_share: float) -> int:
+    """Every n-th user is a seller; user 1 always is, so items have a seller."""
+    return max(1, round(1 / seller_share)) if seller_share > 0 else 0
+
+
+def generate_users(conn, count: int, password: str, chunk_size: int, seller_share: float) -> None:
+    hashed_password = get_password_hash(password)
+    progress = Progress("users", count)
+    seller_every = seller_interval(seller_share)
+    for offset in range(0, count, chunk_size):
+        conn.execute(insert(User), [
+            {
+                "id": n + 1,
+                "email": f"user{n}@example.com",
+                "username": f"user{n}",
+                "hashed_password": hashed_password,
+                "role": UserRole.SELLER if seller_every and n % seller_every == 0 else UserRole.BUYER,
+            }
+            for n in range(offset, min(offset + chunk_size, count))
+        ])
+        progress.add(min(chunk_size, count - offset))
+    progress.finish()
+
+
+def plan_bids(rng: random.Random, items: int, bids: int, alpha: float):
+    """Pick each item's status and bid count; counts follow a Pareto tail."""
+    statuses = bytearray(rng.choices(
+        [STATUS_CODES[status] for status, _ in STATUS_WEIGHTS],
+        [weight for _, weight in STATUS_WEIGHTS],
+        k=items,
+    ))
+    draft = STATUS_CODES[AuctionStatus.DRAFT]
+    weights = array("d", (0.0 if code == draft else rng.paretovariate(alpha) for code in statuses))
+    scale = bids / (sum(weights) or 1.0)
+    counts = array("l", bytes(8 * items))
+    for n, weight in enumerate(weights):
+        share = weight * scale
+        whole = int(share)
+        counts[n] = whole + (rng.random() < share - whole)  # rounds to the target on average
+    return statuses, counts
+
+
+def generate_items_and_bids(conn, rng: random.Random, items: int, bids: int, users: int,
+                            chunk_size: int, alpha: float, bidder_skew: float, seller_share: float) -> None:
+    statuses, counts = plan_bids(rng, items, bids, alpha)
+    total_bids = sum(counts)
+    sellers = list(range(1, users + 1, seller_interval(seller_share) or users))
+    now = datetime.utcnow().replace(microsecond=0)
+    status_of = [status for status, _ in STATUS_WEIGHTS]
+
+    item_progress = Progress("items", items)
+    bid_progress = Progress("bids", total_bids)
+    item_rows, bid_rows = [], []
+
+    def flush():
+        # Items first, so bids never reference a row that is not there yet
+        if item_rows:
+            conn.execute(insert(Item), item_rows)
+            item_progress.add(len(item_rows))
+            item_rows.clear()
+        if bid_rows:
+            conn.execute(insert(Bid), bid_rows)
+            bid_progress.add(len(bid_rows))
+            bid_rows.clear()
+
+    bid_id = 0
+    for n in range(items):
+        status = status_of[statuses[n]]
+        if status == AuctionStatus.DRAFT:
+            start = now + timedelta(hours=rng.uniform(1, 72))
+        elif status == AuctionStatus.ACTIVE:
+            start = now - timedelta(hours=rng.uniform(1, 72))
+        else:
+            start = now - timedelta(days=rng.uniform(8, 30))
+        end = start + timedelta(days=rng.choice((1, 3, 5, 7)))
+        era, material, thing = rng.choice(ERAS), rng.choice(MATERIALS), rng.choice(OBJECTS)
+        starting_price = round(rng.lognormvariate(4, 1.2), 2)
+        item_id = n + 1
+
+        # The item's bids, rising in price and spread over its open window
+        price, leader, last_at = starting_price, None, None
+        count = counts[n]
+        if count:
+            step = (min(end, now) - start).total_seconds() / (count + 1)
+            for k in range(count):
+                price = round(price + max(1.0, starting_price * rng.uniform(0.01, 0.1)), 2)
+                leader = int(users * rng.random() ** bidder_skew) + 1
+                last_at = start + timedelta(seconds=step * (k + 1))
+                bid_id += 1
+                bid_rows.append({
+                    "id": bid_id,
+                    "item_id": item_id,
+                    "bidder_id": leader,
+                    "amount": price,
+                    "created_at": last_at,
+                })
+
+        item_rows.append({
+            "id": item_id,
+            "title": f"{era} {material} {thing} #{n}",
+            "description": f"{era} {thing.lower()} in {material.lower()}, {rng.choice(CONDITIONS)}.",
+            "starting_price": starting_price,
+            "current_price": price,
+            "seller_id": rng.choice(sellers),
+            "start_time": start,
+            "end_time": end,
+            "status": status,
+            "bid_count": count,
+            "high_bidder_id": leader,
+            "last_bid_at": last_at,
+        })
+        if len(item_rows) >= chunk_size or len(bid_rows) >= chunk_size:
+            flush()
+
+    flush()
+    item_progress.finish()
+    bid_progress.finish()
+
+
+def generate(database_url: str, users: int, items: int, bids: int, seed: int = 0,
+             chunk_size: int = 50_000, alpha: float = 1.2, bidder_skew: float = 3.0,
+             password: str = "pass", seller_share: float = 0.1) -> None:
+    """Build the dataset in an empty database at ``database_url``."""
+    migrate(database_url)
+    engine = create_db_engine(database_url)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if conn.execute(select(func.count(User.id))).scalar():
+            raise SystemExit(f"{database_url} already has users; generate into an empty database")
+        if conn.dialect.name == "sqlite":
+            # A crash mid-load leaves a partial dataset either way; skip the fsyncs
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        generate_users(conn, users, password, chunk_size, seller_share)
+        generate_items_and_bids(conn, rng, items, bids, users, chunk_size, alpha, bidder_skew, seller_share)
+    engine.dispose()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--bids", type=int, default=1_000_000, help="target bid count (met on average)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--alpha", type=float, default=1.2,
+                        help="Pareto shape of bids per item; lower is more skewed")
+    parser.add_argument("--bidder-skew", type=float, default=3.0,
+                        help="exponent concentrating bids on the lowest user ids; 1 is uniform")
+    parser.add_argument("--password", default="pass", help="password of every generated user")
+    parser.add_argument("--seller-share", type=float, default=0.1, help="share of users who are sellers")
+    args = parser.parse_args()
+
+    generate(args.database_url, args.users, args.items, args.bids, seed=args.seed,
+             chunk_size=args.chunk_size, alpha=args.alpha, bidder_skew=args.bidder_skew,
+             password=args.password, seller_share=args.seller_share)
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 """Database initialization script."""
 
-from app.db.session import engine, Base
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.db.session import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# Revision matching the tables the app created before migrations existed
+BASELINE_REVISION = "0001"
+
 
 def init_db():
-    """Create all database tables."""
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade the database tables through the Alembic migrations."""
+    config = Config(ALEMBIC_INI)
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # Created with metadata.create_all: adopt it as the baseline
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Recompute the denormalized bid counters on items and report drift.
+
+    python reconcile_counters.py            # report and fix
+    python reconcile_counters.py --dry-run  # report only
+"""
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.item import reconcile_bid_counters
+
+
+def reconcile(apply: bool = True) -> dict:
+    """Reconcile ``bid_count``, ``high_bidder_id`` and ``last_bid_at`` with ``bids``."""
+    db = SessionLocal()
+    try:
+        return reconcile_bid_counters(db, apply=apply)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    args = parser.parse_args()
+
+    report = reconcile(apply=not args.dry_run)
+    print(f"Checked {report['items']} items: {report['drifted']} drifted "
+          f"(bid_count {report['bid_count']}, high_bidder_id {report['high_bidder_id']}, "
+          f"last_bid_at {report['last_bid_at']})")
+    if not args.dry_run:
+        print(f"Fixed {report['drifted'] - report['skipped']}; {report['skipped']} took a bid meanwhile")
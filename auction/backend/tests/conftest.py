@@ -0,0 +1,80 @@
+"""Shared fixtures. Tests build throwaway SQLite databases and never touch ``auction.db``."""
+import os
+
+from benchmarks.common import make_session_factory, seed_active_item, seed_users, temp_database_url
+
+# Settings are read at import time, so configure them before anything imports the app.
+os.environ["DATABASE_URL"] = temp_database_url("tests")
+os.environ["LIFECYCLE_SCHEDULER_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.query_budget import QUERY_BUDGET_HEADER, QUERY_COUNT_HEADER  # noqa: E402
+
+@pytest.fixture
+def session_factory():
+    """A session factory on a fresh, empty database."""
+    Session = make_session_factory(temp_database_url("test"))
+    yield Session
+    Session.kw["bind"].dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_lot(db):
+    """``make_lot(bidders)`` seeds a seller, ``bidders`` buyers and one open lot; returns (buyer ids, item id)."""
+    def make(bidders: int, starting_price: float = 1.0):
+        users = seed_users(db, bidders + 1)
+        return users[1:], seed_active_item(db, users[0], starting_price=starting_price)
+    return make
+
+
+def check_query_budget(response) -> None:
+    """Fail unless ``response`` reports a statement count within its route's budget."""
+    request = f"{response.request.method} {response.request.url.path}"
+    budget = response.headers.get(QUERY_BUDGET_HEADER)
+    assert budget is not None, f"{request} declares no query budget"
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    assert count <= int(budget), f"{request} sent {count} SQL statements, over its budget of {budget}"
+
+
+@pytest.fixture
+def client():
+    """A client on ``app.main:app``, with the schema created in the app's database."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    make_session_factory(settings.database_url).kw["bind"].dispose()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def app_db(client):
+    """A session on the app's own database, for seeding what ``client`` requests."""
+    Session = make_session_factory(settings.database_url)
+    session = Session()
+    yield session
+    session.close()
+    Session.kw["bind"].dispose()
+
+
+@pytest.fixture
+def query_budget_client(monkeypatch, client):
+    """``client`` with query budgets on and the caches off.
+
+    Every response is checked against its route's ``X-Query-Budget`` as it
+    arrives, so a test fails at the request that goes over.
+    """
+    monkeypatch.setattr(settings, "query_budget_enabled", True)
+    monkeypatch.setattr(settings, "item_cache_enabled", False)
+    monkeypatch.setattr(settings, "principal_cache_enabled", False)
+    client.event_hooks = {"request": [], "response": [check_query_budget]}
+    yield client
@@ -0,0 +1,66 @@
+"""The load harness: recorded samples and the regression check between two saved runs."""
+import json
+import time
+from argparse import Namespace
+
+import pytest
+
+from benchmarks.api_load import Recorder, compare
+
+
+def endpoint(p95_ms: float = 10.0, rps: float = 100.0, requests: int = 1000, errors: int = 0) -> dict:
+    return {"requests": requests, "errors": errors, "rps": rps, "p95_ms": p95_ms}
+
+
+def run_file(tmp_path, name: str, **endpoints) -> str:
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps({"scenario": "browse", "endpoints": endpoints, "total": endpoint()}))
+    return str(path)
+
+
+def check(tmp_path, baseline: dict, candidate: dict, threshold: float = 0.1, min_ms: float = 1.0) -> None:
+    compare(Namespace(baseline=run_file(tmp_path, "baseline", **baseline),
+                      candidate=run_file(tmp_path, "candidate", **candidate),
+                      threshold=threshold, min_ms=min_ms))
+
+
+@pytest.mark.parametrize("candidate", [
+    endpoint(p95_ms=12.0), endpoint(rps=85.0), endpoint(errors=20),
+], ids=["p95", "throughput", "errors"])
+def test_compare_fails_on_a_regression(tmp_path, candidate):
+    with pytest.raises(SystemExit, match="1 endpoint"):
+        check(tmp_path, {"GET /items/": endpoint()}, {"GET /items/": candidate})
+
+
+@pytest.mark.parametrize("baseline, candidate", [
+    (endpoint(), endpoint(p95_ms=10.5, rps=95.0, errors=5)),
+    # Sub-millisecond p95s jitter by more than the threshold
+    (endpoint(p95_ms=0.2), endpoint(p95_ms=0.6)),
+    # Faster and busier is never a regression
+    (endpoint(), endpoint(p95_ms=5.0, rps=200.0)),
+], ids=["within threshold", "below min-ms", "improved"])
+def test_compare_passes_without_a_regression(tmp_path, capsys, baseline, candidate):
+    check(tmp_path, {"GET /items/": baseline}, {"GET /items/": candidate})
+    assert "no regressions" in capsys.readouterr().out
+
+
+def test_compare_skips_endpoints_in_only_one_run(tmp_path, capsys):
+    check(tmp_path, {"GET /items/": endpoint()}, {"POST /bids/": endpoint(p95_ms=100.0)})
+    out = capsys.readouterr().out
+    assert "only in the baseline" in out and "only in the candidate" in out
+
+
+def test_recorder_leaves_out_warmup_and_counts_failures_as_errors():
+    recorder = Recorder(warmup=0.0)
+    recorder.record("GET /items/", 200, time.perf_counter() - 1.0)
+    started = time.perf_counter()
+    for status in (200, 200, 404, 500, 0):
+        recorder.record("GET /items/", status, started)
+    recorder.record("POST /bids/", 200, started)
+
+    summary = recorder.summary()
+
+    items = summary["endpoints"]["GET /items/"]
+    assert (items["requests"], items["errors"]) == (5, 2)
+    assert items["statuses"] == {"0": 1, "200": 2, "404": 1, "500": 1}
+    assert (summary["total"]["requests"], summary["total"]["errors"]) == (6, 2)
@@ -0,0 +1,84 @@
+"""Batched bids: every entry gets the outcome it would get sent alone, in order."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models.bid import Bid
+from app.models.item import AuctionStatus, Item
+from app.models.proxy_bid import ProxyBid
+from app.schemas.bid import BidCreate
+from app.services.bid import BidOutcome, place_bid, place_bids
+from benchmarks.common import make_session_factory, seed_users, temp_database_url
+
+UNKNOWN_ITEM = 10 ** 6
+
+
+def seed_lots(db, proxy: bool) -> dict:
+    """A bidder, a seller and lots in every state; returns their ids by name."""
+    bidder, seller, rival = seed_users(db, 3)
+    now = datetime.utcnow()
+    lots = {
+        "open": (seller, AuctionStatus.ACTIVE, -60, 60),
+        "other open": (seller, AuctionStatus.ACTIVE, -60, 60),
+        "closed": (seller, AuctionStatus.ENDED, -120, -60),
+        "past end": (seller, AuctionStatus.ACTIVE, -120, -60),
+        "not started": (seller, AuctionStatus.ACTIVE, 60, 120),
+        "draft": (seller, AuctionStatus.DRAFT, -60, 60),
+        "own": (bidder, AuctionStatus.ACTIVE, -60, 60),
+    }
+    ids = {"bidder": bidder, "unknown": UNKNOWN_ITEM}
+    for name, (lot_seller, status, start, end) in lots.items():
+        ids[name] = db.scalar(insert(Item).values(
+            title=name, starting_price=5.0, current_price=5.0, seller_id=lot_seller, status=status,
+            start_time=now + timedelta(minutes=start), end_time=now + timedelta(minutes=end),
+        ).returning(Item.id))
+    if proxy:
+        db.execute(insert(ProxyBid).values(item_id=ids["other open"], bidder_id=rival, max_amount=9.0,
+                                           created_at=now))
+    db.commit()
+    return ids
+
+
+BIDS = [
+    ("open", 6.0), ("open", 5.5), ("open", 6.0), ("open", 8.0),
+    ("other open", 5.0), ("other open", 7.0), ("other open", 12.0),
+    ("closed", 50.0), ("past end", 50.0), ("not started", 50.0), ("draft", 50.0),
+    ("unknown", 50.0),
+    ("own", 6.0), ("own", 6.0), ("own", 10.0),
+    ("open", 7.5), ("open", 9.0),
+]
+
+
+def final_state(db, ids: dict) -> dict:
+    items = {name: ids[name] for name in ids if name not in ("bidder", "unknown")}
+    rows = {row.id: row for row in db.execute(
+        select(Item.id, Item.current_price, Item.bid_count, Item.high_bidder_id).where(Item.id.in_(items.values()))
+    )}
+    bids = db.execute(select(Bid.item_id, Bid.bidder_id, Bid.amount).order_by(Bid.id)).all()
+    return {"items": {name: tuple(rows[item_id])[1:] for name, item_id in items.items()},
+            "bids": [tuple(bid) for bid in bids]}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 250])
+@pytest.mark.parametrize("proxy", [False, True], ids=["plain", "standing proxy"])
+def test_batch_matches_bids_sent_one_after_another(chunk_size, proxy):
+    dbs = [make_session_factory(temp_database_url("batch"))() for _ in range(2)]
+    alone, batched = dbs
+    ids = seed_lots(alone, proxy)
+    assert seed_lots(batched, proxy) == ids
+    bids = [BidCreate(item_id=ids[name], amount=amount) for name, amount in BIDS]
+
+    expected = [place_bid(alone, bid, ids["bidder"])[0] for bid in bids]
+    results = place_bids(batched, bids, ids["bidder"], chunk_size=chunk_size)
+
+    assert [outcome for outcome, _ in results] == expected
+    assert {outcome for outcome in expected} == set(BidOutcome)
+    assert final_state(batched, ids) == final_state(alone, ids)
+    for (outcome, placed), bid in zip(results, bids):
+        assert (placed is not None) == (outcome == BidOutcome.ACCEPTED)
+        if placed is not None:
+            assert (placed.item_id, placed.amount, placed.bidder_id) == (bid.item_id, bid.amount, ids["bidder"])
+    for db in dbs:
+        db.close()
+        db.get_bind().dispose()
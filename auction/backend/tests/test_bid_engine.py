@@ -0,0 +1,64 @@
+"""The bid engine's write-behind: batches, and rows that will not write."""
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from app.models.bid import Bid
+from app.models.item import Item
+from app.services.bid import BidOutcome
+from app.services.bid_engine import BidEngine
+
+
+def stored(db, item_id: int):
+    db.expire_all()
+    price, count = db.execute(select(Item.current_price, Item.bid_count).where(Item.id == item_id)).one()
+    return price, count, db.execute(select(func.count(Bid.id)).where(Bid.item_id == item_id)).scalar()
+
+
+def take_bid_id(db, engine: BidEngine, item_id: int, bidder_id: int) -> None:
+    """Write a bid under the id the engine will give its next one, as another writer might."""
+    engine._ensure_bid_ids()
+    db.execute(insert(Bid), [{"id": engine._next_bid_id, "item_id": item_id, "bidder_id": bidder_id,
+                              "amount": 0.5, "created_at": datetime.utcnow()}])
+    db.commit()
+
+
+def test_flush_writes_batch(session_factory, db, make_lot):
+    (bidder,), item_id = make_lot(1)
+    engine = BidEngine(session_factory)
+    for amount in (2.0, 3.0, 4.0):
+        assert engine.place_bid(item_id, bidder, amount).reason == BidOutcome.ACCEPTED
+
+    assert engine.flush() == 3
+    assert stored(db, item_id) == (4.0, 3, 3)
+
+
+def test_poison_row_is_dead_lettered_without_blocking_others(session_factory, db, make_lot):
+    (bidder, other), item_id = make_lot(2)
+    engine = BidEngine(session_factory, flush_attempts=3)
+    take_bid_id(db, engine, item_id, other)
+    engine.place_bid(item_id, bidder, 2.0)  # collides with the row just written
+    engine.place_bid(item_id, bidder, 3.0)
+
+    assert engine.flush() == 1
+    assert engine.pending_count() == 1
+    engine.place_bid(item_id, bidder, 5.0)
+    assert engine.flush() == 1  # later bids are not held up behind the bad one
+    assert engine.flush() == 0
+    assert engine.pending_count() == 0
+    assert [row["amount"] for row in engine.dead_letters] == [2.0]
+    # The book is rebuilt from the database, which never saw the dropped bid
+    assert engine.get_book(item_id).current_price == 5.0
+    assert stored(db, item_id)[:2] == (5.0, 2)
+
+
+def test_stop_gives_failing_rows_their_attempts(session_factory, db, make_lot):
+    (bidder, other), item_id = make_lot(2)
+    engine = BidEngine(session_factory, flush_attempts=2)
+    take_bid_id(db, engine, item_id, other)
+    engine.place_bid(item_id, bidder, 2.0)
+
+    engine.stop()
+
+    assert engine.pending_count() == 0
+    assert len(engine.dead_letters) == 1
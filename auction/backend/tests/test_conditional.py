@@ -0,0 +1,93 @@
+"""Conditional GETs of an item and its bids: 304s, and validators that move with every change."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from itertools import count
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.conditional import Validators
+from app.models.item import AuctionStatus, Item
+from app.models.user import User, UserRole
+from app.services import create_access_token
+from benchmarks.common import PASSWORD_HASH
+
+ITEM_URLS = ["/items/{id}", "/items/{id}/details", "/bids/item/{id}"]
+
+_lots = count()
+
+
+@pytest.fixture
+def lot(app_db):
+    """An open lot in the app's database; returns its id and the seller's and a buyer's headers."""
+    n = next(_lots)
+    names = [f"conditional_seller{n}", f"conditional_buyer{n}"]
+    seller, _ = (
+        app_db.scalar(insert(User).values(email=f"{name}@example.com", username=name,
+                                          hashed_password=PASSWORD_HASH, role=role).returning(User.id))
+        for name, role in zip(names, (UserRole.SELLER, UserRole.BUYER))
+    )
+    now = datetime.utcnow()
+    item_id = app_db.scalar(insert(Item).values(
+        title="Carriage clock", starting_price=1.0, current_price=1.0, seller_id=seller,
+        status=AuctionStatus.ACTIVE, start_time=now - timedelta(hours=1), end_time=now + timedelta(days=1),
+    ).returning(Item.id))
+    app_db.commit()
+    seller_headers, buyer_headers = ({"Authorization": f"Bearer {create_access_token({'sub': name})}"}
+                                     for name in names)
+    return item_id, seller_headers, buyer_headers
+
+
+@pytest.mark.parametrize("url", ITEM_URLS)
+def test_matching_etag_is_answered_with_an_empty_304(client, lot, url):
+    url = url.format(id=lot[0])
+    fresh = client.get(url)
+    etag = fresh.headers["ETag"]
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+
+    assert (fresh.status_code, cached.status_code) == (200, 304)
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert cached.headers["Last-Modified"] == fresh.headers["Last-Modified"]
+    # Weak and listed tags match too
+    assert client.get(url, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_changes_after_a_bid_and_an_update(client, lot):
+    item_id, seller, buyer = lot
+    etags = [client.get(f"/items/{item_id}").headers["ETag"]]
+
+    assert client.post("/bids/", json={"item_id": item_id, "amount": 5.0}, headers=buyer).status_code == 200
+    etags.append(client.get(f"/items/{item_id}").headers["ETag"])
+    assert client.put(f"/items/{item_id}", json={"description": "Restored"}, headers=seller).status_code == 200
+    etags.append(client.get(f"/items/{item_id}").headers["ETag"])
+
+    assert len(set(etags)) == 3
+    for url in ITEM_URLS:
+        url = url.format(id=item_id)
+        assert client.get(url, headers={"If-None-Match": etags[0]}).status_code == 200
+        assert client.get(url, headers={"If-None-Match": etags[-1]}).status_code == 304
+
+
+@pytest.mark.parametrize("url", ITEM_URLS)
+def test_if_modified_since(client, lot, url):
+    url = url.format(id=lot[0])
+    last_modified = client.get(url).headers["Last-Modified"]
+    earlier = format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc), usegmt=True)
+
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": earlier}).status_code == 200
+    assert client.get(url, headers={"If-Modified-Since": "not a date"}).status_code == 200
+    # With both, only the entity tag is compared
+    assert client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}) \
+        .status_code == 200
+
+
+def test_edits_within_one_second_get_different_etags():
+    changed = datetime(2030, 1, 1, 12, 0, 0, 1000)
+    first = Validators.for_item(1, changed, 0)
+    second = Validators.for_item(1, changed + timedelta(microseconds=1), 0)
+    assert first.etag != second.etag
+    assert first.last_modified == second.last_modified
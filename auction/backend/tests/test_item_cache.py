@@ -0,0 +1,69 @@
+"""Item cache invalidation: off the event loop for shared backends, and on item creation."""
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.cache import CacheBackend, RedisCacheBackend
+from app.schemas.item import ItemCreate
+from app.services import aio
+from app.services.item_cache import ItemCache, item_cache
+from benchmarks.common import seed_users
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class ThreadRecordingBackend(RedisCacheBackend):
+    """A fakeredis backend noting which threads wrote to it."""
+
+    def __init__(self):
+        super().__init__(client=fakeredis.FakeRedis())
+        self.writer_threads = set()
+
+    def delete(self, *keys: str) -> None:
+        self.writer_threads.add(threading.current_thread())
+        super().delete(*keys)
+
+    def incr(self, name: str) -> int:
+        self.writer_threads.add(threading.current_thread())
+        return super().incr(name)
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_shared_backend_is_invalidated_off_the_event_loop():
+    backend = ThreadRecordingBackend()
+    cache = ItemCache(backend, ttl=60, listing_ttl=60)
+
+    async def scenario():
+        async def load():
+            return None
+
+        await cache.get_active_items(0, 10, None, load)
+        cache.invalidate_item(1)
+        cache.invalidate_all()
+        await cache.settle()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert backend.writer_threads and loop_thread not in backend.writer_threads
+    assert backend.counters("gen:items", "gen:listings") == [1, 2]
+
+    cache.invalidate_listings()  # no loop running: written in place
+    assert threading.current_thread() in backend.writer_threads
+    assert backend.counters("gen:listings") == [3]
+
+
+def test_create_item_retires_cached_listings(db):
+    (seller,) = seed_users(db, 1)
+    start = datetime.utcnow() + timedelta(hours=1)
+    new_item = ItemCreate(title="new lot", starting_price=1.0, start_time=start, end_time=start + timedelta(hours=1))
+    before = item_cache.backend.counters("gen:listings")[0]
+
+    asyncio.run(aio.create_item(db, new_item, seller))
+
+    assert item_cache.backend.counters("gen:listings")[0] > before
@@ -0,0 +1,123 @@
+"""Bulk item import: the multi-row insert behind it, the upload readers and the per-row report."""
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, select
+
+from app.core.config import settings
+from app.models.item import AuctionStatus, Item
+from app.models.user import User, UserRole
+from app.schemas.item import ItemCreate
+from app.services.item import create_items
+from app.services.item_import import (
+    CSV_MEDIA_TYPE, JSON_MEDIA_TYPE, UploadTooLarge, check_declared_size, read_json_array,
+)
+from app.services import create_access_token
+from benchmarks.common import PASSWORD_HASH, seed_users
+
+
+def item(title: str, opens_in_hours: float) -> ItemCreate:
+    start = datetime.utcnow() + timedelta(hours=opens_in_hours)
+    return ItemCreate(title=title, description="", starting_price=1.0,
+                      start_time=start, end_time=start + timedelta(hours=2))
+
+
+def test_create_items_returns_ids_in_input_order_from_one_insert(db):
+    (seller,) = seed_users(db, 1)
+    items = [item(f"lot {n}", -1 if n % 3 else 1) for n in range(50)]
+    inserts = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: inserts.append(statement)
+                 if statement.startswith("INSERT") else None)
+
+    created = create_items(db, items, seller, activate=True)
+
+    assert len(inserts) == 1
+    titles = dict(db.execute(select(Item.id, Item.title)).all())
+    assert [titles[item_id] for item_id, _ in created] == [new.title for new in items]
+    assert [status for _, status in created] == [
+        AuctionStatus.ACTIVE if n % 3 else AuctionStatus.DRAFT for n in range(50)
+    ]
+
+
+def read(reader, *chunks: bytes) -> list:
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def rows():
+        return [row async for row in reader(stream())]
+
+    return asyncio.run(rows())
+
+
+def test_json_array_is_refused_once_over_the_byte_limit(monkeypatch):
+    monkeypatch.setattr(settings, "item_import_max_json_bytes", 16)
+    assert read(read_json_array, b'[{"a": 1},', b"{}]") == [{"a": 1}, {}]
+
+    with pytest.raises(UploadTooLarge):
+        read(read_json_array, b'[{"a": 1},', b'{"b": 2}]')
+
+
+def test_json_array_is_refused_by_content_length(monkeypatch):
+    monkeypatch.setattr(settings, "item_import_max_json_bytes", 16)
+    check_declared_size(JSON_MEDIA_TYPE, "16")
+    check_declared_size(JSON_MEDIA_TYPE, None)
+    check_declared_size(CSV_MEDIA_TYPE, "17")  # streamed, so not capped
+    with pytest.raises(UploadTooLarge):
+        check_declared_size(JSON_MEDIA_TYPE, "17")
+
+
+def upload_rows(n: int) -> list:
+    start = datetime.utcnow() - timedelta(minutes=1)
+    return [{"title": f"Uploaded lot {n}", "description": "", "starting_price": 1.0 + n,
+             "start_time": start.isoformat(), "end_time": (start + timedelta(days=1)).isoformat()}
+            for n in range(n)]
+
+
+def ndjson(rows: list) -> bytes:
+    lines = [json.dumps(row) for row in rows]
+    lines[2] = "{not json"
+    lines[6] = json.dumps({**rows[6], "starting_price": "not a price"})
+    return "\n".join(lines[:4] + [""] + lines[4:]).encode()
+
+
+def csv_upload(rows: list) -> bytes:
+    rows[2] = {**rows[2], "end_time": "soon"}
+    rows[6] = {**rows[6], "description": "Spans\ntwo lines"}
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+@pytest.mark.parametrize("media_type, body, failed", [
+    ("application/x-ndjson", ndjson, {3, 7}), ("text/csv", csv_upload, {3}),
+])
+def test_upload_reports_every_row_in_order(client, app_db, monkeypatch, media_type, body, failed):
+    # Small chunks, so rows and their ids are reported across several inserts
+    monkeypatch.setattr(settings, "item_import_chunk_size", 3)
+    name = f"import_seller_{media_type.split('/')[1]}"
+    app_db.execute(insert(User).values(email=f"{name}@example.com", username=name,
+                                       hashed_password=PASSWORD_HASH, role=UserRole.SELLER))
+    app_db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': name})}", "Content-Type": media_type}
+
+    response = client.post("/items/bulk", params={"activate": "true"}, content=body(upload_rows(10)),
+                           headers=headers)
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["created"], report["activated"], report["failed"]) == (10 - len(failed), 10 - len(failed),
+                                                                          len(failed))
+    assert [line["row"] for line in report["rows"]] == list(range(1, 11))
+    assert {line["row"] for line in report["rows"] if "errors" in line} == failed
+    created = {line["id"]: line["row"] for line in report["rows"] if "id" in line}
+    titles = dict(app_db.execute(select(Item.id, Item.title).where(Item.id.in_(created))).all())
+    assert {item_id: titles[item_id] for item_id in created} == \
+        {item_id: f"Uploaded lot {row - 1}" for item_id, row in created.items()}
@@ -0,0 +1,83 @@
+"""The lifecycle scheduler: drafts start, auctions end, and stale heap entries change nothing."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from app.models.item import AuctionStatus, Item
+from app.services.lifecycle import END, START, AuctionScheduler
+from benchmarks.common import seed_users
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+
+def seed_lots(db, *lots) -> list:
+    """Insert ``(status, start offset, end offset)`` lots, offsets in minutes from ``NOW``; returns their ids."""
+    (seller,) = seed_users(db, 1)
+    rows = [{"title": f"Lot {n}", "starting_price": 1.0, "current_price": 1.0, "seller_id": seller,
+             "status": status, "start_time": NOW + timedelta(minutes=start),
+             "end_time": NOW + timedelta(minutes=end)} for n, (status, start, end) in enumerate(lots)]
+    ids = db.scalars(insert(Item).returning(Item.id, sort_by_parameter_order=True), rows).all()
+    db.commit()
+    return ids
+
+
+def statuses(db, item_ids) -> list:
+    db.expire_all()
+    found = dict(db.execute(select(Item.id, Item.status).where(Item.id.in_(item_ids))).all())
+    return [found[item_id] for item_id in item_ids]
+
+
+def scheduler_for(session_factory, db, **kwargs):
+    scheduler = AuctionScheduler(session_factory, clock=lambda: NOW, **kwargs)
+    transitions = []
+    scheduler.add_listener(lambda transition, item_ids, now: transitions.append((transition, sorted(item_ids))))
+    scheduler.load(db)
+    return scheduler, transitions
+
+
+def test_draft_starts_at_its_start_time_then_ends(session_factory, db):
+    draft, later = seed_lots(db, (AuctionStatus.DRAFT, 5, 60), (AuctionStatus.DRAFT, 30, 60))
+    scheduler, transitions = scheduler_for(session_factory, db)
+
+    assert scheduler.run_due(NOW + timedelta(minutes=4)) == 0
+    assert scheduler.run_due(NOW + timedelta(minutes=5)) == 1
+    assert statuses(db, [draft, later]) == [AuctionStatus.ACTIVE, AuctionStatus.DRAFT]
+    # Starting it queued its end, behind the other draft's start
+    assert scheduler.pending_count() == 2
+    assert scheduler.next_due() == NOW + timedelta(minutes=30)
+
+    assert scheduler.run_due(NOW + timedelta(minutes=30)) == 1
+    assert scheduler.run_due(NOW + timedelta(minutes=60)) == 2
+    assert statuses(db, [draft, later]) == [AuctionStatus.ENDED, AuctionStatus.ENDED]
+    assert transitions == [(START, [draft]), (START, [later]), (END, [draft, later])]
+    assert (scheduler.started, scheduler.ended) == (2, 2)
+
+
+def test_due_auctions_end_in_batches(session_factory, db):
+    ids = seed_lots(db, *[(AuctionStatus.ACTIVE, -60, 1)] * 5, (AuctionStatus.ACTIVE, -60, 10))
+    scheduler, transitions = scheduler_for(session_factory, db, batch_size=2)
+
+    assert scheduler.run_due(NOW + timedelta(minutes=1)) == 5
+
+    assert [len(item_ids) for _, item_ids in transitions] == [2, 2, 1]
+    assert statuses(db, ids) == [AuctionStatus.ENDED] * 5 + [AuctionStatus.ACTIVE]
+    assert scheduler.pending_count() == 1
+
+
+def test_guarded_update_loses_to_a_concurrent_change(session_factory, db):
+    extended, cancelled, started_early = seed_lots(
+        db, (AuctionStatus.ACTIVE, -60, 1), (AuctionStatus.ACTIVE, -60, 1), (AuctionStatus.DRAFT, 1, 60),
+    )
+    scheduler, transitions = scheduler_for(session_factory, db)
+    # Writers get in after the heap was loaded: an edit, a cancellation and a manual activation
+    db.execute(update(Item).where(Item.id == extended).values(end_time=NOW + timedelta(minutes=30)))
+    db.execute(update(Item).where(Item.id == cancelled).values(status=AuctionStatus.CANCELLED))
+    db.execute(update(Item).where(Item.id == started_early).values(status=AuctionStatus.ACTIVE))
+    db.commit()
+
+    assert scheduler.run_due(NOW + timedelta(minutes=1)) == 0
+
+    assert transitions == []
+    assert statuses(db, [extended, cancelled, started_early]) == [
+        AuctionStatus.ACTIVE, AuctionStatus.CANCELLED, AuctionStatus.ACTIVE,
+    ]
@@ -0,0 +1,30 @@
+"""``/metrics`` exposes the executor, cache and single-flight counters alongside the request metrics."""
+
+
+def scrape(client) -> dict:
+    """Sample lines of ``/metrics`` as ``{name{labels}: value}``."""
+    lines = client.get("/metrics").text.splitlines()
+    return dict(line.rsplit(" ", 1) for line in lines if line and not line.startswith("#"))
+
+
+def test_component_counters_are_scraped(client):
+    before = scrape(client)
+    client.post("/auth/register", json={"username": "metrics_user", "password": "pass"})
+    token = client.post("/auth/login", data={"username": "metrics_user", "password": "pass"}).json()
+    client.get("/users/me", headers={"Authorization": f"Bearer {token['access_token']}"})
+    client.get("/items/", params={"active_only": "true"})
+    client.get("/items/", params={"active_only": "true"})
+    after = scrape(client)
+
+    completed = 'executor_jobs_total{executor="password_hash",outcome="completed"}'
+    assert float(after[completed]) >= float(before[completed]) + 2
+    assert 'executor_queue_depth{executor="password_hash"}' in after
+    assert 'executor_queue_wait_seconds_count{executor="password_hash"}' in after
+    assert float(after['principal_cache_lookups_total{result="miss"}']) > \
+        float(before['principal_cache_lookups_total{result="miss"}'])
+    assert float(after['item_cache_lookups_total{result="hit"}']) > \
+        float(before['item_cache_lookups_total{result="hit"}'])
+    assert "item_cache_hit_age_seconds_max" in after and "item_cache_hit_ratio" in after
+    assert float(after['single_flight_reads_total{result="called"}']) > \
+        float(before['single_flight_reads_total{result="called"}'])
+    assert "single_flight_in_flight" in after
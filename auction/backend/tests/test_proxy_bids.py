@@ -0,0 +1,181 @@
+"""Proxy bidding: the resolver on its own, then floods of entries against a lot."""
+import random
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.models.bid import Bid
+from app.models.item import Item
+from app.models.proxy_bid import ProxyBid
+from app.schemas.bid import BidCreate, ProxyBidCreate
+from app.services.bid import (
+    BidOutcome, ProxyResolution, _save_proxy, bid_increment, place_bid, place_proxy_bid, resolve_proxies,
+)
+
+START_PRICE = 1.0
+
+
+@pytest.mark.parametrize("price, leader, proxies, resolution", [
+    # Nothing to answer with
+    (10.0, 7, [], ProxyResolution(10.0, 7)),
+    (100.0, 7, [(99.0, 1)], ProxyResolution(100.0, 7)),
+    # A lone proxy bids one increment over the price, capped at its maximum
+    (10.0, None, [(50.0, 1)], ProxyResolution(10.5, 1, ((1, 10.5),))),
+    (10.0, 7, [(10.2, 1)], ProxyResolution(10.2, 1, ((1, 10.2),))),
+    # The runner-up is bid to its maximum, the winner one increment past it
+    (10.0, None, [(50.0, 1), (30.0, 2)], ProxyResolution(31.0, 1, ((2, 30.0), (1, 31.0)))),
+    (10.0, None, [(30.0, 2), (30.5, 1)], ProxyResolution(30.5, 1, ((2, 30.0), (1, 30.5)))),
+    # Of two equal maximums the older wins, at that maximum
+    (10.0, None, [(30.0, 1), (30.0, 2)], ProxyResolution(30.0, 1, ((2, 30.0), (1, 30.0)))),
+    (10.0, None, [(30.0, 2), (30.0, 1)], ProxyResolution(30.0, 2, ((1, 30.0), (2, 30.0)))),
+    # A proxy equal to the price is older than the bid that set it, so it leads
+    (100.0, 9, [(100.0, 1)], ProxyResolution(100.0, 1, ((1, 100.0),))),
+    # The leader raising their own maximum moves nothing unless a rival is above the price
+    (10.5, 1, [(80.0, 1)], ProxyResolution(10.5, 1)),
+    (10.5, 1, [(10.0, 2), (80.0, 1)], ProxyResolution(10.5, 1)),
+    (10.5, 1, [(20.0, 2), (80.0, 1)], ProxyResolution(20.5, 1, ((2, 20.0), (1, 20.5)))),
+])
+def test_resolve_proxies(price, leader, proxies, resolution):
+    assert resolve_proxies(price, leader, proxies) == resolution
+
+
+def lot_state(db, item_id: int):
+    """The lot's price, leader and counters, checked against its bids and proxies."""
+    item = db.execute(
+        select(Item.current_price, Item.high_bidder_id, Item.bid_count).where(Item.id == item_id)
+    ).one()
+    rows, top = db.execute(
+        select(func.count(Bid.id), func.max(Bid.amount)).where(Bid.item_id == item_id)
+    ).one()
+    assert (rows, top) == (item.bid_count, item.current_price if rows else None)
+    above = db.execute(
+        select(ProxyBid.bidder_id).where(ProxyBid.item_id == item_id,
+                                         ProxyBid.max_amount > item.current_price,
+                                         ProxyBid.bidder_id != item.high_bidder_id)
+    ).all()
+    assert not above, "proxies other than the leader's are still above the price"
+    return item
+
+
+def expected(maximums: dict):
+    """Price and leader for accepted maximums ``{bidder: (max, order set)}``."""
+    if not maximums:
+        return START_PRICE, None
+    ranked = sorted(maximums.items(), key=lambda entry: (-entry[1][0], entry[1][1]))
+    (leader, (top, _)), rest = ranked[0], ranked[1:]
+    level = rest[0][1][0] if rest else START_PRICE
+    if level == top:
+        return top, leader
+    return min(top, round(level + bid_increment(level), 2)), leader
+
+
+def test_direct_bid_equal_to_proxy_maximum_loses(db, make_lot):
+    (proxy_bidder, direct_bidder), item_id = make_lot(2)
+    place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=100.0), proxy_bidder)
+
+    outcome, _ = place_bid(db, BidCreate(item_id=item_id, amount=100.0), direct_bidder)
+
+    assert outcome == BidOutcome.ACCEPTED
+    item = lot_state(db, item_id)
+    assert (item.current_price, item.high_bidder_id) == (100.0, proxy_bidder)
+
+
+def test_direct_bid_under_proxy_is_answered(db, make_lot):
+    (proxy_bidder, direct_bidder), item_id = make_lot(2)
+    place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=100.0), proxy_bidder)
+
+    place_bid(db, BidCreate(item_id=item_id, amount=40.0), direct_bidder)
+
+    item = lot_state(db, item_id)
+    assert (item.current_price, item.high_bidder_id) == (41.0, proxy_bidder)
+
+
+def test_proxy_must_beat_price_and_own_maximum(db, make_lot):
+    (bidder,), item_id = make_lot(1)
+    assert place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=START_PRICE), bidder)[0] \
+        == BidOutcome.TOO_LOW
+    assert place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=50.0), bidder)[0] == BidOutcome.ACCEPTED
+    assert place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=40.0), bidder)[0] == BidOutcome.TOO_LOW
+    assert place_proxy_bid(db, ProxyBidCreate(item_id=0, max_amount=40.0), bidder)[0] == BidOutcome.NOT_FOUND
+
+
+@pytest.mark.parametrize("entries, bidders", [(1, 1), (2, 2), (50, 50), (2000, 200)])
+def test_proxy_flood(db, make_lot, entries, bidders):
+    """A flood of entries ends at the price the two best maximums give, writing at most two bids each."""
+    rng = random.Random(entries)
+    users, item_id = make_lot(bidders)
+    maximums, price, accepted, written = {}, START_PRICE, 0, 0
+    for n in range(entries):
+        bidder = rng.choice(users)
+        # Mostly over the visible price, by up to a few increments; some too low
+        max_amount = round(price + rng.uniform(-5.0, 50.0), 2)
+        outcome, resolution, placed = place_proxy_bid(
+            db, ProxyBidCreate(item_id=item_id, max_amount=max_amount), bidder
+        )
+        if outcome != BidOutcome.ACCEPTED:
+            continue
+        assert len(placed) <= 2
+        assert len({new_bid.bidder_id for new_bid in placed}) == len(placed)
+        price = resolution.price
+        accepted += 1
+        written += len(placed)
+        maximums[bidder] = (max_amount, n)
+
+    item = lot_state(db, item_id)
+    assert (item.current_price, item.high_bidder_id) == expected(maximums)
+    assert written <= 2 * accepted
+
+
+def test_proxy_flood_mixed_with_direct_bids(db, make_lot):
+    rng = random.Random(3)
+    users, item_id = make_lot(50)
+    price = START_PRICE
+    for n in range(600):
+        bidder = rng.choice(users)
+        if n % 3 == 2:
+            place_bid(db, BidCreate(item_id=item_id, amount=round(price + rng.uniform(0.01, 20.0), 2)), bidder)
+            price = lot_state(db, item_id).current_price
+            continue
+        outcome, resolution, placed = place_proxy_bid(
+            db, ProxyBidCreate(item_id=item_id, max_amount=round(price + rng.uniform(-5.0, 50.0), 2)), bidder
+        )
+        if outcome == BidOutcome.ACCEPTED:
+            assert len(placed) <= 2
+            price = resolution.price
+    lot_state(db, item_id)
+
+
+def test_rival_proxy_read_before_the_leader_raises_is_retried(session_factory, make_lot):
+    (leader, rival), item_id = make_lot(2)
+    db, leader_db = session_factory(), session_factory()
+    place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=10.0), leader)
+    raises, raised = [20.0], []
+
+    def raise_first(conn, cursor, statement, *args):
+        # The rival has read the leader's old maximum; the leader's raise lands before its write
+        if statement.startswith("UPDATE items") and raises:
+            new_max = ProxyBidCreate(item_id=item_id, max_amount=raises.pop())
+            raised.append(place_proxy_bid(leader_db, new_max, leader)[0])
+
+    event.listen(db.get_bind(), "before_cursor_execute", raise_first)
+    try:
+        outcome, resolution, _ = place_proxy_bid(db, ProxyBidCreate(item_id=item_id, max_amount=15.0), rival)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", raise_first)
+
+    assert raised == [BidOutcome.ACCEPTED] and outcome == BidOutcome.ACCEPTED
+    item = lot_state(db, item_id)
+    assert (item.current_price, item.high_bidder_id) == (15.5, leader)
+    db.close()
+    leader_db.close()
+
+
+def test_saving_a_proxy_twice_keeps_one_row(db, make_lot):
+    (bidder,), item_id = make_lot(1)
+    now = datetime.utcnow()
+    _save_proxy(db, item_id, bidder, 10.0, now)
+    _save_proxy(db, item_id, bidder, 20.0, now)
+    db.commit()
+
+    assert db.execute(select(ProxyBid.max_amount).where(ProxyBid.item_id == item_id)).scalars().all() == [20.0]
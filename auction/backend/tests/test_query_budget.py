@@ -0,0 +1,23 @@
+"""Query budgets: every route stays within the SQL statements it declares."""
+from app.core.config import settings
+from app.services import create_access_token
+from benchmarks.common import make_session_factory
+from benchmarks.query_budget import requests, routes_without_budget, seed
+
+
+def test_every_route_declares_a_budget():
+    assert routes_without_budget() == []
+
+
+def test_every_route_stays_within_its_budget(query_budget_client):
+    ids = seed(make_session_factory(settings.database_url), lots=10)
+    tokens = {who: create_access_token({"sub": username})
+              for who, username in [("buyer", "bench0"), ("seller", "seller"), ("admin", "admin")]}
+
+    for method, path, kwargs, who in requests(ids):
+        headers = dict(kwargs.pop("headers", {}))
+        if who:
+            headers["Authorization"] = f"Bearer {tokens[who]}"
+        # The client's response hook checks X-Query-Count against X-Query-Budget
+        response = query_budget_client.request(method, path, headers=headers, **kwargs)
+        assert response.status_code < 500, f"{method} {path} failed"
@@ -0,0 +1,31 @@
+"""Every service query uses an index: no full table scans, no temporary sorts."""
+import pytest
+from sqlalchemy import text
+
+from benchmarks.query_plans import migrated_database, query_plans, service_calls
+
+
+@pytest.fixture(scope="module")
+def database():
+    engine, Session, calls = migrated_database()
+    yield engine, Session, dict(calls)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", [name for name, _ in service_calls(0, 0, 0)])
+def test_service_query_uses_an_index(database, name):
+    engine, Session, calls = database
+    plan = query_plans(engine, Session, calls[name])
+    assert plan, f"{name} sent no queries"
+    assert [detail for detail, bad in plan if bad] == []
+
+
+def test_dropped_index_is_caught():
+    engine, Session, calls = migrated_database()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_bids_item_id_amount"))
+        plan = query_plans(engine, Session, dict(calls)["get_item_bids"])
+    finally:
+        engine.dispose()
+    assert any(bad for _, bad in plan)
@@ -0,0 +1,114 @@
+"""Token buckets: the refill arithmetic, the stores, and the 429 a route gives."""
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    BucketStore, MemoryBucketStore, RedisBucketStore, parse_limits, rate_limited_user, take_token,
+)
+from app.main import app as main_app
+
+
+def test_bucket_refills_at_its_rate():
+    state, now = None, 100.0
+    waits = []
+    for _ in range(5):
+        state, wait = take_token(state, now, 3, 2.0)
+        waits.append(wait)
+    assert waits[:3] == [0, 0, 0] and waits[3] == pytest.approx(0.5)
+    assert take_token(state, now + 0.4, 3, 2.0)[1] > 0
+    assert take_token(state, now + 0.5, 3, 2.0)[1] == 0
+
+
+def test_store_takes_from_every_bucket_or_none():
+    store = MemoryBucketStore()
+    user, item = ("bids:user:1", 5, 1.0), ("bids:item:9", 1, 1.0)
+    assert store.take([user, item]) is None
+
+    refused = store.take([user, item])
+
+    assert refused is not None and refused[0] == 1
+    # The refused request left the user's bucket as it was: four tokens still there
+    assert [store.take([user]) for _ in range(5)][:4] == [None] * 4
+    assert store.take([user]) is not None
+
+
+def test_redis_buckets_are_shared_by_every_worker():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    workers = [RedisBucketStore(client=fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    user, item = ("bids:user:1", 10, 0.001), ("bids:item:9", 1, 0.001)
+
+    with ThreadPoolExecutor(8) as pool:
+        refusals = list(pool.map(lambda n: workers[n % 2].take([user]), range(30)))
+
+    assert refusals.count(None) == 10
+    # All or none across workers too: the item bucket refuses, the user's is left alone
+    workers[0].take([("bids:user:2", 2, 0.001), item])
+    assert workers[1].take([("bids:user:2", 2, 0.001), item])[0] == 1
+    assert workers[1].take([("bids:user:2", 2, 0.001)]) is None
+    workers[0].clear()
+    assert workers[1].take([user]) is None
+
+
+def test_bucket_store_is_abstract():
+    with pytest.raises(TypeError):
+        BucketStore()
+
+
+def test_limits_parse_and_reject_unknown_keys():
+    assert [(limit.key, limit.capacity, limit.rate) for limit in parse_limits("user:2/1, ip:10/5")] \
+        == [("user", 2.0, 2.0), ("ip", 10.0, 2.0)]
+    with pytest.raises(ValueError):
+        parse_limits("session:1/1")
+
+
+def test_route_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_bids", "user:2/60")
+    app = FastAPI()
+    app.exception_handlers.update(main_app.exception_handlers)
+
+    async def current_user():
+        return SimpleNamespace(id=-42)  # a user no other test will rate limit
+
+    @app.post("/bids")
+    async def bid(user=rate_limited_user("bids", current_user)):
+        return {"user": user.id}
+
+    with TestClient(app) as client:
+        statuses = [client.post("/bids") for _ in range(3)]
+
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert int(statuses[2].headers["Retry-After"]) >= 1
+
+
+def test_batch_takes_a_token_per_distinct_item(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_bid_batch", "user:100/1,item:2/60")
+    app = FastAPI()
+    app.exception_handlers.update(main_app.exception_handlers)
+
+    async def current_user():
+        return SimpleNamespace(id=-43)
+
+    @app.post("/bids/batch")
+    async def batch(bids: List[dict], user=rate_limited_user("bid_batch", current_user)):
+        return {"bids": len(bids)}
+
+    def post(*item_ids):
+        return client.post("/bids/batch", json=[{"item_id": item_id, "amount": 2.0} for item_id in item_ids])
+
+    with TestClient(app) as client:
+        # Three bids on one item take one token from its bucket
+        assert post(-1, -1, -1).status_code == 200
+        assert post(-1, -2).status_code == 200
+        # The bucket of -1 is empty; refused, the batch leaves -3's untouched
+        assert post(-3, -1).status_code == 429
+        assert post(-3).status_code == 200
+        assert post(-3).status_code == 200
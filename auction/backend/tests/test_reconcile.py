@@ -0,0 +1,33 @@
+"""Bid counter reconciliation, paged through the items in keyset batches."""
+from datetime import datetime
+
+from sqlalchemy import event, insert, select, update
+
+from app.models.bid import Bid
+from app.models.item import Item
+from app.services.item import reconcile_bid_counters
+from benchmarks.common import seed_active_item, seed_users
+
+
+def test_counters_are_reconciled_a_batch_at_a_time(db):
+    seller, buyer = seed_users(db, 2)
+    item_ids = [seed_active_item(db, seller) for _ in range(5)]
+    now = datetime.utcnow()
+    db.execute(insert(Bid), [{"item_id": item_id, "bidder_id": buyer, "amount": 2.0, "created_at": now}
+                             for item_id in item_ids[1::2]])
+    db.execute(update(Item).where(Item.id == item_ids[0]).values(bid_count=7))
+    db.commit()
+    pages = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: pages.append(statement)
+                 if statement.lstrip().startswith("SELECT") and "LIMIT" in statement else None)
+
+    assert reconcile_bid_counters(db, apply=False, batch_size=2) == {
+        "items": 5, "bid_count": 3, "high_bidder_id": 2, "last_bid_at": 2, "drifted": 3, "skipped": 0,
+    }
+    assert len(pages) == 3
+
+    assert reconcile_bid_counters(db, batch_size=2)["drifted"] == 3
+    assert reconcile_bid_counters(db, batch_size=2)["drifted"] == 0
+    db.expire_all()
+    assert db.scalars(select(Item.bid_count).order_by(Item.id)).all() == [0, 1, 0, 1, 0]
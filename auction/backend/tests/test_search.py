@@ -0,0 +1,99 @@
+"""Full-text item search: the index follows item writes, input is quoted, and rank cursors page."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.models.item import AuctionStatus, Item
+from app.models.user import User, UserRole
+from app.schemas.item import ItemWithBids
+from app.services.item import ITEM_ROW_COLUMNS, SEARCH_ORDER, build_match_query, search_items
+from benchmarks.common import PASSWORD_HASH
+
+
+def add_items(db, *titles, description: str = "") -> list:
+    """Index active lots with ``titles``, listed by one seller; returns their ids in order."""
+    seller = db.scalar(select(User.id).where(User.username == "search_seller"))
+    if seller is None:
+        seller = db.scalar(insert(User).values(
+            email="search_seller@example.com", username="search_seller",
+            hashed_password=PASSWORD_HASH, role=UserRole.SELLER,
+        ).returning(User.id))
+    now = datetime.utcnow()
+    rows = [{"title": title, "description": description, "starting_price": 1.0, "current_price": 1.0,
+             "seller_id": seller, "status": AuctionStatus.ACTIVE,
+             "start_time": now - timedelta(hours=1), "end_time": now + timedelta(days=1)} for title in titles]
+    ids = db.scalars(insert(Item).returning(Item.id, sort_by_parameter_order=True), rows).all()
+    db.commit()
+    return ids
+
+
+def found(db, text: str, **filters) -> list:
+    return [row.id for row in search_items(db, text, **filters)]
+
+
+def test_index_follows_insert_update_and_delete(db):
+    compass, lamp = add_items(db, "Brass compass", "Oak lamp")
+    assert found(db, "compass") == [compass]
+
+    db.execute(update(Item).where(Item.id == compass).values(title="Brass sextant"))
+    db.execute(update(Item).where(Item.id == lamp).values(description="Has a compass rose"))
+    db.commit()
+    assert found(db, "compass") == [lamp]
+    assert found(db, "sextant") == [compass]
+
+    db.execute(delete(Item).where(Item.id == lamp))
+    db.commit()
+    assert found(db, "compass") == []
+    assert found(db, "oak") == []
+
+
+def test_prefix_and_operator_input(db):
+    telescope, telegraph, either = add_items(db, "Telescope", "Telegraph key", "Telescope OR telegraph")
+
+    assert sorted(found(db, "tele*")) == sorted([telescope, telegraph, either])
+    assert found(db, "tele") == []
+    # Operators and punctuation are searched as words, never parsed
+    assert found(db, "telescope OR telegraph") == [either]
+    assert found(db, 'telescope NOT "') == []
+    assert build_match_query('NEAR(a b) "x" -y') == '"NEAR" "a" "b" "x" "y"'
+    assert build_match_query("*** ---") is None
+
+
+def test_results_are_item_rows_with_their_rank(db):
+    add_items(db, "Brass compass")
+    (row,) = search_items(db, "compass")
+    assert tuple(row._fields) == tuple(column.key for column in ITEM_ROW_COLUMNS) + ("rank",)
+    assert row.title == "Brass compass" and row.rank < 0
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7])
+def test_rank_cursor_pages_through_every_match_once(db, limit):
+    # Titles repeating the word rank higher; equal ranks fall back to the id
+    add_items(db, *[" ".join(["clock"] * (n % 4 + 1)) + f" lot {n}" for n in range(20)],
+              description="mantel")
+    add_items(db, "Unrelated")
+
+    seen, after = [], None
+    while True:
+        page = search_items(db, "clock", limit=limit, after=after)
+        seen += [row.id for row in page]
+        cursor = SEARCH_ORDER.next_cursor(page, limit)
+        if cursor is None:
+            break
+        after = SEARCH_ORDER.decode(cursor)
+
+    assert seen == found(db, "clock", limit=100)
+    assert len(seen) == len(set(seen)) == 20
+
+
+def test_search_route_pages_with_the_cursor_header(client, app_db):
+    # A word no other test indexes
+    ids = add_items(app_db, *[f"Zzyzx lot {n}" for n in range(3)])
+
+    first = client.get("/items/search", params={"q": "zzyzx", "limit": 2})
+    rest = client.get("/items/search", params={"q": "zzyzx", "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [item["id"] for item in first.json() + rest.json()] == ids
+    assert set(first.json()[0]) == set(ItemWithBids.model_fields)
+    assert "X-Next-Cursor" not in rest.headers
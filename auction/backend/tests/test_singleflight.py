@@ -0,0 +1,94 @@
+"""Shared reads: coalescing, forgetting from writer threads, the item cache, and their own sessions."""
+import asyncio
+import threading
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.schemas.item import Item
+from app.services import aio
+from app.services.item_cache import item_cache
+
+
+def test_concurrent_calls_share_one_flight():
+    async def scenario():
+        flights, calls = SingleFlight(), []
+
+        async def read():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        return await asyncio.gather(*(flights.do("key", read) for _ in range(5))), calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [1] * 5 and len(calls) == 1
+
+
+def test_forget_from_another_thread():
+    async def scenario():
+        flights, release = SingleFlight(), asyncio.Event()
+
+        async def read():
+            await release.wait()
+            return "before the write"
+
+        first = asyncio.ensure_future(flights.do("key", read, ("item:1",)))
+        await asyncio.sleep(0)
+        writer = threading.Thread(target=flights.forget, args=("item:1",))
+        writer.start()
+        writer.join()
+        assert flights.in_flight() == 0
+        release.set()
+        assert await first == "before the write"
+
+    asyncio.run(scenario())
+
+
+def test_shared_read_runs_on_its_own_session(session_factory, make_lot, monkeypatch):
+    monkeypatch.setattr(settings, "item_cache_enabled", False)
+    monkeypatch.setattr(settings, "single_flight_enabled", True)
+    _, item_id = make_lot(1)
+    caller = session_factory()
+
+    async def read_twice():
+        return await asyncio.gather(aio.get_item_by_id(caller, item_id), aio.get_item_by_id(caller, item_id))
+
+    first, second = asyncio.run(read_twice())
+    assert first is second
+    assert isinstance(first, Item) and first.id == item_id
+    assert not caller.in_transaction()
+    caller.close()
+
+
+def test_fill_never_caches_a_flight_from_before_an_invalidation():
+    """A reader arriving after a write must not join, then cache, a read that started before it."""
+    item_id, key = -1, ("cache test", -1)  # an item no other test caches
+    tags = (aio._item_tag(item_id),)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def read_before_write():
+            await release.wait()
+            return "before the write"
+
+        async def read_after_write():
+            return "after the write"
+
+        first = asyncio.ensure_future(item_cache.get_item(
+            item_id, lambda: aio.read_flights.do(key, read_before_write, tags)))
+        await asyncio.sleep(0)
+        # The write commits and invalidates on a worker thread, as run_sync does
+        await asyncio.to_thread(item_cache.invalidate_item, item_id)
+        second = asyncio.ensure_future(item_cache.get_item(
+            item_id, lambda: aio.read_flights.do(key, read_after_write, tags)))
+        await asyncio.sleep(0)
+        release.set()
+        await first
+        assert await second == "after the write"
+        assert await item_cache.get_item(item_id, read_before_write) == "after the write"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        item_cache.invalidate_item(item_id)
@@ -0,0 +1,38 @@
+"""Registration: the taken check and the insert happen in one service call."""
+import pytest
+
+from app.schemas.user import UserCreate
+from app.services import user as user_service
+from app.services.user import UserExists, register_user
+from benchmarks.common import PASSWORD_HASH
+
+
+def new_user(email: str, username: str) -> UserCreate:
+    return UserCreate(email=email, username=username, password="pass")
+
+
+def test_taken_email_or_username_is_refused(db):
+    register_user(db, new_user("ann@example.com", "ann"), hashed_password=PASSWORD_HASH)
+
+    with pytest.raises(UserExists) as refused:
+        register_user(db, new_user("ann@example.com", "bob"), hashed_password=PASSWORD_HASH)
+    assert refused.value.field == "email"
+    with pytest.raises(UserExists) as refused:
+        register_user(db, new_user("bob@example.com", "ann"), hashed_password=PASSWORD_HASH)
+    assert refused.value.field == "username"
+
+
+def test_user_registered_after_the_check_is_refused(db, monkeypatch):
+    register_user(db, new_user("ann@example.com", "ann"), hashed_password=PASSWORD_HASH)
+    real_check, checks = user_service._taken_field, []
+
+    def check(db, user):
+        # The first check misses ann, as it would if her registration committed just after it
+        checks.append(user)
+        return real_check(db, user) if len(checks) > 1 else None
+
+    monkeypatch.setattr(user_service, "_taken_field", check)
+
+    with pytest.raises(UserExists) as refused:
+        register_user(db, new_user("other@example.com", "ann"), hashed_password=PASSWORD_HASH)
+    assert refused.value.field == "username"
@@ -7,6 +7,9 @@ class AuctionApp {
     this.auctions = [];
     this.currentPage = 0;
     this.pageSize = 12;
+    this.nextCursor = null;
+    // One live connection per watched item id, each with a close() function
+    this.watchers = new Map();
 
     this.init();
   }
@@ -40,6 +43,9 @@ class AuctionApp {
 
     // Load more auctions
     document.getElementById('loadMoreBtn').addEventListener('click', () => this.loadMoreAuctions());
+
+    // Release every live connection (and its server-side subscriber) on leaving
+    window.addEventListener('pagehide', () => this.unwatchAll());
   }
 
   showModal(type) {
@@ -130,10 +136,14 @@ class AuctionApp {
       if (activeOnly) {
         params.append('active_only', 'true');
       }
+      if (this.nextCursor) {
+        params.append('cursor', this.nextCursor);
+      }
 
       const response = await fetch(`${this.apiBase}/items/?${params}`);
       if (response.ok) {
         const auctions = await response.json();
+        this.nextCursor = response.headers.get('X-Next-Cursor');
         this.auctions = [...this.auctions, ...auctions];
         this.renderAuctions(auctions);
       }
@@ -143,6 +153,9 @@ class AuctionApp {
   }
 
   async loadMoreAuctions() {
+    if (!this.nextCursor) {
+      return;
+    }
     this.currentPage++;
     await this.loadAuctions();
   }
@@ -152,13 +165,66 @@ class AuctionApp {
 
     auctions.forEach(auction => {
       const card = this.createAuctionCard(auction);
-      grid.appendChild(card);
+      // A page may repeat an auction already shown; replace its card
+      const shown = grid.querySelector(`[data-auction-id="${auction.id}"]`);
+      if (shown) {
+        this.unwatchAuction(auction.id);
+        shown.replaceWith(card);
+      } else {
+        grid.appendChild(card);
+      }
+      if (auction.status === 'active') {
+        this.watchAuction(auction.id, card);
+      }
     });
   }
 
+  watchAuction(auctionId, card) {
+    // Live price updates instead of re-fetching the listing; a card rendered
+    // again for the same auction takes over its connection rather than adding one
+    this.unwatchAuction(auctionId);
+    const price = card.querySelector('.auction-price');
+    const showBid = (data) => {
+      const bid = JSON.parse(data);
+      price.textContent = `$${bid.amount.toFixed(2)}`;
+    };
+
+    let watcher;
+    if ('WebSocket' in window) {
+      const socket = new WebSocket(`${this.apiBase.replace(/^http/, 'ws')}/ws/items/${auctionId}`);
+      socket.onmessage = (event) => showBid(event.data);
+      // The server may close it (say, a consumer that fell behind); forget it then
+      socket.onclose = () => {
+        if (this.watchers.get(auctionId) === watcher) {
+          this.watchers.delete(auctionId);
+        }
+      };
+      watcher = { close: () => socket.close() };
+    } else {
+      const source = new EventSource(`${this.apiBase}/sse/items/${auctionId}`);
+      source.addEventListener('bid', (event) => showBid(event.data));
+      watcher = { close: () => source.close() };
+    }
+    this.watchers.set(auctionId, watcher);
+  }
+
+  unwatchAuction(auctionId) {
+    const watcher = this.watchers.get(auctionId);
+    if (watcher) {
+      this.watchers.delete(auctionId);
+      watcher.close();
+    }
+  }
+
+  unwatchAll() {
+    this.watchers.forEach(watcher => watcher.close());
+    this.watchers.clear();
+  }
+
   createAuctionCard(auction) {
     const card = document.createElement('div');
     card.className = 'auction-card';
+    card.dataset.auctionId = auction.id;
 
     const statusClass = `status-${auction.status.toLowerCase()}`;
     const statusText = auction.status.charAt(0).toUpperCase() + auction.status.slice(1);